@@ -0,0 +1,260 @@
+"""
+Stream the product catalog from parquet into the EcommerceProducts collection
+
+    cd Ingestion
+    python ingest_data.py                                   # ../Dataset/shopping_queries_dataset_products_us.parquet
+    python ingest_data.py products.parquet --batch-size 500 --concurrency 4
+    python ingest_data.py --dry-run --limit 100000          # read and build objects only, no Weaviate
+    python ingest_data.py --restart                         # ignore ingest_checkpoint.json and start over
+
+The parquet is read in record batches with only the product columns, so memory
+stays flat however large the catalog is; rows are turned into property dicts
+straight from the Arrow columns. Objects are sent to Weaviate in fixed-size
+batches with several requests in flight. Progress lines and the final summary
+report rows per second and peak memory. The collection must already exist (see
+ingestion.ipynb); the connection settings come from .env as in the notebooks.
+
+Object UUIDs are derived from product_id, so importing a product again replaces
+it instead of adding a duplicate; rows without a product_id are skipped and
+counted. After each record batch has been written without errors, its end
+offset is saved to the checkpoint file. The first record batch with failed
+objects stops the import, and a rerun resumes from the checkpoint, skipping
+whole parquet row groups, unless --restart is given.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+
+DEFAULT_PARQUET = "../Dataset/shopping_queries_dataset_products_us.parquet"
+COLLECTION_NAME = "EcommerceProducts"
+PRODUCT_PROPERTIES = [
+    "product_id", "product_title", "product_description",
+    "product_bullet_point", "product_brand", "product_color"
+]
+DEFAULT_CHECKPOINT = "ingest_checkpoint.json"
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KiB on Linux
+
+def iter_products(path: str, read_batch_size: int, start: int = 0) -> Iterator[List[Dict[str, str]]]:
+    """
+    Yield lists of property dicts, one list per parquet record batch, beginning
+    at row `start`. Missing values become empty strings, as fillna('') did in the notebook
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    missing = [name for name in PRODUCT_PROPERTIES if name not in parquet_file.schema_arrow.names]
+    if missing:
+        raise ValueError(f"{path} has no column(s) {', '.join(missing)}")
+
+    # Row groups before `start` are never read; rows before it in its row group are sliced off
+    first_group, skip = 0, start
+    while first_group < parquet_file.num_row_groups and skip >= parquet_file.metadata.row_group(first_group).num_rows:
+        skip -= parquet_file.metadata.row_group(first_group).num_rows
+        first_group += 1
+    row_groups = list(range(first_group, parquet_file.num_row_groups))
+    if not row_groups:
+        return
+
+    for record_batch in parquet_file.iter_batches(batch_size=read_batch_size, row_groups=row_groups, columns=PRODUCT_PROPERTIES):
+        if skip:
+            skipped = min(skip, record_batch.num_rows)
+            record_batch = record_batch.slice(skipped)
+            skip -= skipped
+            if not record_batch.num_rows:
+                continue
+        columns = [record_batch.column(name).to_pylist() for name in PRODUCT_PROPERTIES]
+        yield [
+            {name: value or "" for name, value in zip(PRODUCT_PROPERTIES, row)}
+            for row in zip(*columns)
+        ]
+
+def parquet_fingerprint(path: str) -> Dict:
+    """Identifies the input file, so a checkpoint is never applied to a different one"""
+    stat = os.stat(path)
+    return {"parquet": os.path.abspath(path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+class Checkpoint:
+    """The number of leading parquet rows already written to the collection, kept in a small JSON file"""
+
+    def __init__(self, path: str, parquet: str, collection: str):
+        self.path = path
+        self.source = {**parquet_fingerprint(parquet), "collection": collection}
+        self.rows = 0
+        self.complete = False
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as file:
+            saved = json.load(file)
+        if {key: saved.get(key) for key in self.source} != self.source:
+            raise SystemExit(
+                f"{self.path} belongs to another parquet file or collection; "
+                "use --restart to start over or --checkpoint to pick another file"
+            )
+        self.rows = saved["rows"]
+        self.complete = saved.get("complete", False)
+
+    def save(self, rows: int, complete: bool = False) -> None:
+        self.rows = rows
+        self.complete = complete
+        data = {**self.source, "rows": rows, "complete": complete, "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+        # Written to a temporary file first, so an interrupted write never loses the previous checkpoint
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        os.replace(temporary, self.path)
+
+def connect():
+    import weaviate
+    from dotenv import load_dotenv
+    from weaviate.classes.init import Auth
+
+    load_dotenv()
+    return weaviate.connect_to_weaviate_cloud(
+        cluster_url=os.environ.get("WEAVIATE_URL"),
+        auth_credentials=Auth.api_key(os.environ.get("WEAVIATE_API_KEY")),
+        headers={"X-OpenAI-Api-Key": os.environ.get("OPENAI_API_KEY")}
+    )
+
+class Progress:
+    def __init__(self, every: int, label: str):
+        self.every = every
+        self.label = label
+        self.rows = 0
+        self.start = time.perf_counter()
+        self._next_report = every
+
+    def add(self, rows: int) -> None:
+        self.rows += rows
+        if self.rows >= self._next_report:
+            self._next_report += self.every
+            self.report()
+
+    def report(self) -> None:
+        elapsed = time.perf_counter() - self.start
+        print(
+            f"{self.label} {self.rows} products in {elapsed:.1f}s "
+            f"({self.rows / max(elapsed, 1e-9):,.0f} rows/s, peak memory {peak_memory_mb():,.0f} MB)",
+            flush=True
+        )
+
+def with_product_id(products: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Rows without a product_id would all get the UUID of the empty string and overwrite each other"""
+    return [properties for properties in products if properties["product_id"]]
+
+def report_skipped(skipped: int) -> None:
+    if skipped:
+        print(f"Skipped {skipped} rows without a product_id")
+
+def ingest(args: argparse.Namespace) -> int:
+    """Stream the parquet into the collection from the last checkpoint; returns the number of failed objects"""
+    progress = Progress(args.report_every, "Read" if args.dry_run else "Imported")
+    skipped = 0
+
+    if args.dry_run:
+        for products in iter_products(args.parquet, args.read_batch_size):
+            products = products[:args.limit - progress.rows] if args.limit else products
+            skipped += len(products) - len(with_product_id(products))
+            progress.add(len(products))
+            if args.limit and progress.rows >= args.limit:
+                break
+        progress.report()
+        report_skipped(skipped)
+        return 0
+
+    checkpoint = Checkpoint(args.checkpoint, args.parquet, args.collection)
+    if not args.restart:
+        checkpoint.load()
+    if checkpoint.complete:
+        print(f"All {checkpoint.rows} products were already imported according to {args.checkpoint}, use --restart to import them again")
+        return 0
+    offset = checkpoint.rows
+    if args.limit and offset >= args.limit:
+        print(f"The first {offset} products were already imported according to {args.checkpoint}")
+        return 0
+    if offset:
+        print(f"Resuming after {offset} products imported earlier (checkpoint {args.checkpoint})")
+
+    from weaviate.util import generate_uuid5
+
+    client = connect()
+    try:
+        if not client.collections.exists(args.collection):
+            raise SystemExit(f"Collection '{args.collection}' does not exist, create it with ingestion.ipynb first")
+        collection = client.collections.get(args.collection)
+
+        print(f"Importing {args.parquet} into '{args.collection}' (batch size {args.batch_size}, {args.concurrency} concurrent requests)")
+        finished = False
+        with collection.batch.fixed_size(batch_size=args.batch_size, concurrent_requests=args.concurrency) as batch:
+            for products in iter_products(args.parquet, args.read_batch_size, start=offset):
+                products = products[:args.limit - offset] if args.limit else products
+                importable = with_product_id(products)
+                skipped += len(products) - len(importable)
+                errors_before = batch.number_errors  # Counts every failure since the import started
+                for properties in importable:
+                    # The same product always gets the same UUID, so a repeated import overwrites it
+                    batch.add_object(properties=properties, uuid=generate_uuid5(properties["product_id"]))
+                progress.add(len(products))
+                offset += len(products)
+
+                # Only rows Weaviate has accepted count as imported. The checkpoint cannot
+                # move past a record batch with failures, so the import stops there and a
+                # rerun retries from the end of the last complete batch
+                batch.flush()
+                batch_errors = batch.number_errors - errors_before
+                if batch_errors:
+                    print(f"Stopping: {batch_errors} objects of the record batch ending at product {offset} failed")
+                    break
+                checkpoint.save(offset)
+
+                if args.limit and offset >= args.limit:
+                    break
+            else:
+                finished = True
+
+        failed = collection.batch.failed_objects
+        progress.report()
+        report_skipped(skipped)
+        if failed:
+            print(f"{len(failed)} objects failed, first error: {failed[0].message}")
+            print(f"Rerun to retry from product {checkpoint.rows}; products imported since then are overwritten, not duplicated")
+        elif finished:
+            checkpoint.save(offset, complete=True)
+        print(f"Total objects in collection: {len(collection)}")
+        return len(failed)
+
+    finally:
+        client.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream the product parquet into Weaviate")
+    parser.add_argument("parquet", nargs="?", default=DEFAULT_PARQUET, help="Product parquet file")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--batch-size", type=int, default=200, help="Objects per Weaviate batch request")
+    parser.add_argument("--concurrency", type=int, default=2, help="Batch requests in flight at once")
+    parser.add_argument("--read-batch-size", type=int, default=10000, help="Rows per parquet record batch")
+    parser.add_argument("--limit", type=int, default=None, help="Import only the first N products")
+    parser.add_argument("--report-every", type=int, default=50000, help="Rows between progress lines")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File recording how many products were imported")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import from the first product")
+    parser.add_argument("--dry-run", action="store_true", help="Read and build the objects without connecting to Weaviate")
+    args = parser.parse_args()
+    if args.batch_size < 1 or args.concurrency < 1 or args.read_batch_size < 1:
+        parser.error("--batch-size, --concurrency and --read-batch-size must be positive")
+
+    failed = ingest(args)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
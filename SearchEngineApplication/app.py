@@ -1,9 +1,9 @@
 import streamlit as st
 import logging
-from utils import check_backend_health, get_available_brands, get_available_colors, search_products
+from utils import get_backend_health, get_facet_cache, search_products
 from components.search_interface import render_search_interface
 from components.chat import render_chat_interface
-from components.search_results import render_search_results
+from components.search_results import refine_results, render_search_results, set_search_results
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -509,22 +509,31 @@ if "products" not in st.session_state:
     st.session_state.products = []
 if "session_id" not in st.session_state:
     st.session_state.session_id = None
-if "backend_connected" not in st.session_state:
-    st.session_state.backend_connected = check_backend_health()
-if "brands_cache" not in st.session_state:
-    st.session_state.brands_cache = None
-if "colors_cache" not in st.session_state:
-    st.session_state.colors_cache = None
-if "cache_loaded" not in st.session_state:
-    st.session_state.cache_loaded = False
 if "active_brand_filter" not in st.session_state:
     st.session_state.active_brand_filter = None
 if "active_color_filter" not in st.session_state:
     st.session_state.active_color_filter = None
-
-logger.info(f"App started - Backend connected: {st.session_state.backend_connected}")
-
-if not st.session_state.backend_connected:
+if "pending_summary" not in st.session_state:
+    st.session_state.pending_summary = False
+if "results_query" not in st.session_state:
+    st.session_state.results_query = None
+if "results_page" not in st.session_state:
+    st.session_state.results_page = 0
+if "results_has_more" not in st.session_state:
+    st.session_state.results_has_more = False
+if "detail_product_id" not in st.session_state:
+    st.session_state.detail_product_id = None
+if "local_refinement" not in st.session_state:
+    st.session_state.local_refinement = True
+
+# Shared by all sessions and refreshed in the background, so page loads never wait on the backend;
+# the facet cache starts loading the filters while the user types a query
+backend_health = get_backend_health()
+facet_cache = get_facet_cache()
+
+logger.info(f"App started - Backend connected: {backend_health.healthy}")
+
+if backend_health.healthy is False:
     st.warning("⚠️ Backend API is not running. Please start the backend server first.")
     st.code("cd backend && python run_server.py")
     st.info("💡 Make sure to set your OPENAI_API_KEY in the backend/.env file")
@@ -542,8 +551,9 @@ else:
             logger.info("New search button clicked")
             st.session_state.searched = False
             st.session_state.messages = []
-            st.session_state.products = []
+            set_search_results([])
             st.session_state.session_id = None
+            st.session_state.pending_summary = False
             # Reset filters when starting new search
             st.session_state.active_brand_filter = None
             st.session_state.active_color_filter = None
@@ -572,14 +582,17 @@ else:
             if st.button("🗑️ Clear Filters", use_container_width=True):
                 st.session_state.active_brand_filter = None
                 st.session_state.active_color_filter = None
-                # Perform search with original query and no filters
+                # Show the over-fetched unfiltered results when there are any, else search again without filters
+                search = st.session_state.results_query
+                if st.session_state.local_refinement and search and refine_results(search["query"]):
+                    st.rerun()
                 if original_query:
                     try:
                         with st.spinner("🔍 Searching without filters..."):
                             unfiltered_results = search_products(original_query)
 
                         if unfiltered_results and unfiltered_results.get("products"):
-                            st.session_state.products = unfiltered_results["products"]
+                            set_search_results(unfiltered_results["products"], original_query)
                             st.success(f"Filters cleared - showing all {len(unfiltered_results['products'])} results")
                             st.rerun()
                     except Exception as e:
@@ -588,29 +601,22 @@ else:
 
         # Continue with existing code
 
-        # Load brands/colors cache if not already loaded
-        if not st.session_state.cache_loaded and st.session_state.backend_connected:
-            with st.spinner("Loading filters..."):
-                try:
-                    st.session_state.brands_cache = get_available_brands() or []
-                    st.session_state.colors_cache = get_available_colors() or []
-                    st.session_state.cache_loaded = True
-                except Exception as e:
-                    logger.error(f"Failed to load cache: {str(e)}")
-                    st.session_state.brands_cache = []
-                    st.session_state.colors_cache = []
-                    st.session_state.cache_loaded = True  # Prevent retry loops
-
         # Brand filter
-        brands = st.session_state.brands_cache or []
+        brands = facet_cache.brands
         brand_options = ["All Brands"] + brands
         selected_brand = st.selectbox("Brand:", brand_options, key="brand_filter")
 
         # Color filter
-        colors = st.session_state.colors_cache or []
+        colors = facet_cache.colors
         color_options = ["All Colors"] + colors
         selected_color = st.selectbox("Color:", color_options, key="color_filter")
 
+        st.checkbox(
+            "Filter current results instantly",
+            key="local_refinement",
+            help="Fetches the top 100 results once and filters them here, searching again only when too few match"
+        )
+
         # Save filters button
         if st.button("💾 Save Filter Settings", use_container_width=True):
             brand_filter = None if selected_brand == "All Brands" else selected_brand
@@ -620,6 +626,14 @@ else:
             st.session_state.active_brand_filter = brand_filter
             st.session_state.active_color_filter = color_filter
 
+            # Narrow the displayed results now, locally when the over-fetched results have enough matches
+            search = st.session_state.results_query
+            if st.session_state.local_refinement and search and not refine_results(search["query"], brand_filter, color_filter):
+                with st.spinner("🔍 Searching with filters..."):
+                    filtered_results = search_products(search["query"], brand_filter=brand_filter, color_filter=color_filter)
+                if filtered_results:
+                    set_search_results(filtered_results["products"], search["query"], brand_filter, color_filter)
+
             filter_description = []
             if brand_filter:
                 filter_description.append(f"Brand: {brand_filter}")
@@ -637,8 +651,9 @@ else:
 
     chat_col, results_col = st.columns([1, 3])
 
-    with chat_col:
-        render_chat_interface(st.session_state.session_id)
-
+    # Render the results first so they show up while the chat waits for a pending AI summary
     with results_col:
-        render_search_results(st.session_state.products)
\ No newline at end of file
+        render_search_results(st.session_state.products)
+
+    with chat_col:
+        render_chat_interface(st.session_state.session_id)
\ No newline at end of file
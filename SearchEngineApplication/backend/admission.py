@@ -0,0 +1,219 @@
+"""
+Admission control: token-bucket rate limits and concurrency limits per budget, globally and per user.
+
+Requests are classified into budgets (chat LLM calls, searches, keyword
+suggestions) that are limited independently because their costs differ by orders
+of magnitude. Limits are per worker process.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from config import config
+from metrics import registry
+
+admission_rejections = registry.counter("admission_rejections_total", "Requests rejected with 429 by admission control", ("budget", "reason"))
+admission_queue_wait = registry.histogram("admission_queue_wait_seconds", "Time queued requests waited for a concurrency slot", ("budget",))
+
+class AdmissionRejected(Exception):
+    def __init__(self, budget: str, reason: str, retry_after: float):
+        super().__init__(f"{budget} budget exhausted ({reason})")
+        self.budget = budget
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `burst`"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take a token; returns 0 on success, otherwise the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+    def refund(self) -> None:
+        """Give back a token taken by a request that was rejected by a later check"""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+class Budget:
+    """
+    Rate and concurrency limits for one class of requests.
+
+    Over-rate requests and users over their concurrency limit are rejected at
+    once. Requests beyond `concurrency` wait for a slot; when `max_queue` are
+    already waiting, or a slot does not free up within `queue_timeout`, the
+    request is shed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        user_rate: float,
+        user_burst: float,
+        concurrency: int,
+        user_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        max_users: int = 10000
+    ):
+        self.name = name
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.concurrency = concurrency
+        self.user_concurrency = user_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_users = max_users
+
+        self._bucket = TokenBucket(rate, burst)
+        self._user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._user_in_flight: Dict[str, int] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiting = 0
+
+    def _user_bucket(self, user: str) -> TokenBucket:
+        bucket = self._user_buckets.get(user)
+        if bucket is None:
+            bucket = self._user_buckets[user] = TokenBucket(self.user_rate, self.user_burst)
+            if len(self._user_buckets) > self.max_users:
+                # Users idle the longest have full buckets anyway
+                self._user_buckets.popitem(last=False)
+        else:
+            self._user_buckets.move_to_end(user)
+        return bucket
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        admission_rejections.inc(self.name, reason)
+        raise AdmissionRejected(self.name, reason, retry_after)
+
+    @asynccontextmanager
+    async def admit(self, user: Optional[str]) -> AsyncIterator[None]:
+        """
+        Hold a slot of this budget for the duration of the block, or raise
+        AdmissionRejected. Requests without a user only count against the global limits
+        """
+        # Tokens taken before a later check sheds the request are refunded, so a
+        # user's rate is not spent on requests the global limits turned away
+        user_bucket = None
+        if user is not None:
+            if self._user_in_flight.get(user, 0) >= self.user_concurrency:
+                self._reject("user_concurrency", 1)
+
+            user_bucket = self._user_bucket(user)
+            wait = user_bucket.try_acquire()
+            if wait:
+                self._reject("user_rate", wait)
+        wait = self._bucket.try_acquire()
+        if wait:
+            if user_bucket is not None:
+                user_bucket.refund()
+            self._reject("rate", wait)
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        queued = self._semaphore.locked()
+        if queued and self._waiting >= self.max_queue:
+            self._bucket.refund()
+            if user_bucket is not None:
+                user_bucket.refund()
+            self._reject("queue_full", self.queue_timeout)
+
+        if user is not None:
+            self._user_in_flight[user] = self._user_in_flight.get(user, 0) + 1
+        try:
+            if queued:
+                start = time.perf_counter()
+                self._waiting += 1
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self._reject("queue_timeout", self.queue_timeout)
+                finally:
+                    self._waiting -= 1
+                admission_queue_wait.observe(time.perf_counter() - start, self.name)
+            else:
+                await self._semaphore.acquire()  # A slot is free, returns without suspending
+
+            try:
+                yield
+            finally:
+                self._semaphore.release()
+        finally:
+            if user is not None:
+                remaining = self._user_in_flight[user] - 1
+                if remaining:
+                    self._user_in_flight[user] = remaining
+                else:
+                    del self._user_in_flight[user]
+
+def create_budgets() -> Dict[str, Budget]:
+    return {
+        "chat": Budget(
+            "chat",
+            rate=config.ADMISSION_CHAT_QPS,
+            burst=config.ADMISSION_CHAT_BURST,
+            user_rate=config.ADMISSION_CHAT_USER_QPS,
+            user_burst=config.ADMISSION_CHAT_USER_BURST,
+            concurrency=config.ADMISSION_CHAT_CONCURRENCY,
+            user_concurrency=config.ADMISSION_CHAT_USER_CONCURRENCY,
+            max_queue=config.ADMISSION_CHAT_MAX_QUEUE,
+            queue_timeout=config.ADMISSION_QUEUE_TIMEOUT
+        ),
+        "search": Budget(
+            "search",
+            rate=config.ADMISSION_SEARCH_QPS,
+            burst=config.ADMISSION_SEARCH_BURST,
+            user_rate=config.ADMISSION_SEARCH_USER_QPS,
+            user_burst=config.ADMISSION_SEARCH_USER_BURST,
+            concurrency=config.ADMISSION_SEARCH_CONCURRENCY,
+            user_concurrency=config.ADMISSION_SEARCH_USER_CONCURRENCY,
+            max_queue=config.ADMISSION_SEARCH_MAX_QUEUE,
+            queue_timeout=config.ADMISSION_QUEUE_TIMEOUT
+        ),
+        "suggest": Budget(
+            "suggest",
+            rate=config.ADMISSION_SUGGEST_QPS,
+            burst=config.ADMISSION_SUGGEST_BURST,
+            user_rate=config.ADMISSION_SUGGEST_USER_QPS,
+            user_burst=config.ADMISSION_SUGGEST_USER_BURST,
+            concurrency=config.ADMISSION_SUGGEST_CONCURRENCY,
+            user_concurrency=config.ADMISSION_SUGGEST_USER_CONCURRENCY,
+            max_queue=config.ADMISSION_SUGGEST_MAX_QUEUE,
+            queue_timeout=config.ADMISSION_QUEUE_TIMEOUT
+        )
+    }
+
+def classify(method: str, path: str) -> Optional[str]:
+    """
+    Budget for a request: searches, keyword suggestions and LLM-backed chat writes
+    are limited; cached facets, product details, session reads, summary polling,
+    health and metrics are not
+    """
+    if method == "GET" and path == "/search/suggest":
+        return "suggest"
+    if method != "POST":
+        return None
+    if path == "/search":
+        return "search"
+    if path.startswith("/chat/"):
+        return "chat"
+    return None
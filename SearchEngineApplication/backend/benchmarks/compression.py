@@ -0,0 +1,97 @@
+"""
+Bytes on the wire for typical responses: uncompressed, gzip, brotli and conditional 304s
+
+    cd SearchEngineApplication/backend
+    python -m benchmarks.compression
+
+The 304 column is a real revalidation: each payload is served through
+conditional_json_response, fetched again with the ETag it returned, and the
+304 is measured as sent, status line and headers included.
+"""
+import asyncio
+import time
+from datetime import datetime
+from email.utils import format_datetime
+from http import HTTPStatus
+from typing import List, Optional, Tuple
+
+from starlette.requests import Request
+
+from benchmarks.serialization import SIZES, make_products
+from config import config
+from middleware import brotli, compress
+from models import SearchResponse
+from responses import conditional_json_response, dump_json
+
+FACET_WORDS = ["Amazon Basics", "Apple", "Samsung", "Sony", "Logitech", "Anker", "Hanes", "Nike", "Adidas", "Generic"]
+FACET_SUFFIXES = ["", " Home", " Kids", " Pro", " Outdoors"]
+
+def facet_payload(name: str) -> dict:
+    # The facet endpoints return up to 50 values
+    values = [f"{word}{suffix}" for suffix in FACET_SUFFIXES for word in FACET_WORDS]
+    return {name: values, "count": len(values), "status": "success"}
+
+# Added by uvicorn to every response
+SERVER_HEADERS = [(b"date", format_datetime(datetime.now().astimezone(), usegmt=True).encode()), (b"server", b"uvicorn")]
+
+async def serve(payload, cache_control: str, last_modified: Optional[datetime], request_headers: List[Tuple[bytes, bytes]]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Run conditional_json_response for a GET with `request_headers`; returns status, headers and body as sent"""
+    scope = {"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": request_headers}
+    response = conditional_json_response(Request(scope), payload, cache_control, last_modified)
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await response(scope, receive, send)
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], start["headers"], body
+
+def wire_size(status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> int:
+    """Bytes of an HTTP/1.1 response: status line, headers and body"""
+    status_line = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n".encode()
+    return len(status_line) + sum(len(name) + len(value) + 4 for name, value in SERVER_HEADERS + headers) + 2 + len(body)
+
+def revalidated_size(payload, cache_control: str, last_modified: Optional[datetime]) -> int:
+    """Size of the 304 answering a repeat fetch that sends the first response's ETag"""
+    async def revalidate():
+        _, headers, _ = await serve(payload, cache_control, last_modified, [])
+        etag = dict(headers)[b"etag"]
+        status, headers, body = await serve(payload, cache_control, last_modified, [(b"if-none-match", etag)])
+        assert status == 304, f"Expected a 304, got {status}"
+        return wire_size(status, headers, body)
+
+    return asyncio.run(revalidate())
+
+def main() -> None:
+    # Cache headers as the endpoints send them
+    fetched_at = datetime.now()
+    facet_cache_control = f"public, max-age={config.FACET_CACHE_TTL}"
+    payloads = [
+        ("/search/brands", facet_payload("brands"), facet_cache_control, fetched_at),
+        ("/search/colors", facet_payload("colors"), facet_cache_control, fetched_at),
+    ]
+    for size in SIZES:
+        products = make_products(size)
+        payloads.append((f"/chat/{{id}}/products [{size}]", SearchResponse(products=products, total_results=size), "private, no-cache", fetched_at))
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    header = f"{'endpoint':<28} {'identity':>9}" + "".join(f" {encoding:>8} {'ms':>6}" for encoding in encodings) + f" {'304':>5}"
+    print(header)
+    for name, payload, cache_control, last_modified in payloads:
+        body = dump_json(payload)
+        row = f"{name:<28} {len(body):>9}"
+        for encoding in encodings:
+            start = time.perf_counter()
+            compressed = compress(body, encoding)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            row += f" {len(compressed):>8} {elapsed_ms:>6.2f}"
+        row += f" {revalidated_size(payload, cache_control, last_modified):>5}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold import time of backend modules, measured in fresh interpreters with -X importtime
+
+    cd SearchEngineApplication/backend
+    python -m benchmarks.import_time                 # main, routes, helpers, config
+    python -m benchmarks.import_time main --repeat 10 --top 20
+
+Also checks that importing does not load the OpenAI or Weaviate client libraries,
+which are only needed once a request uses a client; exits with status 1 if it does.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULES = ["main", "routes", "helpers", "config"]
+CLIENT_LIBRARIES = ("openai", "weaviate")  # Imported lazily by dependencies.py
+
+def measure(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Import `module` in a new interpreter; returns its cumulative microseconds and
+    the (self, cumulative) microseconds of every module it imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+        check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    # Imports are listed after their children, so the module's own imports are
+    # the deeper-indented lines right above it (interpreter startup comes first)
+    index = max(i for i, entry in enumerate(entries) if entry[0] == module and entry[1] == 1)
+    timings: Dict[str, Tuple[int, int]] = {}
+    for name, depth, self_us, cumulative_us in reversed(entries[:index]):
+        if depth <= 1:
+            break
+        timings[name] = (self_us, cumulative_us)
+    return entries[index][3], timings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure backend import time")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list for each module")
+    args = parser.parse_args()
+
+    # Never reach for the real services, whatever the local .env says
+    os.environ.setdefault("SIMULATION_MODE", "true")
+    os.environ.setdefault("LOG_FILE", "")
+
+    client_imports: List[str] = []
+    print(f"{'module':<12} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    slowest = {}
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        totals = [total / 1000 for total, _ in runs]
+        print(f"{module:<12} {statistics.median(totals):>10.1f} {min(totals):>8.1f} {max(totals):>8.1f}")
+
+        timings = runs[-1][1]
+        slowest[module] = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+        client_imports += [f"{module} -> {name}" for name in CLIENT_LIBRARIES if name in timings]
+
+    for module, entries in slowest.items():
+        print(f"\nSlowest imports under {module} (cumulative ms):")
+        for name, (self_us, cumulative_us) in entries:
+            print(f"  {cumulative_us / 1000:>8.1f}  {name}")
+
+    if client_imports:
+        print(f"\nClient libraries imported at import time: {', '.join(client_imports)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Load test for /search, /chat/start and /chat/message
+
+    cd SearchEngineApplication/backend
+    python -m benchmarks.loadtest --base-url http://localhost:8000 --concurrency 20 --duration 60
+    python -m benchmarks.loadtest --in-process --mix search=0.7,chat_start=0.1,chat_message=0.2 --output run.json
+    python -m benchmarks.loadtest --in-process --output new.json --compare old.json
+
+Each virtual user loops until the run ends: it picks an endpoint from the mix and
+a query from the Shopping Queries dataset (--queries path to
+shopping_queries_dataset_examples.parquet, a text file with one query per line,
+or a built-in sample). Chat messages continue the user's own session, which is
+started first when needed and restarted after --max-turns messages.
+
+The backend runs with whatever dependencies it is configured with: start it with
+SIMULATION_MODE=true for stubbed OpenAI/Weaviate, or use --in-process, which
+serves the app inside this process (simulated unless SIMULATION_MODE is set
+otherwise). Admission control applies as usual, and 429s count as errors.
+
+Only requests that start after the warmup and complete before --duration ends
+are counted, and throughput is divided by that measurement window; requests
+still in flight at the end are drained but left out.
+
+Results (throughput, p50/p95/p99 latency, error rate and status codes per
+endpoint) are printed, and written as JSON with --output so runs of different
+commits can be compared with --compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+ENDPOINTS = ("search", "chat_start", "chat_message")
+DEFAULT_MIX = "search=0.6,chat_start=0.2,chat_message=0.2"
+
+# Used without --queries; drawn from the US part of the Shopping Queries dataset
+SAMPLE_QUERIES = [
+    "wireless earbuds", "iphone 13 case", "running shoes for men", "women's winter coat",
+    "usb c charger fast charging", "coffee maker with grinder", "kids water bottle",
+    "gaming mouse wireless", "yoga mat thick", "led desk lamp", "bluetooth speaker waterproof",
+    "cast iron skillet", "phone tripod", "noise cancelling headphones", "laptop backpack",
+    "air fryer", "electric toothbrush", "mens leather wallet", "dog bed large",
+    "hdmi cable 4k", "baby monitor", "stainless steel water bottle", "mechanical keyboard",
+    "instant pot", "wireless charger stand", "sunglasses polarized", "throw pillow covers",
+    "portable power bank", "hiking boots women", "kitchen knife set", "smart watch for android",
+    "shower curtain", "resistance bands", "ring light with tripod", "external hard drive 2tb",
+    "vacuum cleaner cordless", "camping tent 4 person", "makeup brush set", "office chair ergonomic",
+    "cat litter box",
+]
+
+FOLLOW_UPS = [
+    "Do you have any cheaper options?",
+    "Which of these is the most durable?",
+    "Show me something similar in black",
+    "Are there any from a better known brand?",
+    "What would you recommend for a gift?",
+    "Anything more compact?",
+]
+
+def load_queries(path: Optional[str], size: int, seed: int) -> List[str]:
+    """Unique US queries from the dataset's examples parquet or a text file, sampled down to `size`"""
+    if not path:
+        return list(SAMPLE_QUERIES)
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        columns = [name for name in ("query", "product_locale") if name in parquet_file.schema_arrow.names]
+        queries = set()
+        for batch in parquet_file.iter_batches(batch_size=65536, columns=columns):
+            rows = batch.to_pydict()
+            locales = rows.get("product_locale") or ["us"] * len(rows["query"])
+            queries.update(query for query, locale in zip(rows["query"], locales) if locale == "us" and query)
+        queries = sorted(queries)
+    else:
+        with open(path, encoding="utf-8") as file:
+            queries = sorted({line.strip() for line in file if line.strip()})
+
+    if len(queries) > size:
+        queries = random.Random(seed).sample(queries, size)
+    return queries
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "search=0.6,chat_start=0.2,chat_message=0.2" into endpoint weights"""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}', expected one of {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("The mix needs at least one endpoint with a positive weight")
+    return mix
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def summarize(latencies_ms: List[float], statuses: List[str], elapsed: float) -> Dict:
+    """Throughput, latency percentiles, error rate and status codes of one endpoint"""
+    ordered = sorted(latencies_ms)
+    errors = sum(1 for status in statuses if not status.startswith("2"))
+    return {
+        "requests": len(statuses),
+        "errors": errors,
+        "error_rate": round(errors / len(statuses), 4) if statuses else 0.0,
+        "throughput_rps": round(len(statuses) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ordered, 0.50), 2),
+            "p95": round(percentile(ordered, 0.95), 2),
+            "p99": round(percentile(ordered, 0.99), 2),
+            "mean": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+            "max": round(ordered[-1], 2) if ordered else 0.0,
+        },
+        "status_codes": dict(sorted(Counter(statuses).items())),
+    }
+
+class Recorder:
+    """Latency and status of every request that starts after the warmup and completes within the measurement window"""
+
+    def __init__(self, record_after: float, record_until: float = float("inf")):
+        self.record_after = record_after
+        self.record_until = record_until
+        self.samples: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+        self.late = 0  # Completed after the window, while draining
+
+    def record(self, endpoint: str, started: float, latency_ms: float, status: str) -> None:
+        if started < self.record_after:
+            return
+        if started + latency_ms / 1000 > self.record_until:
+            self.late += 1
+            return
+        self.samples[endpoint].append((latency_ms, status))
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            samples = self.samples.get(endpoint)
+            if samples:
+                endpoints[endpoint] = summarize([s[0] for s in samples], [s[1] for s in samples], elapsed)
+        everything = [sample for samples in self.samples.values() for sample in samples]
+        return {
+            "endpoints": endpoints,
+            "total": summarize([s[0] for s in everything], [s[1] for s in everything], elapsed),
+        }
+
+class VirtualUser:
+    """One client with its own user id and chat session, issuing requests back to back"""
+
+    def __init__(self, index: int, client: httpx.AsyncClient, args, queries: List[str], facets: Dict[str, List[str]], recorder: Recorder):
+        self.client = client
+        self.args = args
+        self.queries = queries
+        self.facets = facets
+        self.recorder = recorder
+        self.rng = random.Random(args.seed * 100003 + index)
+        self.headers = {"X-User-Id": f"loadtest-{index}"}
+        self.session_id: Optional[str] = None
+        self.turns = 0
+
+    def _filters(self) -> Dict[str, str]:
+        if not self.facets or self.rng.random() >= self.args.filter_rate:
+            return {}
+        name = self.rng.choice([name for name, values in self.facets.items() if values])
+        return {f"{name}_filter": self.rng.choice(self.facets[name])}
+
+    async def _post(self, endpoint: str, path: str, payload: Dict) -> Optional[Dict]:
+        started = time.monotonic()
+        try:
+            response = await self.client.post(path, json=payload, headers=self.headers)
+            status = str(response.status_code)
+            body = response.json() if response.status_code == 200 else None
+        except Exception as e:
+            status, body = f"error:{type(e).__name__}", None
+        self.recorder.record(endpoint, started, (time.monotonic() - started) * 1000, status)
+        return body
+
+    async def step(self) -> None:
+        endpoint = self.rng.choices(list(self.args.mix), weights=list(self.args.mix.values()))[0]
+        if endpoint == "chat_message" and (self.session_id is None or self.turns >= self.args.max_turns):
+            endpoint = "chat_start"
+
+        if endpoint == "search":
+            await self._post("search", "/search", {"query": self.rng.choice(self.queries), "limit": self.args.limit, **self._filters()})
+        elif endpoint == "chat_start":
+            body = await self._post("chat_start", "/chat/start", {
+                "query": self.rng.choice(self.queries),
+                "async_summary": self.args.async_summary,
+                **self._filters()
+            })
+            self.session_id = body.get("session_id") if body else None
+            self.turns = 0
+        else:
+            # Follow-ups mostly refine the current search, sometimes switch to a new product
+            message = self.rng.choice(FOLLOW_UPS) if self.rng.random() < 0.7 else self.rng.choice(self.queries)
+            await self._post("chat_message", "/chat/message", {"session_id": self.session_id, "message": message, **self._filters()})
+            self.turns += 1
+
+async def fetch_facets(client: httpx.AsyncClient) -> Dict[str, List[str]]:
+    facets = {}
+    for name in ("brand", "color"):
+        try:
+            response = await client.get(f"/search/{name}s")
+            response.raise_for_status()
+            facets[name] = response.json()[f"{name}s"]
+        except Exception as e:
+            print(f"Could not fetch {name}s for filters: {e}")
+    return facets
+
+@asynccontextmanager
+async def backend_client(args) -> AsyncIterator[httpx.AsyncClient]:
+    """A client for the backend at --base-url, or for the app served in this process with --in-process"""
+    if not args.in_process:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+            yield client
+        return
+
+    import main as backend
+
+    transport = httpx.ASGITransport(app=backend.app)
+    async with backend.lifespan(backend.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            yield client
+
+async def run(args, queries: List[str]) -> Dict:
+    async with backend_client(args) as client:
+        facets = await fetch_facets(client) if args.filter_rate > 0 else {}
+
+        start = time.monotonic()
+        stop_at = start + args.warmup + args.duration
+        recorder = Recorder(record_after=start + args.warmup, record_until=stop_at)
+        issued = 0
+
+        async def loop(user: VirtualUser) -> None:
+            nonlocal issued
+            while time.monotonic() < stop_at and (args.requests is None or issued < args.requests):
+                issued += 1
+                await user.step()
+
+        users = [VirtualUser(i, client, args, queries, facets, recorder) for i in range(args.concurrency)]
+        await asyncio.gather(*(loop(user) for user in users))
+        # The window ends at --duration, or earlier when --requests ran out first
+        elapsed = max(min(time.monotonic(), stop_at) - recorder.record_after, 1e-6)
+
+    report = recorder.report(elapsed)
+    report["meta"] = run_metadata(args, len(queries), elapsed)
+    report["meta"]["late_requests"] = recorder.late
+    return report
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_metadata(args, query_count: int, elapsed: float) -> Dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "target": "in-process" if args.in_process else args.base_url,
+        "simulation": os.getenv("SIMULATION_MODE", "").lower() == "true" if args.in_process else None,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "warmup_s": args.warmup,
+        "mix": args.mix,
+        "queries": args.queries or "built-in sample",
+        "query_count": query_count,
+        "filter_rate": args.filter_rate,
+        "seed": args.seed,
+    }
+
+def print_report(report: Dict) -> None:
+    print(f"{'endpoint':<14} {'requests':>9} {'rps':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  status codes")
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for name, stats in rows:
+        latency = stats["latency_ms"]
+        codes = " ".join(f"{code}:{count}" for code, count in stats["status_codes"].items())
+        print(
+            f"{name:<14} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['error_rate']:>6.1%} "
+            f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}  {codes}"
+        )
+
+def print_comparison(report: Dict, baseline: Dict) -> None:
+    """Relative change of throughput and latency percentiles against an earlier run"""
+    print(f"\nChange vs {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'endpoint':<14} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>8}")
+    current = dict(report["endpoints"], total=report["total"])
+    previous = dict(baseline["endpoints"], total=baseline["total"])
+
+    def change(new: float, old: float) -> str:
+        return f"{(new - old) / old:+.1%}" if old else "n/a"
+
+    for name, stats in current.items():
+        old = previous.get(name)
+        if old is None:
+            continue
+        print(
+            f"{name:<14} {change(stats['throughput_rps'], old['throughput_rps']):>8} "
+            + " ".join(f"{change(stats['latency_ms'][p], old['latency_ms'][p]):>8}" for p in ("p50", "p95", "p99"))
+            + f" {stats['error_rate'] - old['error_rate']:>+8.1%}"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the search and chat endpoints")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://localhost:8000", help="Backend to test")
+    target.add_argument("--in-process", action="store_true", help="Serve the app inside this process instead")
+    parser.add_argument("--concurrency", type=int, default=10, help="Virtual users issuing requests back to back")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to measure, after the warmup")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests instead of after --duration")
+    parser.add_argument("--warmup", type=float, default=0, help="Seconds of load before measuring starts")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--queries", help="Shopping Queries examples parquet or a text file with one query per line")
+    parser.add_argument("--query-count", type=int, default=5000, help="Distinct queries sampled from --queries")
+    parser.add_argument("--filter-rate", type=float, default=0.2, help="Fraction of requests with a brand or color filter")
+    parser.add_argument("--limit", type=int, default=10, help="Results per /search request")
+    parser.add_argument("--max-turns", type=int, default=5, help="Chat messages per session before starting a new one")
+    parser.add_argument("--async-summary", action="store_true", help="Start chats with async_summary=true")
+    parser.add_argument("--timeout", type=float, default=120, help="Client timeout per request in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    if args.in_process:
+        # Never reach for the real services unless asked to, whatever the local .env says
+        os.environ.setdefault("SIMULATION_MODE", "true")
+        os.environ.setdefault("LOG_FILE", "")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    queries = load_queries(args.queries, args.query_count, args.seed)
+    report = asyncio.run(run(args, queries))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            print_comparison(report, json.load(file))
+
+if __name__ == "__main__":
+    main()
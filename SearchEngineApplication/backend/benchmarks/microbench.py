@@ -0,0 +1,174 @@
+"""
+Microbenchmarks for the pure-Python hot paths of a search or chat request
+
+    cd SearchEngineApplication/backend
+    python -m benchmarks.microbench                      # compare against the saved baseline
+    python -m benchmarks.microbench --case products_context --case system_prompt
+    python -m benchmarks.microbench --save               # record a new baseline
+
+Every case runs on fixed synthetic inputs of 10, 50 and 100 products (or
+messages, or content blocks) and reports the best-of-repeat time per call. The
+products context only takes the first five products, with truncated
+descriptions, so it and the system prompt built from it run once, on a page of
+search results.
+Results slower than the baseline by more than --threshold are flagged and the
+run exits with status 1. Baselines depend on the machine, so record your own
+before comparing.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.serialization import SIZES, make_products, make_session
+from client import extract_response_content
+from helpers import build_products_context, create_system_prompt
+from models import ChatSession, Product
+from weaviate_client import transform_search_result
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "microbench.json")
+DEFAULT_THRESHOLD = 0.2  # Flag cases more than 20% slower than the baseline
+UNSIZED_CASES = {"products_context", "system_prompt"}  # Cost does not depend on the input size
+UNSIZED_INPUT = 10  # One page of search results
+
+def make_weaviate_objects(count: int) -> List[SimpleNamespace]:
+    """Objects shaped like the results of collection.query.near_text"""
+    return [
+        SimpleNamespace(
+            properties={
+                "product_id": f"B0{i:08d}",
+                "product_title": f"Wireless Noise Cancelling Headphones Model {i} with Long Battery Life",
+                "product_brand": "SoundWave",
+                "product_color": "Midnight Black",
+                "product_description": "Immersive sound with active noise cancellation, 30 hour battery life and a comfortable fit. " * 4,
+                "product_bullet_point": "Bluetooth 5.3 | USB-C fast charging | Foldable design | Built-in microphone",
+            },
+            metadata=SimpleNamespace(score=None, distance=i / 1000)
+        )
+        for i in range(count)
+    ]
+
+def make_response(blocks: int) -> SimpleNamespace:
+    """A Responses API result whose first output message has `blocks` text blocks"""
+    text = "These headphones stand out for their battery life and comfort on long flights. "
+    return SimpleNamespace(
+        id="resp_benchmark",
+        output=[SimpleNamespace(content=[SimpleNamespace(text=text) for _ in range(blocks)])]
+    )
+
+def semantic_search_transform(size: int) -> Callable:
+    objects = make_weaviate_objects(size)
+    return lambda: [transform_search_result(obj) for obj in objects]
+
+def product_construction(size: int) -> Callable:
+    results = [transform_search_result(obj) for obj in make_weaviate_objects(size)]
+    return lambda: [Product(**result) for result in results]
+
+def products_context(size: int) -> Callable:
+    products = make_products(size)
+    return lambda: build_products_context("noise cancelling headphones", products, "SoundWave", "Midnight Black")
+
+def system_prompt(size: int) -> Callable:
+    context = build_products_context("noise cancelling headphones", make_products(size), "SoundWave", "Midnight Black")
+    return lambda: create_system_prompt(context)
+
+def response_content(size: int) -> Callable:
+    response = make_response(size)
+    return lambda: extract_response_content(response)
+
+def session_dump(size: int) -> Callable:
+    session = make_session(size)
+    return session.model_dump_json
+
+def session_load(size: int) -> Callable:
+    data = make_session(size).model_dump_json()
+    return lambda: ChatSession.model_validate_json(data)
+
+CASES: Dict[str, Callable[[int], Callable]] = {
+    "semantic_search_transform": semantic_search_transform,
+    "product_construction": product_construction,
+    "products_context": products_context,
+    "system_prompt": system_prompt,
+    "response_content": response_content,
+    "session_dump": session_dump,
+    "session_load": session_load,
+}
+
+def measure(func: Callable, repeat: int) -> float:
+    """Best-of-`repeat` time per call in microseconds, each repeat running for at least 0.2s"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for backend hot paths")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="Run only these cases (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare against or save to")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline")
+    args = parser.parse_args()
+
+    baseline: Dict[str, float] = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+
+    results: Dict[str, float] = {}
+    regressions: List[str] = []
+    print(f"{'case':<38} {'us/call':>10} {'baseline':>10} {'change':>8}")
+    for name in args.case or CASES:
+        for size in [None] if name in UNSIZED_CASES else SIZES:
+            key = name if size is None else f"{name}[{size}]"
+            results[key] = elapsed = measure(CASES[name](size or UNSIZED_INPUT), args.repeat)
+
+            row = f"{key:<38} {elapsed:>10.2f}"
+            previous = baseline.get(key)
+            if previous:
+                change = elapsed / previous - 1
+                row += f" {previous:>10.2f} {change:>+8.1%}"
+                if change > args.threshold:
+                    row += "  REGRESSION"
+                    regressions.append(key)
+            print(row)
+
+    if args.save:
+        saved = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                saved = json.load(file)["results"]
+        saved.update(results)  # Keep cases that were not run this time
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "commit": git_commit(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "processor": platform.processor() or None,
+                },
+                "results": dict(sorted(saved.items()))
+            }, file, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"\nNo baseline at {args.baseline}, run with --save to record one")
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Replay a query log captured with QUERY_LOG_PATH and compare latencies with the original run
+
+    cd SearchEngineApplication/backend
+    python -m benchmarks.replay queries.jsonl --base-url http://localhost:8000
+    python -m benchmarks.replay queries.jsonl --in-process --speed 4 --output replay.json
+
+Requests are sent open loop at their captured offsets divided by --speed (2 is
+twice the original rate), so load arrives in the same bursts as in production.
+Each captured chat session is started again, and its messages are sent in
+order to the new session, one turn at a time. Messages whose /chat/start was not
+captured are skipped. The hashed user id is sent as X-User-Id, so per-user
+admission limits apply as they did originally.
+
+The report shows p50/p95/p99 latency, error rate and throughput per endpoint
+for the captured and the replayed requests; --output saves both as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks.loadtest import Recorder, backend_client, git_commit
+
+PATHS = {"search": "/search", "chat_start": "/chat/start", "chat_message": "/chat/message"}
+
+def load_records(paths: List[str], max_records: Optional[int]) -> List[Dict]:
+    records = []
+    skipped = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    skipped += 1  # A line cut short when the capturing process died
+                    continue
+                if record.get("ep") in PATHS and record.get("q"):
+                    records.append(record)
+    if skipped:
+        print(f"Skipped {skipped} unreadable lines")
+    records.sort(key=lambda record: record["ts"])
+    return records[:max_records] if max_records else records
+
+def original_report(records: List[Dict]) -> Dict:
+    """Latency and status summary of the captured requests themselves"""
+    elapsed = max(records[-1]["ts"] - records[0]["ts"], 1e-6) if records else 1e-6
+    recorder = Recorder(record_after=0)
+    for record in records:
+        recorder.record(record["ep"], 0, record.get("ms", 0.0), str(record.get("st", "")))
+    return recorder.report(elapsed)
+
+class Replayer:
+    def __init__(self, client, args):
+        self.client = client
+        self.args = args
+        self.recorder = Recorder(record_after=0)
+        self.sessions: Dict[str, "asyncio.Future[Optional[str]]"] = {}  # Captured session hash -> replayed session id
+        self.session_locks: Dict[str, asyncio.Lock] = {}
+        self.skipped: Counter = Counter()
+        self.max_lag = 0.0
+
+    async def _post(self, record: Dict, payload: Dict) -> Optional[Dict]:
+        endpoint = record["ep"]
+        headers = {"X-User-Id": record["u"]} if record.get("u") else {}
+        started = time.monotonic()
+        try:
+            response = await self.client.post(PATHS[endpoint], json=payload, headers=headers)
+            status = str(response.status_code)
+            body = response.json() if response.status_code == 200 else None
+        except Exception as e:
+            status, body = f"error:{type(e).__name__}", None
+        self.recorder.record(endpoint, started, (time.monotonic() - started) * 1000, status)
+        return body
+
+    @staticmethod
+    def _filters(record: Dict) -> Dict:
+        return {key: record[short] for key, short in (("brand_filter", "b"), ("color_filter", "c")) if record.get(short)}
+
+    async def _start_chat(self, record: Dict, session: "Optional[asyncio.Future[Optional[str]]]") -> None:
+        body = await self._post(record, {"query": record["q"], "async_summary": bool(record.get("a")), **self._filters(record)})
+        if session is not None and not session.done():
+            session.set_result(body.get("session_id") if body else None)
+
+    async def _send_message(self, record: Dict) -> None:
+        session = self.sessions.get(record.get("s"))
+        if session is None:
+            self.skipped["session start not captured"] += 1
+            return
+        # Turns of one conversation are sequential, as they were for the user
+        async with self.session_locks.setdefault(record["s"], asyncio.Lock()):
+            session_id = await session
+            if session_id is None:
+                self.skipped["session start failed"] += 1
+                return
+            await self._post(record, {"session_id": session_id, "message": record["q"], **self._filters(record)})
+
+    def issue(self, record: Dict) -> "asyncio.Task":
+        endpoint = record["ep"]
+        if endpoint == "search":
+            payload = {"query": record["q"], **self._filters(record)}
+            if record.get("l"):
+                payload["limit"] = record["l"]
+            return asyncio.create_task(self._post(record, payload))
+        if endpoint == "chat_start":
+            session = None
+            if record.get("s"):
+                # Registered before any later message of the session is scheduled
+                session = self.sessions[record["s"]] = asyncio.get_running_loop().create_future()
+            return asyncio.create_task(self._start_chat(record, session))
+        return asyncio.create_task(self._send_message(record))
+
+    async def run(self, records: List[Dict]) -> float:
+        first = records[0]["ts"]
+        start = time.monotonic()
+        tasks = []
+        for record in records:
+            due = start + (record["ts"] - first) / self.args.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.max_lag = max(self.max_lag, -delay)
+            tasks.append(self.issue(record))
+        await asyncio.gather(*tasks)
+        return time.monotonic() - start
+
+def print_comparison(original: Dict, replayed: Dict) -> None:
+    print(f"{'endpoint':<14} {'':<9} {'requests':>9} {'rps':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name in list(PATHS) + ["total"]:
+        for label, report in (("original", original), ("replay", replayed)):
+            stats = report["total"] if name == "total" else report["endpoints"].get(name)
+            if not stats:
+                continue
+            latency = stats["latency_ms"]
+            print(
+                f"{name:<14} {label:<9} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['error_rate']:>6.1%} "
+                f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}"
+            )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a captured query log against the backend")
+    parser.add_argument("logs", nargs="+", help="Query log files (QUERY_LOG_PATH), merged by timestamp")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://localhost:8000", help="Backend to replay against")
+    target.add_argument("--in-process", action="store_true", help="Serve the app inside this process instead")
+    parser.add_argument("--speed", type=float, default=1.0, help="Rate multiplier, 2 replays twice as fast as captured")
+    parser.add_argument("--max-records", type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument("--concurrency", type=int, default=100, help="Maximum open connections")
+    parser.add_argument("--timeout", type=float, default=120, help="Client timeout per request in seconds")
+    parser.add_argument("--output", help="Write the original and replayed results as JSON to this file")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    if args.in_process:
+        # Never reach for the real services unless asked to, whatever the local .env says
+        os.environ.setdefault("SIMULATION_MODE", "true")
+        os.environ.setdefault("LOG_FILE", "")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    records = load_records(args.logs, args.max_records)
+    if not records:
+        parser.error("No replayable requests in the given logs")
+    span = records[-1]["ts"] - records[0]["ts"]
+    print(f"Replaying {len(records)} requests captured over {span:.1f}s at {args.speed:g}x ({span / args.speed:.1f}s)\n")
+
+    async def replay():
+        async with backend_client(args) as client:
+            replayer = Replayer(client, args)
+            elapsed = await replayer.run(records)
+            return replayer, elapsed
+
+    replayer, elapsed = asyncio.run(replay())
+    original = original_report(records)
+    replayed = replayer.recorder.report(elapsed)
+    print_comparison(original, replayed)
+
+    if replayer.skipped:
+        print("\nSkipped: " + ", ".join(f"{reason}: {count}" for reason, count in replayer.skipped.items()))
+    if replayer.max_lag > 0.1:
+        print(f"\nThe replay fell up to {replayer.max_lag:.2f}s behind schedule; lower --speed for a faithful rate")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "commit": git_commit(),
+                    "target": "in-process" if args.in_process else args.base_url,
+                    "logs": args.logs,
+                    "records": len(records),
+                    "speed": args.speed,
+                    "duration_s": round(elapsed, 2),
+                    "max_lag_s": round(replayer.max_lag, 3),
+                    "skipped": dict(replayer.skipped),
+                },
+                "original": original,
+                "replay": replayed,
+            }, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
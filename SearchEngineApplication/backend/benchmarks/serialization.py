@@ -0,0 +1,105 @@
+"""
+Per-response serialization cost: FastAPI's default response_model path vs FastJSONResponse
+
+    cd SearchEngineApplication/backend
+    python -m benchmarks.serialization [--repeat 5] [--number 200]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models import ChatMessage, ChatSession, Product, ProductRef, SearchResponse, StartChatResponse
+from responses import FastJSONResponse
+
+SIZES = [10, 50, 100]
+
+def make_products(count: int) -> List[Product]:
+    return [
+        Product(
+            id=f"B0{i:08d}",
+            title=f"Wireless Noise Cancelling Headphones Model {i} with Long Battery Life",
+            brand="SoundWave",
+            color="Midnight Black",
+            description="Immersive sound with active noise cancellation, 30 hour battery life and a comfortable fit. " * 4,
+            bullet_points="Bluetooth 5.3 | USB-C fast charging | Foldable design | Built-in microphone",
+            score=1 - i / 1000
+        )
+        for i in range(count)
+    ]
+
+def make_session(count: int) -> ChatSession:
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    messages = [
+        ChatMessage(
+            role="user" if i % 2 == 0 else "assistant",
+            content="Show me comfortable headphones for long flights with good battery life. " * 3,
+            timestamp=start + timedelta(seconds=i),
+            response_id=None if i % 2 == 0 else f"resp_{i}"
+        )
+        for i in range(count)
+    ]
+    return ChatSession(
+        session_id="5f0c7a52-8a35-4d2b-9f33-8f1c2a0e9b11",
+        user_id="user-1",
+        messages=messages,
+        created_at=start,
+        last_updated=start + timedelta(seconds=count),
+        search_query="noise cancelling headphones",
+        product_refs=[ProductRef(id=f"B0{i:08d}", score=1 - i / 1000) for i in range(count)],
+        summary_status="ready"
+    )
+
+def default_path(model, response_model) -> Callable[[], bytes]:
+    """What FastAPI does for a route with response_model that returns a model"""
+    field = create_response_field(name="Response_benchmark", type_=response_model, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def run() -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=model))
+        return JSONResponse(content).body
+
+    return run
+
+def fast_path(model) -> Callable[[], bytes]:
+    return lambda: FastJSONResponse(model).body
+
+def measure(func: Callable[[], bytes], repeat: int, number: int) -> float:
+    """Best-of-`repeat` mean time per call in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = []
+    for size in SIZES:
+        products = make_products(size)
+        cases.append((f"SearchResponse[{size} products]", SearchResponse(products=products, total_results=size), SearchResponse))
+        cases.append((f"StartChatResponse[{size} products]", StartChatResponse(session_id="s", status="pending", products=products), StartChatResponse))
+        cases.append((f"ChatSession[{size} messages]", make_session(size), ChatSession))
+
+    print(f"{'payload':<34} {'bytes':>8} {'default µs':>11} {'fast µs':>9} {'speedup':>8}")
+    for name, model, response_model in cases:
+        default = default_path(model, response_model)
+        fast = fast_path(model)
+        size = len(fast())
+        default_us = measure(default, args.repeat, args.number)
+        fast_us = measure(fast, args.repeat, args.number)
+        print(f"{name:<34} {size:>8} {default_us:>11.1f} {fast_us:>9.1f} {default_us / fast_us:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
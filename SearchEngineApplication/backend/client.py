@@ -1,10 +1,52 @@
 import logging
+import re
 from typing import List, Dict, Optional
 from openai import AsyncOpenAI
 from config import config
 
 logger = logging.getLogger(__name__)
 
+def extract_response_content(response) -> str:
+    """Text of a Responses API result, whichever shape the SDK returned it in"""
+    content = ""
+    if hasattr(response, 'output') and response.output:
+        # Responses API typically returns output as a list of messages
+        if isinstance(response.output, list) and response.output:
+            # Extract text content from the first output message
+            first_output = response.output[0]
+            if hasattr(first_output, 'content'):
+                if isinstance(first_output.content, list) and first_output.content:
+                    # Content is a list of content blocks
+                    for content_block in first_output.content:
+                        if hasattr(content_block, 'text'):
+                            content += content_block.text
+                        elif hasattr(content_block, 'content'):
+                            content += str(content_block.content)
+                else:
+                    content = str(first_output.content)
+            else:
+                content = str(first_output)
+        else:
+            content = str(response.output)
+    elif hasattr(response, 'choices') and response.choices:
+        content = response.choices[0].message.content.strip()
+    elif hasattr(response, 'content'):
+        content = response.content.strip() if isinstance(response.content, str) else str(response.content)
+    else:
+        # Fallback: convert response to string and extract meaningful content
+        response_str = str(response)
+        # Try to extract text content from the string representation
+        if 'text=' in response_str:
+            text_match = re.search(r"text='([^']*)'", response_str)
+            if text_match:
+                content = text_match.group(1)
+            else:
+                content = response_str
+        else:
+            content = response_str
+
+    return content
+
 class OpenAIClientSingleton:
     _instance: Optional['OpenAIClientSingleton'] = None
     _client: Optional[AsyncOpenAI] = None
@@ -44,8 +86,8 @@ class OpenAIClientSingleton:
         Create a response using OpenAI Responses API
         """
         try:
-            logger.info(f"Creating OpenAI response with {len(messages)} messages")
-            logger.debug(f"Messages: {[msg['role'] for msg in messages]}")
+            logger.info("Creating OpenAI response with %s messages", len(messages))
+            logger.debug("Messages: %s", [msg['role'] for msg in messages])
 
             # Convert messages to the format expected by Responses API
             # The last user message becomes the input
@@ -73,52 +115,15 @@ class OpenAIClientSingleton:
 
             if previous_response_id:
                 request_params["previous_response_id"] = previous_response_id
-                logger.debug(f"Including previous_response_id: {previous_response_id}")
+                logger.debug("Including previous_response_id: %s", previous_response_id)
 
             response = await self.client.responses.create(**request_params)
 
-            logger.info(f"OpenAI response created successfully with ID: {response.id}")
-
-            # Extract content from the response
-            content = ""
-            if hasattr(response, 'output') and response.output:
-                # Responses API typically returns output as a list of messages
-                if isinstance(response.output, list) and response.output:
-                    # Extract text content from the first output message
-                    first_output = response.output[0]
-                    if hasattr(first_output, 'content'):
-                        if isinstance(first_output.content, list) and first_output.content:
-                            # Content is a list of content blocks
-                            for content_block in first_output.content:
-                                if hasattr(content_block, 'text'):
-                                    content += content_block.text
-                                elif hasattr(content_block, 'content'):
-                                    content += str(content_block.content)
-                        else:
-                            content = str(first_output.content)
-                    else:
-                        content = str(first_output)
-                else:
-                    content = str(response.output)
-            elif hasattr(response, 'choices') and response.choices:
-                content = response.choices[0].message.content.strip()
-            elif hasattr(response, 'content'):
-                content = response.content.strip() if isinstance(response.content, str) else str(response.content)
-            else:
-                # Fallback: convert response to string and extract meaningful content
-                response_str = str(response)
-                # Try to extract text content from the string representation
-                if 'text=' in response_str:
-                    import re
-                    text_match = re.search(r"text='([^']*)'", response_str)
-                    if text_match:
-                        content = text_match.group(1)
-                    else:
-                        content = response_str
-                else:
-                    content = response_str
+            logger.info("OpenAI response created successfully with ID: %s", response.id)
+
+            content = extract_response_content(response)
 
-            logger.debug(f"Response content length: {len(content)}")
+            logger.debug("Response content length: %s", len(content))
 
             return {
                 "content": content,
@@ -128,7 +133,7 @@ class OpenAIClientSingleton:
             }
 
         except Exception as e:
-            logger.error(f"Error creating OpenAI response: {str(e)}")
+            logger.error("Error creating OpenAI response: %s", e)
             raise
 
     async def create_completion(
@@ -142,7 +147,7 @@ class OpenAIClientSingleton:
         Create a simple completion using the standard Chat Completions API
         """
         try:
-            logger.debug(f"Creating completion with {len(messages)} messages")
+            logger.debug("Creating completion with %s messages", len(messages))
 
             response = await self.client.chat.completions.create(
                 model=model,
@@ -152,7 +157,7 @@ class OpenAIClientSingleton:
             )
 
             content = response.choices[0].message.content.strip()
-            logger.debug(f"Completion content: '{content}'")
+            logger.debug("Completion content: '%s'", content)
 
             return {
                 "content": content,
@@ -161,7 +166,7 @@ class OpenAIClientSingleton:
             }
 
         except Exception as e:
-            logger.error(f"Error creating completion: {str(e)}")
+            logger.error("Error creating completion: %s", e)
             raise
 
     async def list_conversation_responses(
@@ -173,7 +178,7 @@ class OpenAIClientSingleton:
         List conversation items using the input_items API
         """
         try:
-            logger.info(f"Listing conversation items for conversation_id: {conversation_id}")
+            logger.info("Listing conversation items for conversation_id: %s", conversation_id)
 
             # Use input_items.list() to get conversation history
             params = {"limit": limit}
@@ -182,11 +187,9 @@ class OpenAIClientSingleton:
 
             responses = await self.client.responses.input_items.list(**params)
 
-            logger.info(f"Retrieved conversation items")
+            logger.info("Retrieved conversation items")
             return [item.model_dump() for item in responses.data] if hasattr(responses, 'data') else []
 
         except Exception as e:
-            logger.error(f"Error listing conversation items: {str(e)}")
-            raise
-
-openai_client = OpenAIClientSingleton()
\ No newline at end of file
+            logger.error("Error listing conversation items: %s", e)
+            raise
\ No newline at end of file
@@ -1,7 +1,6 @@
 import os
 from typing import List
 from dotenv import load_dotenv
-import logging
 
 load_dotenv()
 
@@ -14,6 +13,13 @@ class Config:
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
 
+    # Production launch mode (python run_server.py --production)
+    WORKERS: int = int(os.getenv("WORKERS", str(os.cpu_count() or 1)))
+    GRACEFUL_TIMEOUT: int = int(os.getenv("GRACEFUL_TIMEOUT", "30"))  # Seconds to finish in-flight requests on restart
+    MAX_REQUESTS: int = int(os.getenv("MAX_REQUESTS", "0"))  # Recycle workers after this many requests, 0 disables
+    # SQLite file for sessions and cached products shared by all workers, in-process memory when empty
+    SHARED_STATE_PATH: str = os.getenv("SHARED_STATE_PATH", "")
+
     CORS_ORIGINS: List[str] = [
         "http://localhost:8501",
         "http://localhost:3000",
@@ -21,16 +27,81 @@ class Config:
     ]
 
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # "json" (one object per line) or "text"
+    LOG_FILE: str = os.getenv("LOG_FILE", "backend.log")  # Empty to log to the console only
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # Rotate the log file at this size
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    # Fraction of DEBUG/INFO records kept per logger, e.g. "routes=0.1,weaviate_client=0.5"; warnings are always kept
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
 
-config = Config()
+    # Admission control, per worker: chat (LLM-backed POST /chat/*) and search (/search*) have separate budgets
+    ADMISSION_CONTROL: bool = os.getenv("ADMISSION_CONTROL", "True").lower() == "true"
+    ADMISSION_CHAT_QPS: float = float(os.getenv("ADMISSION_CHAT_QPS", "10"))  # Token bucket refill rate
+    ADMISSION_CHAT_BURST: float = float(os.getenv("ADMISSION_CHAT_BURST", "20"))
+    ADMISSION_CHAT_USER_QPS: float = float(os.getenv("ADMISSION_CHAT_USER_QPS", "0.5"))
+    ADMISSION_CHAT_USER_BURST: float = float(os.getenv("ADMISSION_CHAT_USER_BURST", "5"))
+    ADMISSION_CHAT_CONCURRENCY: int = int(os.getenv("ADMISSION_CHAT_CONCURRENCY", "16"))
+    ADMISSION_CHAT_USER_CONCURRENCY: int = int(os.getenv("ADMISSION_CHAT_USER_CONCURRENCY", "2"))
+    ADMISSION_CHAT_MAX_QUEUE: int = int(os.getenv("ADMISSION_CHAT_MAX_QUEUE", "32"))  # Shed load beyond this many waiting requests
+    ADMISSION_SEARCH_QPS: float = float(os.getenv("ADMISSION_SEARCH_QPS", "100"))
+    ADMISSION_SEARCH_BURST: float = float(os.getenv("ADMISSION_SEARCH_BURST", "200"))
+    ADMISSION_SEARCH_USER_QPS: float = float(os.getenv("ADMISSION_SEARCH_USER_QPS", "5"))
+    ADMISSION_SEARCH_USER_BURST: float = float(os.getenv("ADMISSION_SEARCH_USER_BURST", "20"))
+    ADMISSION_SEARCH_CONCURRENCY: int = int(os.getenv("ADMISSION_SEARCH_CONCURRENCY", "64"))
+    ADMISSION_SEARCH_USER_CONCURRENCY: int = int(os.getenv("ADMISSION_SEARCH_USER_CONCURRENCY", "8"))
+    ADMISSION_SEARCH_MAX_QUEUE: int = int(os.getenv("ADMISSION_SEARCH_MAX_QUEUE", "128"))
+    ADMISSION_SUGGEST_QPS: float = float(os.getenv("ADMISSION_SUGGEST_QPS", "200"))  # GET /search/suggest, fired while typing
+    ADMISSION_SUGGEST_BURST: float = float(os.getenv("ADMISSION_SUGGEST_BURST", "400"))
+    ADMISSION_SUGGEST_USER_QPS: float = float(os.getenv("ADMISSION_SUGGEST_USER_QPS", "5"))
+    ADMISSION_SUGGEST_USER_BURST: float = float(os.getenv("ADMISSION_SUGGEST_USER_BURST", "15"))
+    ADMISSION_SUGGEST_CONCURRENCY: int = int(os.getenv("ADMISSION_SUGGEST_CONCURRENCY", "64"))
+    ADMISSION_SUGGEST_USER_CONCURRENCY: int = int(os.getenv("ADMISSION_SUGGEST_USER_CONCURRENCY", "2"))
+    ADMISSION_SUGGEST_MAX_QUEUE: int = int(os.getenv("ADMISSION_SUGGEST_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))  # Seconds to wait for a slot before shedding
 
-logging.basicConfig(
-    level=getattr(logging, config.LOG_LEVEL.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('backend.log')
-    ]
-)
+    # Request deadlines in seconds, shared by all stages of a request; clients may ask for less with X-Request-Timeout
+    DEADLINE_SEARCH_SECONDS: float = float(os.getenv("DEADLINE_SEARCH_SECONDS", "10"))
+    DEADLINE_CHAT_SECONDS: float = float(os.getenv("DEADLINE_CHAT_SECONDS", "60"))  # POST /chat/* and background summaries
+    DEADLINE_DEFAULT_SECONDS: float = float(os.getenv("DEADLINE_DEFAULT_SECONDS", "30"))
+    DEADLINE_MAX_SECONDS: float = float(os.getenv("DEADLINE_MAX_SECONDS", "120"))  # Upper bound for X-Request-Timeout
+
+    # Admin-only profiling endpoints and X-Profile request profiling, not loaded at all unless enabled
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")  # Sent as X-Admin-Token, profiling stays off without it
+    TRACEMALLOC_FRAMES: int = int(os.getenv("TRACEMALLOC_FRAMES", "10"))  # Stack depth kept per allocation
+
+    # Tracing: a span per pipeline stage, errored and slow traces are always kept
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "")  # "file", "otlp" or empty to only tag logs and responses
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "traces.jsonl")
+    TRACE_OTLP_ENDPOINT: str = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACE_SERVICE_NAME: str = os.getenv("TRACE_SERVICE_NAME", "search-engine-backend")
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))  # Fraction of fast, successful traces kept
+    TRACE_SLOW_MS: float = float(os.getenv("TRACE_SLOW_MS", "2000"))
+    TRACE_QUEUE_SIZE: int = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))  # Traces waiting for export; newer ones are dropped when full
+
+    # Query log: anonymized /search and /chat requests appended to a file for benchmarks/replay.py, off when empty
+    QUERY_LOG_PATH: str = os.getenv("QUERY_LOG_PATH", "")
+    QUERY_LOG_SALT: str = os.getenv("QUERY_LOG_SALT", "")  # Key for hashing user and session ids, random per start when empty
+    QUERY_LOG_QUEUE_SIZE: int = int(os.getenv("QUERY_LOG_QUEUE_SIZE", "1000"))  # Captures waiting to be written; newer ones are dropped when full
+
+    # HTTP caching and compression
+    FACET_CACHE_TTL: int = int(os.getenv("FACET_CACHE_TTL", "300"))  # Seconds brand/color lists are cached and fresh for clients
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Smaller responses are sent uncompressed
+
+    # Shared product cache that hydrates the product references stored in chat sessions
+    PRODUCT_CACHE_SIZE: int = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+
+    # Simulation mode: offline stand-ins for OpenAI and Weaviate (load testing without network)
+    SIMULATION_MODE: bool = os.getenv("SIMULATION_MODE", "False").lower() == "true"
+    SIM_PRODUCTS_PATH: str = os.getenv("SIM_PRODUCTS_PATH", "")  # Optional product parquet, synthetic catalog otherwise
+    SIM_CATALOG_SIZE: int = int(os.getenv("SIM_CATALOG_SIZE", "5000"))
+    SIM_SEED: int = int(os.getenv("SIM_SEED", "42"))
+    SIM_LATENCY_SIGMA: float = float(os.getenv("SIM_LATENCY_SIGMA", "0.5"))  # Log-normal spread, 0 for fixed latency
+    SIM_SEARCH_LATENCY_MS: float = float(os.getenv("SIM_SEARCH_LATENCY_MS", "80"))  # Median latencies
+    SIM_SUGGEST_LATENCY_MS: float = float(os.getenv("SIM_SUGGEST_LATENCY_MS", "10"))
+    SIM_COMPLETION_LATENCY_MS: float = float(os.getenv("SIM_COMPLETION_LATENCY_MS", "400"))
+    SIM_RESPONSE_LATENCY_MS: float = float(os.getenv("SIM_RESPONSE_LATENCY_MS", "1500"))
+    SIM_SEARCH_ERROR_RATE: float = float(os.getenv("SIM_SEARCH_ERROR_RATE", "0.0"))
+    SIM_OPENAI_ERROR_RATE: float = float(os.getenv("SIM_OPENAI_ERROR_RATE", "0.0"))
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+config = Config()
\ No newline at end of file
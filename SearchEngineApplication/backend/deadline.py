@@ -0,0 +1,74 @@
+"""
+Per-request deadlines shared by every stage of the search and chat pipeline.
+
+The deadline is set once per request (from the X-Request-Timeout header or the
+route's default) and read through a context variable, so it follows the
+request into awaited calls, background threads started with asyncio.to_thread,
+and tasks created while handling it. Blocking clients called through
+run_in_thread use what is left of it as their own timeout.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+MIN_STAGE_SECONDS = 0.05  # Not worth starting a network call with less time than this
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before a stage could finish"""
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline, None when there is no deadline"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def stage_budget(fraction: float = 1.0) -> Optional[float]:
+    """The share of the remaining time a stage may use"""
+    left = remaining()
+    return None if left is None else max(0.0, left * fraction)
+
+def has_budget(fraction: float = 1.0, minimum: float = MIN_STAGE_SECONDS) -> bool:
+    budget = stage_budget(fraction)
+    return budget is None or budget >= minimum
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run the block with a deadline `seconds` from now (no deadline for None)"""
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+async def run_within_deadline(awaitable: Awaitable[T], stage: str, fraction: float = 1.0) -> T:
+    """
+    Await `awaitable`, cancelling it once the stage's share of the remaining time
+    is used up; raises DeadlineExceeded without starting it if no time is left
+    """
+    budget = stage_budget(fraction)
+    if budget is None:
+        return await awaitable
+    if budget < MIN_STAGE_SECONDS:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(f"No time left for {stage}")
+    try:
+        return await asyncio.wait_for(awaitable, budget)
+    except DeadlineExceeded:
+        raise
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"{stage} did not finish within {budget:.2f}s")
+
+async def run_in_thread(func: Callable[..., T], *args, stage: str, fraction: float = 1.0, **kwargs) -> T:
+    """
+    Call the blocking `func` in a worker thread within the stage's share of the
+    remaining time. The thread sees that share as its deadline, so a client that
+    reads remaining() gives up on the wire when the stage is abandoned
+    """
+    with deadline_scope(stage_budget(fraction)):
+        return await run_within_deadline(asyncio.to_thread(func, *args, **kwargs), stage)
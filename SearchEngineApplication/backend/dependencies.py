@@ -0,0 +1,72 @@
+"""
+Lazily created OpenAI and Weaviate clients.
+
+Nothing is imported or connected until the first request that needs a client,
+so importing the app (tests, CLI tools, a preloading gunicorn master) stays fast
+and offline, and every forked worker opens its own connections. Routes receive
+the clients through the provide_* dependencies and pass them down to the
+helpers; tests can replace them with `app.dependency_overrides`.
+"""
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+from config import config
+
+if TYPE_CHECKING:
+    from client import OpenAIClientSingleton
+    from weaviate_client import WeaviateClientSingleton
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()  # Facet loaders create the Weaviate client from worker threads
+_openai_client: Optional["OpenAIClientSingleton"] = None
+_weaviate_client: Optional["WeaviateClientSingleton"] = None
+
+def get_openai_client() -> "OpenAIClientSingleton":
+    """The process-wide OpenAI client (or its simulated stand-in), created on first use"""
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                if config.SIMULATION_MODE:
+                    from simulation import FakeOpenAIClient
+                    _openai_client = FakeOpenAIClient()
+                else:
+                    from client import OpenAIClientSingleton
+                    _openai_client = OpenAIClientSingleton()
+    return _openai_client
+
+def get_weaviate_client() -> "WeaviateClientSingleton":
+    """The process-wide Weaviate client (or its simulated stand-in), connected on first use"""
+    global _weaviate_client
+    if _weaviate_client is None:
+        with _lock:
+            if _weaviate_client is None:
+                if config.SIMULATION_MODE:
+                    from simulation import FakeWeaviateClient
+                    _weaviate_client = FakeWeaviateClient()
+                else:
+                    from weaviate_client import WeaviateClientSingleton
+                    _weaviate_client = WeaviateClientSingleton()
+    return _weaviate_client
+
+async def provide_openai_client() -> "OpenAIClientSingleton":
+    """FastAPI dependency; async so it does not cost a threadpool hop on every request"""
+    return _openai_client if _openai_client is not None else get_openai_client()
+
+async def provide_weaviate_client() -> "WeaviateClientSingleton":
+    """FastAPI dependency; the first call connects in a worker thread instead of blocking the event loop"""
+    return _weaviate_client if _weaviate_client is not None else await asyncio.to_thread(get_weaviate_client)
+
+def close_clients() -> None:
+    """Close the connections opened by this process, if any"""
+    global _openai_client, _weaviate_client
+    with _lock:
+        if _weaviate_client is not None and hasattr(_weaviate_client, "close"):
+            try:
+                _weaviate_client.close()
+            except Exception as e:
+                logger.warning("Error closing Weaviate client: %s", e)
+        _openai_client = None
+        _weaviate_client = None
@@ -1,22 +1,42 @@
 import uuid
 import logging
 from datetime import datetime
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 from models import ChatMessage, ChatSession, Product
-from client import openai_client
+from metrics import record_openai_usage, stage
+from tracing import span
+from deadline import DeadlineExceeded, has_budget, remaining, run_in_thread, run_within_deadline
+from product_cache import product_cache, to_product_refs
+
+if TYPE_CHECKING:
+    from client import OpenAIClientSingleton
+    from session_store import AsyncSessionStore
+    from weaviate_client import WeaviateClientSingleton
 
 logger = logging.getLogger(__name__)
 
+# Shares of the request's remaining time; whatever the earlier stages leave goes to the assistant response
+QUERY_REWRITE_BUDGET = 0.2
+SEARCH_BUDGET = 0.5
+MIN_QUERY_REWRITE_SECONDS = 0.25  # Search with the raw message instead when less time is available
+
 def generate_session_id() -> str:
     """Generate a unique session ID"""
     session_id = str(uuid.uuid4())
-    logger.debug(f"Generated new session ID: {session_id}")
+    logger.debug("Generated new session ID: %s", session_id)
     return session_id
 
-async def generate_search_query_from_history(messages: List[Dict], new_message: str) -> str:
+async def generate_search_query_from_history(openai_client: "OpenAIClientSingleton", messages: List[Dict], new_message: str) -> str:
     """
     Generate a semantic search query using OpenAI based on chat history and new message
     """
+    if not has_budget(QUERY_REWRITE_BUDGET, MIN_QUERY_REWRITE_SECONDS):
+        fallback_query = new_message
+        if "(with filters:" in fallback_query:
+            fallback_query = fallback_query.split("(with filters:")[0].strip()
+        logger.warning("Skipping query rewrite with %.2fs left, searching for: '%s'", remaining(), fallback_query)
+        return fallback_query
+
     try:
         # Get the last few user messages and assistant responses for context
         conversation_context = []
@@ -45,11 +65,17 @@ Generate a search query that captures the user's current intent. The query shoul
 Return only the search query, nothing else."""
 
         # Make OpenAI call to generate the search query using completions API
-        response_data = await openai_client.create_completion(
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=20,
-            temperature=0.3
-        )
+        with stage("query_rewrite"):
+            response_data = await run_within_deadline(
+                openai_client.create_completion(
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=20,
+                    temperature=0.3
+                ),
+                "query_rewrite",
+                QUERY_REWRITE_BUDGET
+            )
+        record_openai_usage("completions", response_data.get("usage"))
 
         generated_query = response_data.get("content", "").strip().strip('"').strip("'")
 
@@ -58,19 +84,19 @@ Return only the search query, nothing else."""
             fallback_query = new_message
             if "(with filters:" in fallback_query:
                 fallback_query = fallback_query.split("(with filters:")[0].strip()
-            logger.warning(f"Empty OpenAI response, using fallback: '{fallback_query}'")
+            logger.warning("Empty OpenAI response, using fallback: '%s'", fallback_query)
             return fallback_query
 
-        logger.info(f"Generated search query from conversation: '{generated_query}'")
+        logger.info("Generated search query from conversation: '%s'", generated_query)
         return generated_query
 
     except Exception as e:
-        logger.error(f"Error generating search query from history: {str(e)}")
+        logger.error("Error generating search query from history: %s", e)
         # Fallback to just the new message (cleaned)
         fallback_query = new_message
         if "(with filters:" in fallback_query:
             fallback_query = fallback_query.split("(with filters:")[0].strip()
-        logger.info(f"Using fallback search query: '{fallback_query}'")
+        logger.info("Using fallback search query: '%s'", fallback_query)
         return fallback_query
 
 def create_system_prompt(products_context: str = None) -> str:
@@ -86,7 +112,7 @@ def create_system_prompt(products_context: str = None) -> str:
 IMPORTANT: When a user searches for something, I will provide you with the ACTUAL PRODUCTS that were found in our database. Always reference these specific products in your responses."""
 
     if products_context:
-        logger.info(f"Creating system prompt with products_context: {products_context[:500]}...")
+        logger.debug("Creating system prompt with products_context: %.500s...", products_context)
         return f"""{base_prompt}
 
 🔍 CURRENT SEARCH RESULTS:
@@ -106,58 +132,167 @@ CRITICAL: These are REAL products that exist in our database and are currently d
 
     return base_prompt
 
-async def process_chat_start(query: str, user_id: str = None, products_context: str = None) -> Dict:
+async def run_product_search(
+    weaviate_client: "WeaviateClientSingleton",
+    query: str,
+    limit: int = 10,
+    brand_filter: str = None,
+    color_filter: str = None,
+    budget_fraction: float = 1.0,
+    offset: int = 0
+) -> List[Product]:
     """
-    Process the initial chat start request
+    Run a Weaviate semantic search and convert the results into Product models.
+
+    The blocking Weaviate call runs in a worker thread so the event loop stays
+    free, and is abandoned with DeadlineExceeded once `budget_fraction` of the
+    request's remaining time is used up. The Weaviate query itself times out at
+    the same moment and is not retried past it.
     """
-    try:
-        logger.info(f"Processing chat start for query: '{query}' (user: {user_id})")
+    def search() -> List[Product]:
+        search_results = weaviate_client.semantic_search(
+            query=query,
+            limit=limit,
+            brand_filter=brand_filter,
+            color_filter=color_filter,
+            offset=offset
+        )
+        products = [Product(**result) for result in search_results]
+        # The product cache may write to the shared SQLite table, so it is filled in the thread as well
+        product_cache.put_many(products)
+        return products
 
-        session_id = generate_session_id()
-        system_prompt = create_system_prompt(products_context)
+    with stage("semantic_search", query=query, limit=limit, offset=offset) as current:
+        products = await run_in_thread(search, stage="semantic_search", fraction=budget_fraction)
+        if current:
+            current.set_attribute("results", len(products))
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"I want to search for: {query}"}
-        ]
+    return products
 
-        response_data = await openai_client.create_response(messages)
+async def hydrate_session_products(weaviate_client: "WeaviateClientSingleton", session: ChatSession) -> List[Product]:
+    """
+    Resolve the session's product references from the product cache, fetching
+    evicted products from Weaviate by id in one query
+    """
+    def fetch(product_ids: List[str]) -> List[Product]:
+        return [Product(**result) for result in weaviate_client.get_products(product_ids)]
 
-        initial_message = ChatMessage(
-            role="assistant",
-            content=response_data["content"],
-            timestamp=datetime.now(),
-            response_id=response_data["response_id"]
-        )
+    # Cache lookups may read the shared SQLite table, so they run in the thread as well
+    with stage("hydrate_products", refs=len(session.product_refs)):
+        return await run_in_thread(product_cache.hydrate, session.product_refs, fetch, stage="hydrate_products")
 
-        user_message = ChatMessage(
-            role="user",
-            content=query,
-            timestamp=datetime.now()
-        )
+def build_products_context(
+    search_query: str,
+    products: List[Product],
+    brand_filter: str = None,
+    color_filter: str = None
+) -> str:
+    """
+    Build the products context string that is embedded in the system prompt
+    """
+    if not products:
+        return ""
+
+    # Add filter information to the context if filters were applied
+    filter_info = ""
+    if brand_filter or color_filter:
+        filter_parts = []
+        if brand_filter:
+            filter_parts.append(f"Brand: {brand_filter}")
+        if color_filter:
+            filter_parts.append(f"Color: {color_filter}")
+        filter_info = f" (FILTERED BY: {', '.join(filter_parts)})"
+
+    return f"SEARCH RESULTS FOR: '{search_query}'{filter_info}\n\n" + "\n".join([
+        f"- {product.title} by {product.brand}"
+        + (f" (Color: {product.color})" if product.color else "")
+        + (f"\n  Description: {product.description[:150]}..." if product.description else "")
+        + (f"\n  Key Features: {product.bullet_points[:100]}..." if product.bullet_points else "")
+        for product in products[:5]  # Limit to first 5 for context
+    ])
+
+def create_chat_session(query: str, user_id: str = None) -> ChatSession:
+    """
+    Create a new chat session holding only the user's initial query
+    """
+    user_message = ChatMessage(
+        role="user",
+        content=query,
+        timestamp=datetime.now()
+    )
+
+    return ChatSession(
+        session_id=generate_session_id(),
+        user_id=user_id,
+        messages=[user_message],
+        created_at=datetime.now(),
+        last_updated=datetime.now()
+    )
+
+async def generate_initial_message(openai_client: "OpenAIClientSingleton", query: str, products_context: str = None) -> Dict:
+    """
+    Ask OpenAI for the assistant's summary of the initial search results
+    """
+    system_prompt = create_system_prompt(products_context)
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"I want to search for: {query}"}
+    ]
+
+    with stage("llm_summary"):
+        response_data = await run_within_deadline(openai_client.create_response(messages), "llm_summary")
+    record_openai_usage("responses", response_data.get("usage"))
+
+    initial_message = ChatMessage(
+        role="assistant",
+        content=response_data["content"],
+        timestamp=datetime.now(),
+        response_id=response_data["response_id"]
+    )
+
+    logger.debug("Initial response length: %s", len(response_data['content']))
+
+    return {
+        "message": initial_message,
+        "response_id": response_data["response_id"],
+        "usage": response_data.get("usage")
+    }
+
+async def process_chat_start(
+    openai_client: "OpenAIClientSingleton",
+    query: str,
+    user_id: str = None,
+    products_context: str = None
+) -> Dict:
+    """
+    Process the initial chat start request
+    """
+    try:
+        logger.info("Processing chat start for query: '%s' (user: %s)", query, user_id)
 
-        chat_session = ChatSession(
-            session_id=session_id,
-            user_id=user_id,
-            messages=[user_message, initial_message],
-            created_at=datetime.now(),
-            last_updated=datetime.now()
-        )
+        chat_session = create_chat_session(query, user_id)
+        result = await generate_initial_message(openai_client, query, products_context)
+
+        chat_session.messages.append(result["message"])
+        chat_session.last_updated = datetime.now()
+        chat_session.summary_status = "ready"
 
-        logger.info(f"Chat session created successfully: {session_id}")
-        logger.debug(f"Initial response length: {len(response_data['content'])}")
+        logger.info("Chat session created successfully: %s", chat_session.session_id)
 
         return {
             "session": chat_session,
-            "response_id": response_data["response_id"],
-            "usage": response_data.get("usage")
+            "response_id": result["response_id"],
+            "usage": result["usage"]
         }
 
     except Exception as e:
-        logger.error(f"Error processing chat start: {str(e)}")
+        logger.error("Error processing chat start: %s", e)
         raise
 
 async def process_chat_message(
+    openai_client: "OpenAIClientSingleton",
+    weaviate_client: "WeaviateClientSingleton",
     session: ChatSession,
     message: str,
     user_id: str = None,
@@ -168,48 +303,31 @@ async def process_chat_message(
     Process a new message in an existing chat session with search on every message
     """
     try:
-        logger.info(f"Processing message in session {session.session_id}: '{message}' with filters - Brand: {brand_filter}, Color: {color_filter}")
+        logger.info("Processing message in session %s: '%s' with filters - Brand: %s, Color: %s", session.session_id, message, brand_filter, color_filter)
 
         # Step 1: Generate semantic search query from conversation history + new message
         messages_for_context = [{"role": msg.role, "content": msg.content} for msg in session.messages]
-        search_query = await generate_search_query_from_history(messages_for_context, message)
-        logger.info(f"Generated search query: '{search_query}'")
+        search_query = await generate_search_query_from_history(openai_client, messages_for_context, message)
+        logger.info("Generated search query: '%s'", search_query)
 
         # Step 2: Perform Weaviate search with generated query and filters
-        from weaviate_client import weaviate_client
-
-        search_results = weaviate_client.semantic_search(
+        products = await run_product_search(
+            weaviate_client,
             query=search_query,
             limit=10,
             brand_filter=brand_filter,
-            color_filter=color_filter
+            color_filter=color_filter,
+            budget_fraction=SEARCH_BUDGET
         )
-
-        products = [Product(**result) for result in search_results]
-        logger.info(f"Found {len(products)} products for generated query: '{search_query}' with filters: brand={brand_filter}, color={color_filter}")
+        logger.info("Found %s products for generated query: '%s' with filters: brand=%s, color=%s", len(products), search_query, brand_filter, color_filter)
 
         # Step 3: Build products context with filter information
-        products_context = ""
-        if products:
-            filter_info = ""
-            if brand_filter or color_filter:
-                filter_parts = []
-                if brand_filter:
-                    filter_parts.append(f"Brand: {brand_filter}")
-                if color_filter:
-                    filter_parts.append(f"Color: {color_filter}")
-                filter_info = f" (FILTERED BY: {', '.join(filter_parts)})"
-
-            products_context = f"SEARCH RESULTS FOR: '{search_query}'{filter_info}\n\n" + "\n".join([
-                f"- {product.title} by {product.brand}"
-                + (f" (Color: {product.color})" if product.color else "")
-                + (f"\n  Description: {product.description[:150]}..." if product.description else "")
-                + (f"\n  Key Features: {product.bullet_points[:100]}..." if product.bullet_points else "")
-                for product in products[:5]  # Limit to first 5 for context
-            ])
-            logger.info(f"Products context created: {products_context[:200]}...")
+        with span("build_context"):
+            products_context = build_products_context(search_query, products, brand_filter, color_filter)
+        if products_context:
+            logger.debug("Products context created: %.200s...", products_context)
         else:
-            logger.warning(f"No products found for query: '{search_query}' with filters: brand={brand_filter}, color={color_filter}")
+            logger.warning("No products found for query: '%s' with filters: brand=%s, color=%s", search_query, brand_filter, color_filter)
 
         # Step 4: Create user message
         user_message = ChatMessage(
@@ -224,7 +342,7 @@ async def process_chat_message(
 
         # Include recent conversation history for context
         recent_messages = session.messages[-8:] if len(session.messages) > 8 else session.messages
-        logger.debug(f"Using {len(recent_messages)} recent messages for conversation context")
+        logger.debug("Using %s recent messages for conversation context", len(recent_messages))
 
         for msg in recent_messages:
             openai_messages.append({
@@ -248,10 +366,29 @@ async def process_chat_message(
                 previous_response_id = last_assistant_message.response_id
 
         # Step 7: Generate assistant response using Responses API
-        response_data = await openai_client.create_response(
-            openai_messages,
-            previous_response_id=previous_response_id
-        )
+        status = "success"
+        try:
+            with stage("llm_response"):
+                response_data = await run_within_deadline(
+                    openai_client.create_response(
+                        openai_messages,
+                        previous_response_id=previous_response_id
+                    ),
+                    "llm_response"
+                )
+            record_openai_usage("responses", response_data.get("usage"))
+        except DeadlineExceeded as e:
+            # Out of time: still return the fresh search results, without the assistant's take on them
+            logger.warning("Returning search results without an assistant response: %s", e)
+            status = "partial"
+            response_data = {
+                "content": (
+                    f"I found {len(products)} products for '{search_query}', but couldn't put together "
+                    "a reply in time. Take a look at the results and ask again if you'd like my thoughts."
+                ),
+                "response_id": None,
+                "usage": None
+            }
 
         assistant_response = ChatMessage(
             role="assistant",
@@ -261,27 +398,27 @@ async def process_chat_message(
             previous_response_id=previous_response_id
         )
 
-        # Step 8: Update session with new messages and products
-        session.messages.extend([user_message, assistant_response])
-        session.products = products  # Update with new search results
-        session.last_updated = datetime.now()
+        # Step 8: The caller stores the new messages and products with the session store's modify(),
+        # so a summary or another turn saved while this one ran is kept
 
-        logger.info(f"Message processed successfully with {len(products)} products found")
-        logger.debug(f"Assistant response length: {len(response_data['content'])}")
+        logger.info("Message processed successfully with %s products found", len(products))
+        logger.debug("Assistant response length: %s", len(response_data['content']))
 
         return {
             "user_message": user_message,
             "assistant_response": assistant_response,
+            "product_refs": to_product_refs(products),
             "search_query_used": search_query,
             "products_found": len(products),
-            "usage": response_data.get("usage")
+            "usage": response_data.get("usage"),
+            "status": status
         }
 
     except Exception as e:
-        logger.error(f"Error processing chat message: {str(e)}")
+        logger.error("Error processing chat message: %s", e)
         raise
 
-def validate_session_request(session_id: str, chat_sessions: Dict) -> ChatSession:
+async def validate_session_request(session_id: str, chat_sessions: "AsyncSessionStore") -> ChatSession:
     """
     Validate and retrieve a chat session
     """
@@ -289,9 +426,10 @@ def validate_session_request(session_id: str, chat_sessions: Dict) -> ChatSessio
         logger.warning("Session ID not provided")
         raise ValueError("Session ID is required")
 
-    if session_id not in chat_sessions:
-        logger.warning(f"Session not found: {session_id}")
+    session = await chat_sessions.get(session_id)
+    if session is None:
+        logger.warning("Session not found: %s", session_id)
         raise ValueError(f"Chat session {session_id} not found")
 
-    logger.debug(f"Session {session_id} validated successfully")
-    return chat_sessions[session_id]
\ No newline at end of file
+    logger.debug("Session %s validated successfully", session_id)
+    return session
\ No newline at end of file
@@ -0,0 +1,174 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+STANDARD_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Set by tracing.start_trace for the duration of a request so every record carries its trace id
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, any `extra` fields and the traceback"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TraceIdFilter(logging.Filter):
+    """Attach the current trace id to records logged inside a trace"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace_id = trace_id_var.get()
+        if trace_id is not None:
+            record.trace_id = trace_id
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the records below WARNING per logger, e.g. {"routes": 0.1}.
+
+    Rates apply to a logger and its children; the most specific name wins.
+    Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def _rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock QueueHandler merges the arguments into the message before
+    enqueueing; since the queue never leaves the process the record can be
+    passed as is, so the request thread only pays for creating the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse "routes=0.1,weaviate_client=0.5" into {"routes": 0.1, "weaviate_client": 0.5}"""
+    rates = {}
+    for item in value.split(","):
+        name, sep, rate = item.partition("=")
+        if sep and name.strip():
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+def worker_log_file(path: str, pid: int) -> str:
+    """The log file of one worker process: backend.log -> backend.1234.log"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{pid}{ext}"
+
+def _file_handler(config, path: str, formatter: logging.Formatter) -> logging.Handler:
+    handler = logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    handler.setFormatter(formatter)
+    return handler
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configured = False
+
+def _start_listener(queue_handler: logging.handlers.QueueHandler, handlers: List[logging.Handler]) -> None:
+    global _listener
+    queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(config) -> None:
+    """
+    Route all records through a queue to a background listener thread that
+    formats them and writes to the console and a size-rotated log file.
+    Forked workers write to their own pid-suffixed file, so every file is
+    written and rotated by a single process.
+
+    Called by the entry points (run_server.py, the app's startup), never on
+    import; later calls in the same process are no-ops.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    formatter = JsonFormatter() if config.LOG_FORMAT.lower() == "json" else logging.Formatter(TEXT_FORMAT)
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    handlers: List[logging.Handler] = [console]
+    if config.LOG_FILE:
+        handlers.append(_file_handler(config, config.LOG_FILE, formatter))
+
+    queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(config.LOG_SAMPLE_RATES)))
+    queue_handler.addFilter(TraceIdFilter())  # Filters run in the logging thread, inside the request's context
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, config.LOG_LEVEL.upper()))
+
+    def after_fork() -> None:
+        # Rotating one file from several processes loses and duplicates records, give each worker its own
+        if config.LOG_FILE:
+            handlers[-1].close()  # Only closes the child's copy of the parent's file descriptor
+            handlers[-1] = _file_handler(config, worker_log_file(config.LOG_FILE, os.getpid()), formatter)
+        _start_listener(queue_handler, handlers)
+
+    _start_listener(queue_handler, handlers)
+    atexit.register(stop_logging)
+    # The listener thread does not survive a fork (gunicorn preloads the app), start a fresh one in each worker
+    os.register_at_fork(after_in_child=after_fork)
@@ -1,35 +1,48 @@
 import logging
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from config import config, logger
+from config import config
+from dependencies import close_clients
+from log_config import setup_logging
+from middleware import AdmissionMiddleware, CompressionMiddleware, DeadlineMiddleware, MetricsMiddleware, TracingMiddleware
+from responses import FastJSONResponse
 from routes import router
 
+logger = logging.getLogger(__name__)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_logging(config)  # No-op when run_server.py already configured it
     logger.info("Starting Search Engine Chat API...")
-    logger.info(f"Debug mode: {config.DEBUG}")
-    logger.info(f"OpenAI API configured: {'Yes' if config.OPENAI_API_KEY else 'No'}")
-    logger.info(f"Weaviate configured: {'Yes' if config.WEAVIATE_URL else 'No'}")
-
-    try:
-        from client import openai_client
-        logger.info("OpenAI client initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize OpenAI client: {str(e)}")
+    logger.info("Debug mode: %s", config.DEBUG)
+    if config.SIMULATION_MODE:
+        logger.warning("SIMULATION MODE: using offline stand-ins for OpenAI and Weaviate")
+    logger.info("OpenAI API configured: %s", 'Yes' if config.OPENAI_API_KEY else 'No')
+    logger.info("Weaviate configured: %s", 'Yes' if config.WEAVIATE_URL else 'No')
+    # Clients connect on first use (see dependencies.py), so startup does no network I/O
 
     yield
 
     logger.info("Shutting down Search Engine Chat API...")
+    app.state.shutting_down = True  # /health/ready reports 503 while in-flight requests finish
+    close_clients()
 
 app = FastAPI(
     title="Search Engine Chat API",
     version="1.0.0",
     description="FastAPI backend for AI-powered search engine with chat functionality",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
+if config.ADMISSION_CONTROL:
+    app.add_middleware(AdmissionMiddleware)  # Innermost, so 429s still get CORS headers, metrics and a trace
+
+app.add_middleware(DeadlineMiddleware)  # Wraps admission, so time queued for a slot counts against the deadline
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=config.CORS_ORIGINS,
@@ -38,14 +51,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if config.QUERY_LOG_PATH:
+    from query_log import QueryLogMiddleware
+
+    # Outside admission so rejected requests are captured too, inside compression to read /chat/start session ids
+    app.add_middleware(QueryLogMiddleware)
+
+app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESSION_MIN_SIZE)
+app.add_middleware(MetricsMiddleware)  # Outermost of the two so latencies include compression
+
 app.include_router(router)
 
+if config.PROFILING_ENABLED and config.ADMIN_TOKEN:
+    from profiling import ProfilingMiddleware, router as admin_router
+
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(admin_router)
+
 @app.middleware("http")
 async def log_requests(request, call_next):
-    logger.info(f"{request.method} {request.url}")
+    start = time.perf_counter()
     response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
+    # One record per request; the path and timing are structured fields in JSON logs
+    logger.info(
+        "%s %s %s",
+        request.method,
+        request.url.path,
+        response.status_code,
+        extra={
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    )
     return response
 
+# Added last so it wraps everything above, including the request log line, in the request's trace
+app.add_middleware(TracingMiddleware)
+
 # FastAPI app is defined above and can be imported by other modules
 # Use run_server.py to start the server
\ No newline at end of file
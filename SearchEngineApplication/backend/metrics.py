@@ -0,0 +1,160 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format at /metrics.
+
+Metrics are plain counters and histograms guarded by a lock; recording one is a
+dict lookup and a few additions, so collection is always on. Each worker
+process keeps its own values, the `worker` label tells them apart.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from tracing import Span, span
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self, base_labels: Tuple[Sequence[str], Sequence[str]]) -> List[str]:
+        names = base_labels[0] + self.labelnames
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_format_labels(names, tuple(base_labels[1]) + labelvalues)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        entry = self._values.get(labelvalues)
+        return sum(entry[0]) if entry else 0
+
+    def render(self, base_labels: Tuple[Sequence[str], Sequence[str]]) -> List[str]:
+        names = base_labels[0] + self.labelnames
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(entry[0]), entry[1])) for labels, entry in self._values.items())
+        for labelvalues, (counts, total) in items:
+            values = tuple(base_labels[1]) + labelvalues
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_label = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, values, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(names, values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(names, values)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Any] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        base_labels = (("worker",), (str(os.getpid()),))
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render(base_labels))
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"))
+http_request_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+stage_duration = registry.histogram("pipeline_stage_duration_seconds", "Latency of search and chat pipeline stages", ("stage",))
+stage_errors = registry.counter("pipeline_stage_errors_total", "Pipeline stages that raised", ("stage",))
+openai_tokens = registry.counter("openai_tokens_total", "OpenAI token usage", ("api", "kind"))
+cache_requests = registry.counter("cache_requests_total", "Cache lookups by cache and result (hit or miss)", ("cache", "result"))
+weaviate_retries = registry.counter("weaviate_retries_total", "Weaviate operations retried after an error", ("operation",))
+weaviate_reconnects = registry.counter("weaviate_reconnect_attempts_total", "Weaviate reconnection attempts", ("result",))
+traces_dropped = registry.counter("traces_dropped_total", "Sampled traces dropped because the export queue was full")
+query_log_dropped = registry.counter("query_log_dropped_total", "Captured requests dropped because the query log queue was full")
+
+@contextmanager
+def stage(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a pipeline stage and record it as a span of the current trace, e.g. `with stage("semantic_search"): ...`"""
+    start = time.perf_counter()
+    with span(name, **attributes) as current:
+        try:
+            yield current
+        except BaseException:
+            stage_errors.inc(name)
+            raise
+        finally:
+            stage_duration.observe(time.perf_counter() - start, name)
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    if count:
+        cache_requests.inc(cache, "hit" if hit else "miss", amount=count)
+
+def _usage_value(usage: Any, *keys: str) -> Optional[int]:
+    for key in keys:
+        value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+        if value is not None:
+            return value
+    return None
+
+def record_openai_usage(api: str, usage: Any) -> None:
+    """Count tokens from a Responses (input/output_tokens) or Chat Completions (prompt/completion_tokens) usage"""
+    if not usage:
+        return
+    input_tokens = _usage_value(usage, "input_tokens", "prompt_tokens")
+    output_tokens = _usage_value(usage, "output_tokens", "completion_tokens")
+    if input_tokens:
+        openai_tokens.inc(api, "input", amount=input_tokens)
+    if output_tokens:
+        openai_tokens.inc(api, "output", amount=output_tokens)
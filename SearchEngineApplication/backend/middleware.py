@@ -0,0 +1,289 @@
+import gzip
+import json
+import time
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from admission import AdmissionRejected, classify, create_budgets
+from config import config
+from deadline import deadline_scope
+from metrics import http_request_duration, http_requests
+from tracing import start_trace
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+UNCOMPRESSIBLE_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported content coding from an Accept-Encoding header (br over gzip)
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+class CompressionMiddleware:
+    """
+    Compress complete responses with brotli or gzip, negotiated by Accept-Encoding.
+
+    Only single-message responses above `minimum_size` are compressed; streamed
+    responses such as the SSE summary endpoint pass through untouched so events
+    are not held back in a compression buffer.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        initial_message: Optional[Message] = None
+        started = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal initial_message, started
+
+            if message["type"] == "http.response.start":
+                initial_message = message
+                return
+
+            if message["type"] != "http.response.body" or started:
+                await send(message)
+                return
+
+            started = True
+            headers = MutableHeaders(raw=initial_message["headers"])
+            body = message.get("body", b"")
+            compressible = not (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith(UNCOMPRESSIBLE_TYPES)
+            )
+
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+                if encoding and len(body) >= self.minimum_size:
+                    body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+
+            await send(initial_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+_route_paths: Dict[object, str] = {}
+
+def route_template(scope: Scope) -> str:
+    """
+    The matched route's path template (e.g. /chat/{session_id}), so per-session
+    URLs do not turn into one time series or span name each
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _route_paths:
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                _route_paths[endpoint] = route.path
+                break
+        else:
+            _route_paths[endpoint] = "unmatched"
+    return _route_paths[endpoint]
+
+class MetricsMiddleware:
+    """
+    Count requests and time them per route template
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope)
+            http_requests.inc(scope["method"], route, str(status_code))
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], route)
+
+class TracingMiddleware:
+    """
+    Run each request in its own trace and return the trace id in X-Trace-Id.
+
+    An incoming W3C traceparent header continues the caller's trace.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = Headers(scope=scope).get("traceparent")
+        with start_trace(f"{scope['method']} {scope['path']}", traceparent, **{"http.method": scope["method"], "http.target": scope["path"]}) as root:
+
+            async def send_with_trace_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        root.error = f"HTTP {message['status']}"
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Trace-Id"] = root.trace_id
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                root.name = f"{scope['method']} {route_template(scope)}"
+
+class AdmissionMiddleware:
+    """
+    Enforce the chat and search budgets, answering with 429 and Retry-After when one is exhausted.
+
+    Requests are attributed to the X-User-Id header, the `user_id` query
+    parameter, or the `user_id` (else `session_id`) field of a JSON body, in
+    that order. Requests with none of these only count against the global
+    limits: the client address is often a proxy or the Streamlit server shared
+    by many users, so it is not treated as a user.
+    """
+
+    MAX_INSPECTED_BODY = 64 * 1024
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.budgets = create_budgets()
+
+    async def _read_body(self, receive: Receive) -> List[Message]:
+        messages = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            size += len(message.get("body", b""))
+            if message["type"] != "http.request" or not message.get("more_body", False) or size > self.MAX_INSPECTED_BODY:
+                return messages
+
+    @staticmethod
+    def _user_from_body(messages: List[Message]) -> Optional[str]:
+        if messages[-1].get("more_body", False):
+            return None  # Too large to inspect
+        try:
+            payload = json.loads(b"".join(message.get("body", b"") for message in messages))
+        except ValueError:
+            return None
+        if not isinstance(payload, dict):
+            return None
+        if payload.get("user_id"):
+            return str(payload["user_id"])
+        # Anonymous chat messages are limited per conversation
+        return f"session:{payload['session_id']}" if payload.get("session_id") else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        budget_name = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if budget_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        user = request_headers.get("x-user-id") or QueryParams(scope["query_string"]).get("user_id")
+        buffered: List[Message] = []
+        if not user and scope["method"] == "POST" and request_headers.get("content-type", "").startswith("application/json"):
+            buffered = await self._read_body(receive)
+            user = self._user_from_body(buffered)
+
+        async def replay_receive() -> Message:
+            # Hand the inspected body to the app before reading any further messages
+            if buffered:
+                return buffered.pop(0)
+            return await receive()
+
+        try:
+            async with self.budgets[budget_name].admit(user or None):
+                await self.app(scope, replay_receive, send)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": f"Too many requests: {e}. Retry in {e.retry_after}s."},
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, replay_receive, send)
+
+class DeadlineMiddleware:
+    """
+    Give each request a deadline: the X-Request-Timeout header (seconds, capped at
+    DEADLINE_MAX_SECONDS) or the route's default
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def default_timeout(method: str, path: str) -> float:
+        budget = classify(method, path)
+        if budget == "search":
+            return config.DEADLINE_SEARCH_SECONDS
+        if budget == "chat":
+            return config.DEADLINE_CHAT_SECONDS
+        return config.DEADLINE_DEFAULT_SECONDS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self.default_timeout(scope["method"], scope["path"])
+        requested = Headers(scope=scope).get("x-request-timeout")
+        if requested:
+            try:
+                timeout = min(max(float(requested), 0.0), config.DEADLINE_MAX_SECONDS)
+            except ValueError:
+                pass
+
+        with deadline_scope(timeout):
+            await self.app(scope, receive, send)
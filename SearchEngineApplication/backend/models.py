@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -9,17 +9,36 @@ class ChatMessage(BaseModel):
     response_id: Optional[str] = None
     previous_response_id: Optional[str] = None
 
+class Product(BaseModel):
+    id: str
+    title: str
+    brand: str
+    color: Optional[str] = ""
+    description: Optional[str] = ""
+    bullet_points: Optional[str] = ""
+    price: str = "Price not available"
+    image_url: str = ""
+    rating: float = 0.0
+    reviews: int = 0
+    score: Optional[float] = None  # Search relevance, higher is better
+
+class ProductRef(BaseModel):
+    id: str
+    score: Optional[float] = None
+
 class StartChatRequest(BaseModel):
     query: str
     user_id: Optional[str] = None
     brand_filter: Optional[str] = None
     color_filter: Optional[str] = None
+    async_summary: bool = False  # Return products immediately and generate the summary in the background
 
 class StartChatResponse(BaseModel):
     session_id: str
-    initial_message: ChatMessage
-    response_id: str
-    status: str
+    initial_message: Optional[ChatMessage] = None  # None while the summary is still pending
+    response_id: Optional[str] = None
+    status: str  # "success", "pending", or "partial" when the deadline left no time for the summary
+    products: List[Product] = []
 
 class SendMessageRequest(BaseModel):
     session_id: str
@@ -32,19 +51,7 @@ class SendMessageResponse(BaseModel):
     session_id: str
     user_message: ChatMessage
     assistant_response: ChatMessage
-    status: str
-
-class Product(BaseModel):
-    id: str
-    title: str
-    brand: str
-    color: Optional[str] = ""
-    description: Optional[str] = ""
-    bullet_points: Optional[str] = ""
-    price: str = "Price not available"
-    image_url: str = ""
-    rating: float = 0.0
-    reviews: int = 0
+    status: str  # "success", or "partial" when the deadline left no time for the assistant response
 
 class ChatSession(BaseModel):
     session_id: str
@@ -54,11 +61,47 @@ class ChatSession(BaseModel):
     last_updated: datetime
     conversation_id: Optional[str] = None
     search_query: Optional[str] = None
-    products: List[Product] = []
+    product_refs: List[ProductRef] = []  # Hydrated from the shared product cache
+    summary_status: Optional[str] = None  # "pending", "ready" or "failed"
+
+class ChatSessionDetails(ChatSession):
+    products: List[Product] = []  # The session's product_refs, hydrated
+
+class ChatSummaryResponse(BaseModel):
+    session_id: str
+    status: str  # "pending", "ready" or "failed"
+    message: Optional[ChatMessage] = None
+    response_id: Optional[str] = None
+
+class ChatSessionSummary(BaseModel):
+    session_id: str
+    user_id: Optional[str]
+    created_at: datetime
+    last_updated: datetime
+    message_count: int
+    search_query: Optional[str] = None
+
+class SessionListResponse(BaseModel):
+    sessions: List[ChatSessionSummary]
+    total: int
+    offset: int
+    limit: int
+    status: str = "success"
+
+class SessionMessagesResponse(BaseModel):
+    session_id: str
+    messages: List[ChatMessage]  # Messages from index `since` onwards
+    since: int
+    next_index: int  # Pass as `since` on the next fetch
+    total_messages: int
+    last_updated: datetime
+    status: str = "success"
 
 class SearchRequest(BaseModel):
     query: str
     limit: Optional[int] = 10
+    offset: int = Field(0, ge=0)  # Results to skip, for fetching the next page
+    compact: bool = False  # Card fields only, without descriptions and bullet points
     brand_filter: Optional[str] = None
     color_filter: Optional[str] = None
 
@@ -66,6 +109,8 @@ class SearchResponse(BaseModel):
     products: List[Product]
     total_results: int
     status: str = "success"
+    offset: int = 0
+    has_more: bool = False  # A full page came back, so a further page may exist
 
 class ErrorResponse(BaseModel):
     error: str
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional
+from models import Product, ProductRef
+from config import config
+from metrics import record_cache
+from session_store import SharedDatabase
+
+logger = logging.getLogger(__name__)
+
+class ProductCache:
+    """
+    Bounded, least-recently-used cache of products shared by all chat sessions.
+
+    Sessions only keep product ids and scores; search results fill this cache and
+    session products are hydrated from it on demand, falling back to Weaviate for
+    evicted ones.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._products: "OrderedDict[str, Product]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def put_many(self, products: Iterable[Product]) -> None:
+        """Add or refresh products, evicting the least recently used ones beyond max_size"""
+        with self._lock:
+            for product in products:
+                self._products[product.id] = product
+                self._products.move_to_end(product.id)
+
+            while len(self._products) > self.max_size:
+                self._products.popitem(last=False)
+
+    def get(self, product_id: str) -> Optional[Product]:
+        with self._lock:
+            product = self._products.get(product_id)
+            if product is not None:
+                self._products.move_to_end(product_id)
+            return product
+
+    def hydrate(
+        self,
+        refs: List[ProductRef],
+        fetch: Optional[Callable[[List[str]], List[Product]]] = None
+    ) -> List[Product]:
+        """
+        Resolve product references to full products in the order of `refs`. Evicted
+        products are loaded with `fetch` (one call for all of them) and cached again;
+        without it, or when it cannot find them, they are skipped
+        """
+        found = {}
+        for ref in refs:
+            product = self.get(ref.id)
+            if product is not None:
+                found[ref.id] = product
+
+        missing = [ref.id for ref in refs if ref.id not in found]
+        record_cache("products", True, len(refs) - len(missing))
+        record_cache("products", False, len(missing))
+        if missing and fetch is not None:
+            fetched = fetch(missing)
+            self.put_many(fetched)
+            found.update((product.id, product) for product in fetched)
+        if missing:
+            recovered = sum(product_id in found for product_id in missing)
+            logger.warning("%s of %s session products were evicted from the product cache, %s fetched again", len(missing), len(refs), recovered)
+
+        # Scores belong to the session's search, not to the cached product
+        return [found[ref.id].model_copy(update={"score": ref.score}) for ref in refs if ref.id in found]
+
+class SharedProductCache(ProductCache):
+    """
+    Product cache shared by all worker processes.
+
+    Keeps the in-process LRU in front of a SQLite table so a session created by
+    one worker can be hydrated by another. The table is pruned back to max_size
+    least recently written products every `prune_interval` writes.
+    """
+
+    def __init__(self, path: str, max_size: int = 10000, prune_interval: int = 100):
+        super().__init__(max_size)
+        self.prune_interval = prune_interval
+        self._writes = 0
+        self._db = SharedDatabase(
+            path,
+            "CREATE TABLE IF NOT EXISTS products (id TEXT PRIMARY KEY, data TEXT NOT NULL, written_at REAL NOT NULL)"
+        )
+        logger.info("Using shared SQLite product cache at %s", path)
+
+    def put_many(self, products: Iterable[Product]) -> None:
+        products = list(products)
+        super().put_many(products)
+
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO products (id, data, written_at) VALUES (?, ?, ?)",
+            [(product.id, product.model_dump_json(), now) for product in products]
+        )
+
+        self._writes += 1
+        if self._writes % self.prune_interval == 0:
+            self._db.execute(
+                "DELETE FROM products WHERE id NOT IN "
+                "(SELECT id FROM products ORDER BY written_at DESC LIMIT ?)",
+                (self.max_size,)
+            )
+
+    def get(self, product_id: str) -> Optional[Product]:
+        product = super().get(product_id)
+        if product is not None:
+            return product
+
+        row = self._db.fetchone("SELECT data FROM products WHERE id = ?", (product_id,))
+        record_cache("products_shared", row is not None)
+        if row is None:
+            return None
+
+        product = Product.model_validate_json(row[0])
+        super().put_many([product])
+        return product
+
+def create_product_cache() -> ProductCache:
+    """
+    Use the in-process cache for a single worker and the shared cache when SHARED_STATE_PATH is set
+    """
+    if config.SHARED_STATE_PATH:
+        return SharedProductCache(config.SHARED_STATE_PATH, config.PRODUCT_CACHE_SIZE)
+    return ProductCache(config.PRODUCT_CACHE_SIZE)
+
+def to_product_refs(products: List[Product]) -> List[ProductRef]:
+    """Convert search results to the lightweight references stored in sessions"""
+    return [ProductRef(id=product.id, score=product.score) for product in products]
+
+product_cache = create_product_cache()
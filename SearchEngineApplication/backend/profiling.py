@@ -0,0 +1,261 @@
+"""
+Admin-only profiling of live workers.
+
+- Single request: send `X-Profile: stack` (or `cprofile`) with `X-Admin-Token`;
+  the response carries an `X-Profile-Id` to fetch from /admin/profiles/{id}
+- Whole process: POST /admin/profile?seconds=N&mode=stack|cprofile
+- Allocations: GET /admin/memory (starts tracemalloc on first use, then
+  reports the top allocation sites and the growth since the previous call)
+
+Stack sampling returns folded stacks ("frame;frame;frame count" per line) that
+flamegraph.pl, speedscope and inferno read directly; cProfile returns the
+pstats table, or the raw .prof file with ?format=raw.
+
+Nothing here is imported unless PROFILING_ENABLED is set and ADMIN_TOKEN is
+configured, so a disabled deployment pays nothing.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import itertools
+import logging
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import config
+from responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+MODES = ("stack", "cprofile")
+MAX_STORED_PROFILES = 20
+MAX_PROCESS_PROFILE_SECONDS = 120
+
+class StackSampler:
+    """
+    Samples the Python stacks of all threads every `interval` seconds and counts
+    identical stacks, giving folded output for flamegraphs
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+class Profile:
+    """One profiling run with either backend"""
+
+    def __init__(self, mode: str, label: str):
+        self.mode = mode
+        self.label = label
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self._sampler = StackSampler() if mode == "stack" else None
+        self._profiler = cProfile.Profile() if mode == "cprofile" else None
+
+    def start(self) -> None:
+        if self._sampler:
+            self._sampler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        if self._sampler:
+            self._sampler.stop()
+        else:
+            self._profiler.disable()
+        self.duration_ms = (time.time() - self.started_at) * 1000
+
+    def render(self, raw: bool = False) -> Response:
+        if self._sampler:
+            return PlainTextResponse(self._sampler.folded())
+        if raw:
+            self._profiler.create_stats()
+            return Response(
+                marshal.dumps(self._profiler.stats),
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": f'attachment; filename="{re.sub(r"[^A-Za-z0-9_.-]+", "_", self.label)}.prof"'}
+            )
+        output = io.StringIO()
+        pstats.Stats(self._profiler, stream=output).sort_stats("cumulative").print_stats(60)
+        return PlainTextResponse(output.getvalue())
+
+    def summary(self, profile_id: str) -> Dict:
+        return {"id": profile_id, "mode": self.mode, "label": self.label, "started_at": self.started_at, "duration_ms": round(self.duration_ms, 1)}
+
+profiles: "OrderedDict[str, Profile]" = OrderedDict()
+_profile_ids = itertools.count(1)
+_profile_lock = asyncio.Lock()  # One profiler at a time: cProfile and samplers would see each other
+
+def _store(profile: Profile) -> str:
+    profile_id = f"{os.getpid()}-{next(_profile_ids)}"
+    profiles[profile_id] = profile
+    while len(profiles) > MAX_STORED_PROFILES:
+        profiles.popitem(last=False)
+    return profile_id
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(config.ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, config.ADMIN_TOKEN)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry `X-Profile` and a valid `X-Admin-Token`.
+
+    Requests are profiled one at a time; the profile also covers whatever else
+    the worker runs meanwhile, so profile on a quiet worker for clean results.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = Headers(scope=scope) if scope["type"] == "http" else None
+        mode = headers.get("x-profile") if headers else None
+        if mode not in MODES or not is_admin(headers.get("x-admin-token")) or _profile_lock.locked():
+            await self.app(scope, receive, send)
+            return
+
+        async with _profile_lock:
+            profile = Profile(mode, f"{scope['method']} {scope['path']}")
+            profile_id = _store(profile)
+
+            async def send_with_profile_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+                await send(message)
+
+            profile.start()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profile.stop()
+                logger.info("Profiled %s with %s as %s", profile.label, mode, profile_id)
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.post("/profile")
+async def profile_process(
+    seconds: float = Query(10, gt=0, le=MAX_PROCESS_PROFILE_SECONDS),
+    mode: str = Query("stack", pattern="^(stack|cprofile)$"),
+    format: str = Query("text", pattern="^(text|raw)$")
+):
+    """
+    Profile this worker for `seconds` and return the result
+    (cProfile only sees the event loop thread, stack sampling sees all threads)
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="Another profile is running in this worker")
+
+    async with _profile_lock:
+        profile = Profile(mode, f"process-{seconds:g}s")
+        profile.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.stop()
+
+    profile_id = _store(profile)
+    response = profile.render(raw=format == "raw")
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+@router.get("/profiles")
+async def list_profiles():
+    """Profiles kept in this worker, oldest first"""
+    return FastJSONResponse({"profiles": [profile.summary(profile_id) for profile_id, profile in profiles.items()]})
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = Query("text", pattern="^(text|raw)$")):
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found in worker {os.getpid()}")
+    return profile.render(raw=format == "raw")
+
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+@router.get("/memory")
+async def memory_snapshot(top: int = Query(25, ge=1, le=200), group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$")):
+    """
+    Top allocation sites and their growth since the previous call; the first
+    call starts tracemalloc (which slows allocations until DELETE /admin/memory)
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(config.TRACEMALLOC_FRAMES)
+        _last_snapshot = tracemalloc.take_snapshot()
+        return FastJSONResponse({"status": "started", "frames": config.TRACEMALLOC_FRAMES})
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+    ])
+    current, peak = tracemalloc.get_traced_memory()
+    top_stats = snapshot.statistics(group_by)[:top]
+    growth = snapshot.compare_to(_last_snapshot, group_by)[:top] if _last_snapshot else []
+    _last_snapshot = snapshot
+
+    return FastJSONResponse({
+        "status": "tracing",
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": [{"site": str(stat.traceback), "size_bytes": stat.size, "count": stat.count} for stat in top_stats],
+        "growth": [{"site": str(stat.traceback), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff} for stat in growth]
+    })
+
+@router.delete("/memory")
+async def stop_memory_tracing():
+    global _last_snapshot
+    tracemalloc.stop()
+    _last_snapshot = None
+    return FastJSONResponse({"status": "stopped"})
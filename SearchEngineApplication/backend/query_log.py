@@ -0,0 +1,215 @@
+"""
+Capture of anonymized /search and /chat requests for replaying production load.
+
+Each request is one JSON line appended to QUERY_LOG_PATH:
+
+    {"ts": 1735732800.123, "ep": "chat_message", "q": "anything cheaper?", "b": "Sony",
+     "s": "9f2c41d0a7e3b512", "u": "51aa0c3e9d2b7f60", "st": 200, "ms": 1834.2}
+
+with the start time, endpoint, query or message, brand/color filters, search
+limit, async_summary flag, hashed session and user ids, status and latency.
+Session ids link a /chat/start to its follow-up messages, so the replay keeps
+the turn structure. Ids are hashed with QUERY_LOG_SALT, and email addresses and
+long digit sequences are masked in the query text. The client address is
+never recorded.
+
+Requests only hand the raw bytes to a bounded queue; parsing, anonymizing and
+writing happen on a background thread, and captures arriving while the queue is
+full are dropped and counted in query_log_dropped_total. Every line is written with a single append, so
+several workers can share one file. Nothing here is imported unless
+QUERY_LOG_PATH is set.
+"""
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import config
+from metrics import query_log_dropped
+
+logger = logging.getLogger(__name__)
+
+CAPTURED_ENDPOINTS = {"/search": "search", "/chat/start": "chat_start", "/chat/message": "chat_message"}
+MAX_CAPTURED_BODY = 64 * 1024
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+")
+DIGITS_PATTERN = re.compile(r"\d[\d\s().-]{6,}\d")  # Phone, card and account numbers; model numbers are shorter
+
+# (start time, endpoint, status, latency ms, user header, request body, response body)
+Capture = Tuple[float, str, int, float, Optional[str], bytes, bytes]
+
+def scrub(text: str) -> str:
+    return DIGITS_PATTERN.sub("<number>", EMAIL_PATTERN.sub("<email>", text))
+
+class QueryLog:
+    """
+    Turns captured requests into anonymized records and appends them from a
+    background thread. At most `max_queue` captures wait for the writer; further
+    ones are dropped and counted instead of piling up in memory
+    """
+
+    def __init__(self, path: str, salt: str, batch_size: int = 256, max_queue: int = 1000):
+        self.path = path
+        self.salt = salt.encode()
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Capture]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def anonymize(self, value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+        return hmac.new(self.salt, str(value).encode(), hashlib.sha256).hexdigest()[:16]
+
+    def submit(self, capture: Capture) -> None:
+        if self._thread is None or self._pid != os.getpid():
+            # Started lazily so forked workers each get their own writer thread
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(capture)
+        except queue.Full:
+            query_log_dropped.inc()
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Query log queue is full, %s captured requests dropped so far", self.dropped)
+
+    def flush(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            try:
+                self._queue.put(None, timeout=5)
+            except queue.Full:
+                logger.warning("Query log writer is not keeping up, unwritten captures are lost")
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def to_record(self, capture: Capture) -> Dict:
+        started, endpoint, status, duration_ms, user, request_body, response_body = capture
+        try:
+            payload = json.loads(request_body) if request_body else {}
+        except ValueError:
+            payload = {}
+        if not isinstance(payload, dict):
+            payload = {}
+
+        session_id = payload.get("session_id")
+        if endpoint == "chat_start" and response_body:
+            try:
+                session_id = json.loads(response_body).get("session_id")
+            except (ValueError, AttributeError):
+                pass
+
+        text = payload.get("message") if endpoint == "chat_message" else payload.get("query")
+        record = {
+            "ts": round(started, 3),
+            "ep": endpoint,
+            "q": scrub(str(text)) if text else None,
+            "b": payload.get("brand_filter"),
+            "c": payload.get("color_filter"),
+            "l": payload.get("limit") if endpoint == "search" else None,
+            "a": True if payload.get("async_summary") else None,
+            "s": self.anonymize(session_id),
+            "u": self.anonymize(user or payload.get("user_id")),
+            "st": status,
+            "ms": round(duration_ms, 1),
+        }
+        return {key: value for key, value in record.items() if value is not None}
+
+    def _run(self) -> None:
+        while True:
+            capture = self._queue.get()
+            if capture is None:
+                return
+            batch = [capture]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, captures: List[Capture]) -> None:
+        try:
+            data = "".join(json.dumps(self.to_record(capture), ensure_ascii=False, separators=(",", ":")) + "\n" for capture in captures)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, data.encode("utf-8"))
+            finally:
+                os.close(fd)
+        except Exception as e:
+            logger.warning("Failed to write %s query log records: %s", len(captures), e)
+
+query_log = QueryLog(config.QUERY_LOG_PATH, config.QUERY_LOG_SALT or secrets.token_hex(16), max_queue=config.QUERY_LOG_QUEUE_SIZE)
+atexit.register(query_log.flush)
+
+class QueryLogMiddleware:
+    """
+    Capture POST /search, /chat/start and /chat/message: the request body, the
+    status, the latency and, for /chat/start, the new session's id
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        endpoint = CAPTURED_ENDPOINTS.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.time()
+        start = time.perf_counter()
+
+        # Read the body up front: a request rejected before the route runs is part of the load too
+        buffered: List[Message] = []
+        size = 0
+        while True:
+            message = await receive()
+            buffered.append(message)
+            size += len(message.get("body", b""))
+            if message["type"] != "http.request" or not message.get("more_body", False) or size > MAX_CAPTURED_BODY:
+                break
+        request_body = b"".join(message.get("body", b"") for message in buffered)
+        response_chunks: List[bytes] = []
+        status = 500
+
+        async def replay_receive() -> Message:
+            if buffered:
+                return buffered.pop(0)
+            return await receive()
+
+        async def capturing_send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and endpoint == "chat_start" and status == 200:
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capturing_send)
+        finally:
+            query_log.submit((
+                started,
+                endpoint,
+                status,
+                (time.perf_counter() - start) * 1000,
+                Headers(scope=scope).get("x-user-id"),
+                request_body,
+                b"".join(response_chunks)
+            ))
@@ -0,0 +1,83 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import pydantic_core
+from metrics import stage
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, pydantic-core's serializer is the fallback
+    orjson = None
+
+def _orjson_default(value: Any) -> Any:
+    """Let orjson serialize models nested in plain containers (datetimes are handled natively)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dump_json(content: Any) -> bytes:
+    """Serialize a response payload to JSON bytes without validating it again"""
+    if isinstance(content, BaseModel):
+        # Models are already validated, serialize them straight from pydantic-core
+        return content.__pydantic_serializer__.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default)
+    return pydantic_core.to_json(content)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response used app-wide.
+
+    Routes return FastJSONResponse(model) directly so FastAPI skips its
+    response_model round trip (dump, re-validate, jsonable_encoder, json.dumps);
+    response_model is still declared on the route for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialization"):
+            return dump_json(content)
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (preferred) and If-Modified-Since against the current representation"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: compressed and uncompressed bodies share the same tag
+        return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+def conditional_json_response(
+    request: Request,
+    content: Any,
+    cache_control: str,
+    last_modified: Optional[datetime] = None
+) -> Response:
+    """
+    JSON response with ETag/Last-Modified validators that answers matching conditional GETs with 304
+    """
+    with stage("serialization"):
+        body = dump_json(content)
+    headers = {
+        "ETag": f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        "Cache-Control": cache_control
+    }
+    if last_modified is not None:
+        last_modified = last_modified.astimezone(timezone.utc)  # Naive datetimes are local time
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _is_not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,110 +1,313 @@
+import asyncio
 import logging
-from typing import Dict, Optional
-from fastapi import APIRouter, HTTPException
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from config import config
+from metrics import record_cache, registry, stage
+from tracing import current_trace_id, span, start_trace
+from deadline import DeadlineExceeded, deadline_scope, run_in_thread
+from responses import FastJSONResponse, conditional_json_response
 from models import (
-    StartChatRequest, StartChatResponse, SendMessageRequest,
-    SendMessageResponse, SearchRequest, SearchResponse, Product
+    Product, StartChatRequest, StartChatResponse, SendMessageRequest,
+    SendMessageResponse, SearchRequest, SearchResponse, ChatSummaryResponse,
+    ChatSession, ChatSessionDetails, SessionListResponse, SessionMessagesResponse
+)
+from product_cache import product_cache, to_product_refs
+from session_store import create_session_store
+from dependencies import provide_openai_client, provide_weaviate_client
+from helpers import (
+    process_chat_start, process_chat_message, validate_session_request,
+    run_product_search, hydrate_session_products, build_products_context,
+    create_chat_session, generate_initial_message, SEARCH_BUDGET
 )
-from helpers import process_chat_start, process_chat_message, validate_session_request
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-chat_sessions: Dict = {}
+chat_sessions = create_session_store()  # Shared between workers when SHARED_STATE_PATH is set
+
+# Background summary generation for /chat/start with async_summary=True
+summary_tasks: Set[asyncio.Task] = set()  # Strong references so tasks are not garbage collected
+summary_events: Dict[str, asyncio.Event] = {}  # Wakes up local pollers as soon as a summary is stored
+SUMMARY_POLL_INTERVAL = 0.25  # Seconds between session checks when no local event is available
+SUMMARY_MAX_WAIT = 30  # Upper bound for long-polling a pending summary
+SUMMARY_KEEPALIVE_INTERVAL = 15  # Seconds between SSE keep-alive comments
+SUGGEST_CACHE_TTL = 60  # Seconds clients may reuse /search/suggest results
+
+# Brand/color facets change only with ingestion, keep them (and their Last-Modified) per process
+facet_cache: Dict[str, Tuple[List[str], datetime, float]] = {}  # name -> (values, fetched_at, monotonic expiry)
+
+async def _get_facet_values(name: str, loader: Callable[[], List[str]]) -> Tuple[List[str], datetime]:
+    """
+    Return cached facet values, reloading them from Weaviate once FACET_CACHE_TTL has
+    passed; the reload runs in a worker thread within the request's deadline
+    """
+    cached = facet_cache.get(name)
+    hit = bool(cached) and cached[2] > time.monotonic()
+    record_cache("facets", hit)
+    if hit:
+        logger.debug("Facet cache hit for %s", name)
+        return cached[0], cached[1]
+
+    values = await run_in_thread(loader, stage=f"{name} facet")
+    fetched_at = datetime.now()
+    facet_cache[name] = (values, fetched_at, time.monotonic() + config.FACET_CACHE_TTL)
+    return values, fetched_at
 
 @router.get("/")
 async def health_check():
     """Health check endpoint"""
     logger.info("Health check endpoint accessed")
-    return {"message": "Search Engine Chat API is running", "status": "healthy"}
+    return FastJSONResponse({"message": "Search Engine Chat API is running", "status": "healthy"})
+
+@router.get("/health/ready")
+async def readiness_check(request: Request):
+    """
+    Readiness probe for frontends and load balancers, cheap enough to poll: no
+    logging and no OpenAI or Weaviate round trip. Returns 503 once shutdown begins
+    """
+    if getattr(request.app.state, "shutting_down", False):
+        return FastJSONResponse({"status": "shutting_down"}, status_code=503)
+    return FastJSONResponse({"status": "ready"})
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, pipeline stage, token usage, cache and Weaviate retry metrics in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @router.post("/chat/start", response_model=StartChatResponse)
-async def start_chat(request: StartChatRequest):
+async def start_chat(
+    request: StartChatRequest,
+    openai_client=Depends(provide_openai_client),
+    weaviate_client=Depends(provide_weaviate_client)
+):
     """
     Start a new chat session with an initial search query and perform product search
     """
     try:
-        logger.info(f"Starting new chat session for query: '{request.query}' with filters - Brand: {request.brand_filter}, Color: {request.color_filter}")
-
-        # Perform product search first
-        from weaviate_client import weaviate_client
+        logger.info("Starting new chat session for query: '%s' with filters - Brand: %s, Color: %s", request.query, request.brand_filter, request.color_filter)
 
-        search_results = weaviate_client.semantic_search(
+        # Perform product search first, leaving the rest of the deadline for the summary
+        products = await run_product_search(
+            weaviate_client,
             query=request.query,
             limit=10,
             brand_filter=request.brand_filter,
-            color_filter=request.color_filter
+            color_filter=request.color_filter,
+            budget_fraction=SEARCH_BUDGET
         )
-
-        products = [Product(**result) for result in search_results]
-        logger.info(f"Found {len(products)} products for chat context")
+        logger.info("Found %s products for chat context", len(products))
 
         if products:
-            logger.info(f"Sample products found: {[p.title for p in products[:3]]}")
+            logger.info("Sample products found: %s", [p.title for p in products[:3]])
         else:
             logger.warning("NO PRODUCTS FOUND in search results - this will cause 'no products' response!")
 
         # Create products context string for system prompt
-        products_context = ""
-        if products:
-            # Add filter information to the context if filters were applied
-            filter_info = ""
-            if request.brand_filter or request.color_filter:
-                filter_parts = []
-                if request.brand_filter:
-                    filter_parts.append(f"Brand: {request.brand_filter}")
-                if request.color_filter:
-                    filter_parts.append(f"Color: {request.color_filter}")
-                filter_info = f" (FILTERED BY: {', '.join(filter_parts)})"
-
-            products_context = f"SEARCH RESULTS FOR: '{request.query}'{filter_info}\n\n" + "\n".join([
-                f"- {product.title} by {product.brand}"
-                + (f" (Color: {product.color})" if product.color else "")
-                + (f"\n  Description: {product.description[:150]}..." if product.description else "")
-                + (f"\n  Key Features: {product.bullet_points[:100]}..." if product.bullet_points else "")
-                for product in products[:5]  # Limit to first 5 for context
-            ])
-            logger.info(f"Products context created with filters: {products_context[:200]}...")
+        with span("build_context"):
+            products_context = build_products_context(request.query, products, request.brand_filter, request.color_filter)
+        if products_context:
+            logger.debug("Products context created with filters: %.200s...", products_context)
         else:
             logger.error("Products context is EMPTY - this will cause AI to say 'no products found'")
 
-        result = await process_chat_start(request.query, request.user_id, products_context)
-        session = result["session"]
+        if request.async_summary:
+            # Return the search results right away and let the LLM summary catch up
+            session = create_chat_session(request.query, request.user_id)
+            session.search_query = request.query
+            session.product_refs = to_product_refs(products)
+            session.summary_status = "pending"
+
+            await chat_sessions.put(session)
+            summary_events[session.session_id] = asyncio.Event()
+
+            task = asyncio.create_task(
+                _generate_session_summary(openai_client, session.session_id, request.query, products_context)
+            )
+            summary_tasks.add(task)
+            task.add_done_callback(summary_tasks.discard)
+
+            logger.info("Chat session %s stored with %s products, summary pending", session.session_id, len(products))
+
+            return FastJSONResponse(StartChatResponse(
+                session_id=session.session_id,
+                status="pending",
+                products=products
+            ))
+
+        try:
+            result = await process_chat_start(openai_client, request.query, request.user_id, products_context)
+        except DeadlineExceeded as e:
+            # Out of time for the summary: keep the session and return the products without it
+            logger.warning("Starting chat without a summary: %s", e)
+            result = None
+
+        session = result["session"] if result else create_chat_session(request.query, request.user_id)
+        if result is None:
+            session.summary_status = "failed"
 
         # Add search query and products to session
         session.search_query = request.query
-        session.products = products
+        session.product_refs = to_product_refs(products)
 
-        chat_sessions[session.session_id] = session
+        await chat_sessions.put(session)
 
-        logger.info(f"Chat session {session.session_id} stored successfully with {len(products)} products")
+        logger.info("Chat session %s stored successfully with %s products", session.session_id, len(products))
 
-        return StartChatResponse(
+        return FastJSONResponse(StartChatResponse(
             session_id=session.session_id,
-            initial_message=session.messages[-1],
-            response_id=result["response_id"],
-            status="success"
-        )
+            initial_message=session.messages[-1] if result else None,
+            response_id=result["response_id"] if result else None,
+            status="success" if result else "partial",
+            products=products
+        ))
 
     except ValueError as e:
-        logger.error(f"Validation error starting chat: {str(e)}")
+        logger.error("Validation error starting chat: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        logger.error("Deadline exceeded starting chat: %s", e)
+        raise HTTPException(status_code=504, detail=f"Failed to start chat in time: {str(e)}")
     except Exception as e:
-        logger.error(f"Error starting chat: {str(e)}")
+        logger.error("Error starting chat: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to start chat: {str(e)}")
 
+async def _generate_session_summary(openai_client, session_id: str, query: str, products_context: str) -> None:
+    """
+    Background task: generate the initial assistant message for a pending session
+    """
+    # Runs after the /chat/start trace has finished, so it gets a trace of its own
+    # and a deadline of its own instead of the one inherited from the request
+    with start_trace("chat_summary", session_id=session_id, parent_trace_id=current_trace_id()), deadline_scope(config.DEADLINE_CHAT_SECONDS):
+        try:
+            result = await generate_initial_message(openai_client, query, products_context)
+            summary_status = "ready"
+        except Exception as e:
+            logger.error("Error generating summary for session %s: %s", session_id, e)
+            result = None
+            summary_status = "failed"
+
+    def apply_summary(session: ChatSession) -> None:
+        if result:
+            session.messages.append(result["message"])
+        session.summary_status = summary_status
+        session.last_updated = datetime.now()
+
+    try:
+        # Re-read and update in one step; a chat turn may have been stored while the summary was generated
+        if await chat_sessions.modify(session_id, apply_summary) is None:
+            logger.warning("Session %s was deleted before its summary was ready", session_id)
+            return
+
+        logger.info("Summary for session %s finished with status: %s", session_id, summary_status)
+    finally:
+        event = summary_events.pop(session_id, None)
+        if event:
+            event.set()
+
+async def _wait_for_summary(session_id: str, timeout: float) -> ChatSession:
+    """
+    Wait until the session's summary is no longer pending or the timeout expires
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while True:
+        session = await validate_session_request(session_id, chat_sessions)
+        remaining = deadline - loop.time()
+        if session.summary_status != "pending" or remaining <= 0:
+            return session
+
+        event = summary_events.get(session_id)
+        if event:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(min(SUMMARY_POLL_INTERVAL, remaining))
+
+def _build_summary_response(session: ChatSession) -> ChatSummaryResponse:
+    """Build the summary payload for a session, legacy sessions count as ready"""
+    status = session.summary_status or "ready"
+    message = None
+    if status == "ready":
+        message = next((msg for msg in reversed(session.messages) if msg.role == "assistant"), None)
+
+    return ChatSummaryResponse(
+        session_id=session.session_id,
+        status=status,
+        message=message,
+        response_id=message.response_id if message else None
+    )
+
+@router.get("/chat/{session_id}/summary", response_model=ChatSummaryResponse)
+async def get_chat_summary(session_id: str, wait: float = Query(0, ge=0, le=SUMMARY_MAX_WAIT)):
+    """
+    Get the initial assistant message of a session, optionally long-polling while it is pending
+    """
+    try:
+        logger.info("Getting summary for session: %s (wait: %ss)", session_id, wait)
+
+        session = await _wait_for_summary(session_id, wait)
+        return FastJSONResponse(_build_summary_response(session))
+
+    except ValueError as e:
+        logger.error("Error getting chat summary: %s", e)
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/chat/{session_id}/summary/events")
+async def stream_chat_summary(session_id: str):
+    """
+    Stream the initial assistant message of a session as a Server-Sent Event
+    """
+    try:
+        await validate_session_request(session_id, chat_sessions)
+    except ValueError as e:
+        logger.error("Error streaming chat summary: %s", e)
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def event_stream():
+        try:
+            while True:
+                session = await _wait_for_summary(session_id, SUMMARY_KEEPALIVE_INTERVAL)
+                if session.summary_status != "pending":
+                    break
+                yield ": keep-alive\n\n"
+
+            payload = _build_summary_response(session)
+            yield f"event: summary\ndata: {payload.model_dump_json()}\n\n"
+        except ValueError:
+            yield f"event: error\ndata: {{\"detail\": \"Chat session {session_id} not found\"}}\n\n"
+
+    logger.info("Streaming summary for session: %s", session_id)
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/chat/message", response_model=SendMessageResponse)
-async def send_message(request: SendMessageRequest):
+async def send_message(
+    request: SendMessageRequest,
+    openai_client=Depends(provide_openai_client),
+    weaviate_client=Depends(provide_weaviate_client)
+):
     """
     Send a message in an existing chat session with fresh search on every message
     """
     try:
-        logger.info(f"Sending message to session {request.session_id}: '{request.message}' with filters - Brand: {request.brand_filter}, Color: {request.color_filter}")
+        logger.info("Sending message to session %s: '%s' with filters - Brand: %s, Color: %s", request.session_id, request.message, request.brand_filter, request.color_filter)
 
-        session = validate_session_request(request.session_id, chat_sessions)
+        session = await validate_session_request(request.session_id, chat_sessions)
 
         # Process chat message with filters - this will perform a fresh search
         result = await process_chat_message(
+            openai_client,
+            weaviate_client,
             session,
             request.message,
             request.user_id,
@@ -112,40 +315,55 @@ async def send_message(request: SendMessageRequest):
             request.color_filter
         )
 
-        chat_sessions[request.session_id] = session
+        def record_turn(stored: ChatSession) -> None:
+            stored.messages.extend([result["user_message"], result["assistant_response"]])
+            stored.product_refs = result["product_refs"]  # Update with new search results
+            stored.last_updated = datetime.now()
+
+        # Merged into the stored session, which a pending summary may have updated meanwhile
+        if await chat_sessions.modify(request.session_id, record_turn) is None:
+            raise ValueError(f"Chat session {request.session_id} was deleted while the message was processed")
 
-        logger.info(f"Message processed successfully with search query: '{result.get('search_query_used')}', found {result.get('products_found')} products")
+        logger.info("Message processed successfully with search query: '%s', found %s products", result.get('search_query_used'), result.get('products_found'))
 
-        return SendMessageResponse(
+        return FastJSONResponse(SendMessageResponse(
             session_id=request.session_id,
             user_message=result["user_message"],
             assistant_response=result["assistant_response"],
-            status="success"
-        )
+            status=result["status"]
+        ))
 
     except ValueError as e:
-        logger.error(f"Validation error sending message: {str(e)}")
+        logger.error("Validation error sending message: %s", e)
         raise HTTPException(status_code=404, detail=str(e))
+    except DeadlineExceeded as e:
+        logger.error("Deadline exceeded sending message: %s", e)
+        raise HTTPException(status_code=504, detail=f"Failed to send message in time: {str(e)}")
     except Exception as e:
-        logger.error(f"Error sending message: {str(e)}")
+        logger.error("Error sending message: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to send message: {str(e)}")
 
-@router.get("/chat/{session_id}")
-async def get_chat_session(session_id: str):
+@router.get("/chat/{session_id}", response_model=ChatSessionDetails)
+async def get_chat_session(session_id: str, weaviate_client=Depends(provide_weaviate_client)):
     """
-    Get chat session details and message history
+    Get chat session details and message history, with the session's products
+    hydrated into `products` as before sessions stored only references
     """
     try:
-        logger.info(f"Retrieving chat session: {session_id}")
+        logger.info("Retrieving chat session: %s", session_id)
 
-        session = validate_session_request(session_id, chat_sessions)
+        session = await validate_session_request(session_id, chat_sessions)
+        products = await hydrate_session_products(weaviate_client, session)
 
-        logger.info(f"Chat session {session_id} retrieved successfully")
-        return session
+        logger.info("Chat session %s retrieved successfully", session_id)
+        return FastJSONResponse(ChatSessionDetails(**session.model_dump(), products=products))
 
     except ValueError as e:
-        logger.error(f"Error retrieving chat session: {str(e)}")
+        logger.error("Error retrieving chat session: %s", e)
         raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error("Error retrieving chat session: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve chat session: {str(e)}")
 
 @router.delete("/chat/{session_id}")
 async def delete_chat_session(session_id: str):
@@ -153,158 +371,303 @@ async def delete_chat_session(session_id: str):
     Delete a chat session
     """
     try:
-        logger.info(f"Deleting chat session: {session_id}")
+        logger.info("Deleting chat session: %s", session_id)
 
-        validate_session_request(session_id, chat_sessions)
-        del chat_sessions[session_id]
+        await validate_session_request(session_id, chat_sessions)
+        if not await chat_sessions.delete(session_id):
+            raise ValueError(f"Chat session {session_id} not found")
 
-        logger.info(f"Chat session {session_id} deleted successfully")
-        return {"message": "Chat session deleted successfully", "status": "success"}
+        # Wake up anyone still waiting on this session's summary
+        event = summary_events.pop(session_id, None)
+        if event:
+            event.set()
+
+        logger.info("Chat session %s deleted successfully", session_id)
+        return FastJSONResponse({"message": "Chat session deleted successfully", "status": "success"})
+
+    except ValueError as e:
+        logger.error("Error deleting chat session: %s", e)
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/chat/{session_id}/messages", response_model=SessionMessagesResponse)
+async def get_chat_messages(session_id: str, since: int = Query(0, ge=0)):
+    """
+    Get the messages of a chat session starting at message index `since` (delta sync)
+    """
+    try:
+        logger.info("Retrieving messages for chat session %s since index %s", session_id, since)
+
+        session = await validate_session_request(session_id, chat_sessions)
+        total_messages = len(session.messages)
+
+        return FastJSONResponse(SessionMessagesResponse(
+            session_id=session_id,
+            messages=session.messages[since:],
+            since=since,
+            next_index=total_messages,
+            total_messages=total_messages,
+            last_updated=session.last_updated
+        ))
 
     except ValueError as e:
-        logger.error(f"Error deleting chat session: {str(e)}")
+        logger.error("Error retrieving chat messages: %s", e)
         raise HTTPException(status_code=404, detail=str(e))
 
+@router.get("/chat/sessions/summaries", response_model=SessionListResponse)
+async def list_chat_session_summaries(
+    user_id: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    List lightweight chat session summaries, most recently updated first, one page at a time
+    """
+    try:
+        logger.info("Listing chat session summaries (user_id: %s, offset: %s, limit: %s)", user_id, offset, limit)
+
+        # The shared store orders and pages in SQL, without loading the sessions themselves
+        summaries, total = await chat_sessions.summaries(user_id, offset, limit)
+
+        logger.info("Returning %s of %s session summaries", len(summaries), total)
+        return FastJSONResponse(SessionListResponse(sessions=summaries, total=total, offset=offset, limit=limit))
+
+    except Exception as e:
+        logger.error("Error listing chat session summaries: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to list sessions: {str(e)}")
+
 @router.get("/chat/sessions/list")
 async def list_chat_sessions(user_id: Optional[str] = None):
     """
     List all chat sessions, optionally filtered by user_id
+
+    Returns every full session; prefer /chat/sessions/summaries for anything but debugging
     """
     try:
-        logger.info(f"Listing chat sessions (user_id: {user_id})")
+        logger.info("Listing chat sessions (user_id: %s)", user_id)
 
+        sessions = await chat_sessions.values()
         if user_id:
             filtered_sessions = {
-                sid: session for sid, session in chat_sessions.items()
+                session.session_id: session for session in sessions
                 if session.user_id == user_id
             }
-            logger.info(f"Found {len(filtered_sessions)} sessions for user {user_id}")
-            return {"sessions": filtered_sessions, "count": len(filtered_sessions)}
+            logger.info("Found %s sessions for user %s", len(filtered_sessions), user_id)
+            return FastJSONResponse({"sessions": filtered_sessions, "count": len(filtered_sessions)})
 
-        logger.info(f"Returning all {len(chat_sessions)} sessions")
-        return {"sessions": chat_sessions, "count": len(chat_sessions)}
+        logger.info("Returning all %s sessions", len(sessions))
+        return FastJSONResponse({"sessions": {session.session_id: session for session in sessions}, "count": len(sessions)})
 
     except Exception as e:
-        logger.error(f"Error listing chat sessions: {str(e)}")
+        logger.error("Error listing chat sessions: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to list sessions: {str(e)}")
 
 @router.get("/chat/{session_id}/responses")
-async def get_conversation_responses(session_id: str):
+async def get_conversation_responses(session_id: str, openai_client=Depends(provide_openai_client)):
     """
     Get all responses for a conversation using OpenAI Responses API
     """
     try:
-        logger.info(f"Getting conversation responses for session: {session_id}")
+        logger.info("Getting conversation responses for session: %s", session_id)
 
-        session = validate_session_request(session_id, chat_sessions)
+        session = await validate_session_request(session_id, chat_sessions)
 
         if hasattr(session, 'conversation_id') and session.conversation_id:
-            from client import openai_client
             responses = await openai_client.list_conversation_responses(
                 conversation_id=session.conversation_id
             )
-            logger.info(f"Retrieved {len(responses)} responses from OpenAI")
-            return {"responses": responses, "count": len(responses)}
+            logger.info("Retrieved %s responses from OpenAI", len(responses))
+            return FastJSONResponse({"responses": responses, "count": len(responses)})
         else:
-            logger.warning(f"No conversation_id found for session {session_id}")
-            return {"responses": [], "count": 0, "message": "No conversation ID available"}
+            logger.warning("No conversation_id found for session %s", session_id)
+            return FastJSONResponse({"responses": [], "count": 0, "message": "No conversation ID available"})
 
     except ValueError as e:
-        logger.error(f"Error getting conversation responses: {str(e)}")
+        logger.error("Error getting conversation responses: %s", e)
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error getting conversation responses: {str(e)}")
+        logger.error("Error getting conversation responses: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to get responses: {str(e)}")
 
 @router.post("/search", response_model=SearchResponse)
-async def search_products(request: SearchRequest):
+async def search_products(request: SearchRequest, weaviate_client=Depends(provide_weaviate_client)):
     """
     Search for products using Weaviate semantic search
     """
     try:
-        logger.info(f"Searching for products: '{request.query}'")
-
-        from weaviate_client import weaviate_client
+        logger.info("Searching for products: '%s' (offset: %s)", request.query, request.offset)
 
-        results = weaviate_client.semantic_search(
+        products = await run_product_search(
+            weaviate_client,
             query=request.query,
             limit=request.limit,
             brand_filter=request.brand_filter,
-            color_filter=request.color_filter
+            color_filter=request.color_filter,
+            offset=request.offset
         )
 
-        products = [Product(**result) for result in results]
+        logger.info("Search completed: found %s products", len(products))
 
-        logger.info(f"Search completed: found {len(products)} products")
+        if request.compact:
+            # Clients over-fetching for local filtering load the rest from /products/{product_id}
+            products = [product.model_copy(update={"description": "", "bullet_points": ""}) for product in products]
 
-        return SearchResponse(
+        return FastJSONResponse(SearchResponse(
             products=products,
             total_results=len(products),
-            status="success"
+            status="success",
+            offset=request.offset,
+            has_more=bool(request.limit) and len(products) == request.limit
+        ))
+
+    except DeadlineExceeded as e:
+        logger.error("Deadline exceeded searching products: %s", e)
+        raise HTTPException(status_code=504, detail=f"Search timed out: {str(e)}")
+    except Exception as e:
+        logger.error("Error searching products: %s", e)
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@router.get("/search/suggest")
+async def suggest_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(8, ge=1, le=20),
+    weaviate_client=Depends(provide_weaviate_client)
+):
+    """
+    Keyword (BM25) matches for search-as-you-type, with card fields only. Much
+    cheaper than POST /search, which embeds the query and may call the LLM
+    """
+    try:
+        logger.debug("Suggesting products for: '%s'", q)
+
+        with stage("keyword_search", query=q, limit=limit):
+            results = await run_in_thread(weaviate_client.keyword_search, q, limit, stage="keyword_search")
+        products = [Product(**result) for result in results]
+
+        # Identical prefixes are typed by many users; let clients and proxies reuse them briefly
+        return conditional_json_response(
+            request,
+            {"products": products, "count": len(products), "status": "success"},
+            cache_control=f"public, max-age={SUGGEST_CACHE_TTL}"
         )
 
+    except DeadlineExceeded as e:
+        logger.error("Deadline exceeded suggesting products: %s", e)
+        raise HTTPException(status_code=504, detail=f"Suggestions timed out: {str(e)}")
     except Exception as e:
-        logger.error(f"Error searching products: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+        logger.error("Error suggesting products: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to suggest products: {str(e)}")
+
+@router.get("/products/{product_id}", response_model=Product)
+async def get_product(product_id: str, request: Request, weaviate_client=Depends(provide_weaviate_client)):
+    """
+    Get the full details of one product, from the product cache when a recent search returned it
+    """
+    def fetch() -> Optional[Product]:
+        result = weaviate_client.get_product(product_id)
+        if result is None:
+            return None
+        product = Product(**result)
+        product_cache.put_many([product])
+        return product
+
+    try:
+        # Cache lookups and writes may hit the shared SQLite table, so they run in a thread
+        product = await run_in_thread(product_cache.get, product_id, stage="get_product")
+        record_cache("product_details", product is not None)
+        if product is None:
+            product = await run_in_thread(fetch, stage="get_product")
+            if product is None:
+                raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
+        else:
+            product = product.model_copy(update={"score": None})  # Scores belong to a search, not to the product
+
+        # Product details only change with ingestion, like the facets
+        return conditional_json_response(request, product, cache_control=f"public, max-age={config.FACET_CACHE_TTL}")
+
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        logger.error("Deadline exceeded fetching product %s: %s", product_id, e)
+        raise HTTPException(status_code=504, detail=f"Product lookup timed out: {str(e)}")
+    except Exception as e:
+        logger.error("Error fetching product %s: %s", product_id, e)
+        raise HTTPException(status_code=500, detail=f"Failed to fetch product: {str(e)}")
 
 @router.get("/search/brands")
-async def get_available_brands():
+async def get_available_brands(request: Request, weaviate_client=Depends(provide_weaviate_client)):
     """
     Get list of available product brands
     """
     try:
         logger.info("Fetching available brands")
 
-        from weaviate_client import weaviate_client
-        brands = weaviate_client.get_available_brands()
+        brands, fetched_at = await _get_facet_values("brands", weaviate_client.get_available_brands)
 
-        logger.info(f"Found {len(brands)} brands")
-        return {"brands": brands, "count": len(brands), "status": "success"}
+        logger.info("Found %s brands", len(brands))
+        return conditional_json_response(
+            request,
+            {"brands": brands, "count": len(brands), "status": "success"},
+            cache_control=f"public, max-age={config.FACET_CACHE_TTL}",
+            last_modified=fetched_at
+        )
 
+    except DeadlineExceeded as e:
+        logger.error("Deadline exceeded fetching brands: %s", e)
+        raise HTTPException(status_code=504, detail=f"Fetching brands timed out: {str(e)}")
     except Exception as e:
-        logger.error(f"Error fetching brands: {str(e)}")
+        logger.error("Error fetching brands: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch brands: {str(e)}")
 
 @router.get("/search/colors")
-async def get_available_colors():
+async def get_available_colors(request: Request, weaviate_client=Depends(provide_weaviate_client)):
     """
     Get list of available product colors
     """
     try:
         logger.info("Fetching available colors")
 
-        from weaviate_client import weaviate_client
-        colors = weaviate_client.get_available_colors()
+        colors, fetched_at = await _get_facet_values("colors", weaviate_client.get_available_colors)
 
-        logger.info(f"Found {len(colors)} colors")
-        return {"colors": colors, "count": len(colors), "status": "success"}
+        logger.info("Found %s colors", len(colors))
+        return conditional_json_response(
+            request,
+            {"colors": colors, "count": len(colors), "status": "success"},
+            cache_control=f"public, max-age={config.FACET_CACHE_TTL}",
+            last_modified=fetched_at
+        )
 
+    except DeadlineExceeded as e:
+        logger.error("Deadline exceeded fetching colors: %s", e)
+        raise HTTPException(status_code=504, detail=f"Fetching colors timed out: {str(e)}")
     except Exception as e:
-        logger.error(f"Error fetching colors: {str(e)}")
+        logger.error("Error fetching colors: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch colors: {str(e)}")
 
 @router.get("/chat/{session_id}/products", response_model=SearchResponse)
-async def get_session_products(session_id: str):
+async def get_session_products(session_id: str, request: Request, weaviate_client=Depends(provide_weaviate_client)):
     """
     Get products associated with a chat session
     """
     try:
-        logger.info(f"Getting products for session: {session_id}")
+        logger.info("Getting products for session: %s", session_id)
 
-        session = validate_session_request(session_id, chat_sessions)
+        session = await validate_session_request(session_id, chat_sessions)
 
-        products = session.products if hasattr(session, 'products') and session.products else []
+        products = await hydrate_session_products(weaviate_client, session)
 
-        logger.info(f"Found {len(products)} products for session {session_id}")
-        return SearchResponse(
-            products=products,
-            total_results=len(products),
-            status="success"
+        logger.info("Found %s products for session %s", len(products), session_id)
+        # Products change with every chat turn: let clients cache them but revalidate each time
+        return conditional_json_response(
+            request,
+            SearchResponse(products=products, total_results=len(products), status="success"),
+            cache_control="private, no-cache",
+            last_modified=session.last_updated
         )
 
     except ValueError as e:
-        logger.error(f"Error getting session products: {str(e)}")
+        logger.error("Error getting session products: %s", e)
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error getting session products: {str(e)}")
+        logger.error("Error getting session products: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to get session products: {str(e)}")
\ No newline at end of file
@@ -1,14 +1,108 @@
 """
 Script to run the FastAPI backend server
+
+    python run_server.py                  # Single uvicorn process, auto-reload when DEBUG=True
+    python run_server.py --production     # WORKERS uvicorn workers managed by gunicorn
+    python run_server.py --production --workers 8
+
+In production mode gunicorn preloads the app and the heavy client libraries in
+the master process, forks the workers (each opens its own OpenAI and Weaviate
+connections on first use), restarts them gracefully on SIGHUP and
+gives in-flight requests GRACEFUL_TIMEOUT seconds to finish. With more than one
+worker, sessions and cached products are kept in the SQLite file at
+SHARED_STATE_PATH so any worker can serve any session.
 """
 
-if __name__ == "__main__":
+import argparse
+import os
+import secrets
+
+DEFAULT_SHARED_STATE_PATH = "backend_state.db"
+
+def preload_heavy_imports() -> None:
+    """Import the heavy libraries once in the master process so forked workers share them"""
+    import pydantic  # noqa: F401
+    import openai  # noqa: F401
+    import weaviate  # noqa: F401
+    import main  # noqa: F401
+
+def run_development(config) -> None:
     import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=config.API_HOST,
+        port=config.API_PORT,
+        reload=config.DEBUG,
+        log_level=config.LOG_LEVEL.lower()
+    )
+
+def run_production(config, workers: int, logger) -> None:
+    if workers > 1 and not config.SHARED_STATE_PATH:
+        # Per-process dicts would make sessions disappear whenever a request lands on another worker
+        config.SHARED_STATE_PATH = os.environ["SHARED_STATE_PATH"] = DEFAULT_SHARED_STATE_PATH
+    if config.QUERY_LOG_PATH and not config.QUERY_LOG_SALT:
+        # Every worker must hash session ids the same way, or the replay cannot link chat turns
+        config.QUERY_LOG_SALT = os.environ["QUERY_LOG_SALT"] = secrets.token_hex(16)
+    logger.info("Production mode with %s workers (shared state: %s)", workers, config.SHARED_STATE_PATH or 'in-process')
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        import uvicorn
+
+        logger.warning("gunicorn is not installed, falling back to uvicorn workers without preloading or SIGHUP reloads")
+        uvicorn.run(
+            "main:app",
+            host=config.API_HOST,
+            port=config.API_PORT,
+            workers=workers,
+            timeout_graceful_shutdown=config.GRACEFUL_TIMEOUT,
+            log_level=config.LOG_LEVEL.lower()
+        )
+        return
+
+    class GunicornApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            preload_heavy_imports()
+            from main import app
+            return app
+
+    GunicornApplication({
+        "bind": f"{config.API_HOST}:{config.API_PORT}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "graceful_timeout": config.GRACEFUL_TIMEOUT,
+        "timeout": config.GRACEFUL_TIMEOUT * 4,
+        "keepalive": 5,
+        "max_requests": config.MAX_REQUESTS,
+        "max_requests_jitter": config.MAX_REQUESTS // 10,
+        "loglevel": config.LOG_LEVEL.lower(),
+    }).run()
+
+if __name__ == "__main__":
     from config import config
+    from log_config import setup_logging
     import logging
 
+    setup_logging(config)
+
     logger = logging.getLogger(__name__)
 
+    parser = argparse.ArgumentParser(description="Run the Search Engine Chat API")
+    parser.add_argument("--production", action="store_true", help="Run multiple workers with graceful restarts")
+    parser.add_argument("--workers", type=int, default=config.WORKERS, help="Number of worker processes in production mode")
+    args = parser.parse_args()
+
     print("🚀 Starting Search Engine Chat API...")
     print(f"📍 API will be available at: http://{config.API_HOST}:{config.API_PORT}")
     print(f"📚 API docs will be available at: http://{config.API_HOST}:{config.API_PORT}/docs")
@@ -16,10 +110,7 @@ if __name__ == "__main__":
 
     logger.info("Server startup initiated")
 
-    uvicorn.run(
-        "main:app",
-        host=config.API_HOST,
-        port=config.API_PORT,
-        reload=config.DEBUG,
-        log_level=config.LOG_LEVEL.lower()
-    )
\ No newline at end of file
+    if args.production:
+        run_production(config, max(1, args.workers), logger)
+    else:
+        run_development(config)
@@ -0,0 +1,271 @@
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+from models import ChatSession, ChatSessionSummary
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class SharedDatabase:
+    """
+    SQLite database holding state shared between worker processes.
+
+    The connection is opened lazily and reopened after a fork, so the app can be
+    preloaded in the server's master process before workers are forked.
+    """
+
+    def __init__(self, path: str, schema: str, migrate: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.path = path
+        self.schema = schema
+        self.migrate = migrate  # Brings tables created by older versions up to date
+        self.lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            # WAL lets readers in other workers proceed while one worker writes
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(self.schema)
+            if self.migrate is not None:
+                self.migrate(self._connection)
+            self._pid = os.getpid()
+        return self._connection
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        with self.lock:
+            return self.connection.execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters) -> sqlite3.Cursor:
+        with self.lock:
+            return self.connection.executemany(sql, parameters)
+
+    def fetchone(self, sql: str, parameters=()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchone()
+
+    def fetchall(self, sql: str, parameters=()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run the block in a write transaction; BEGIN IMMEDIATE takes the write lock
+        up front, so another worker cannot change the rows between read and write
+        """
+        with self.lock:
+            connection = self.connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+def summarize_session(session: ChatSession) -> ChatSessionSummary:
+    return ChatSessionSummary(
+        session_id=session.session_id,
+        user_id=session.user_id,
+        created_at=session.created_at,
+        last_updated=session.last_updated,
+        message_count=len(session.messages),
+        search_query=session.search_query
+    )
+
+class MemorySessionStore(dict):
+    """Chat sessions of a single worker process, kept in a dict"""
+
+    def summaries(self, user_id: Optional[str], offset: int, limit: int) -> Tuple[List[ChatSessionSummary], int]:
+        """One page of session summaries, most recently updated first, and the number of matching sessions"""
+        sessions = [session for session in self.values() if not user_id or session.user_id == user_id]
+        # Only the sessions up to the requested page need to be ordered
+        page = heapq.nlargest(offset + limit, sessions, key=lambda session: session.last_updated)[offset:]
+        return [summarize_session(session) for session in page], len(sessions)
+
+    def modify(self, session_id: str, change: Callable[[ChatSession], None]) -> Optional[ChatSession]:
+        """
+        Apply `change` to the stored session, None if it no longer exists. Runs without
+        awaiting, so no other request can change the session in between
+        """
+        session = self.get(session_id)
+        if session is not None:
+            change(session)
+        return session
+
+class SqliteSessionStore(MutableMapping):
+    """
+    Chat session store shared by all worker processes through a SQLite file.
+
+    Behaves like the in-memory dict it replaces, except that lookups return a
+    fresh copy. Storing that copy back would overwrite whatever another request
+    saved meanwhile, so existing sessions are changed with modify().
+    """
+
+    def __init__(self, path: str):
+        # The summary fields are kept in columns, so listing sessions never parses the data blobs
+        self._db = SharedDatabase(
+            path,
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            "session_id TEXT PRIMARY KEY, user_id TEXT, last_updated TEXT, data TEXT NOT NULL, "
+            "created_at TEXT, message_count INTEGER, search_query TEXT)",
+            migrate=self._migrate
+        )
+        logger.info("Using shared SQLite session store at %s", path)
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection) -> None:
+        connection.execute("BEGIN IMMEDIATE")  # Workers starting together migrate one at a time
+        try:
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(chat_sessions)")}
+            if "message_count" not in columns:
+                # Tables created before the summary columns existed: fill them from the blobs once
+                for column in ("created_at TEXT", "message_count INTEGER", "search_query TEXT"):
+                    connection.execute(f"ALTER TABLE chat_sessions ADD COLUMN {column}")
+                connection.execute(
+                    "UPDATE chat_sessions SET created_at = json_extract(data, '$.created_at'), "
+                    "message_count = json_array_length(data, '$.messages'), search_query = json_extract(data, '$.search_query')"
+                )
+                logger.info("Added summary columns to the shared chat_sessions table")
+            connection.execute("CREATE INDEX IF NOT EXISTS chat_sessions_last_updated ON chat_sessions (last_updated)")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _columns(session: ChatSession) -> Tuple:
+        return (
+            session.user_id, session.last_updated.isoformat(), session.model_dump_json(),
+            session.created_at.isoformat(), len(session.messages), session.search_query
+        )
+
+    def __getitem__(self, session_id: str) -> ChatSession:
+        row = self._db.fetchone("SELECT data FROM chat_sessions WHERE session_id = ?", (session_id,))
+        if row is None:
+            raise KeyError(session_id)
+        return ChatSession.model_validate_json(row[0])
+
+    def __setitem__(self, session_id: str, session: ChatSession) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO chat_sessions "
+            "(session_id, user_id, last_updated, data, created_at, message_count, search_query) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, *self._columns(session))
+        )
+
+    def modify(self, session_id: str, change: Callable[[ChatSession], None]) -> Optional[ChatSession]:
+        """
+        Re-read the session, apply `change` and write it back in one transaction;
+        None if the session no longer exists
+        """
+        with self._db.transaction() as connection:
+            row = connection.execute("SELECT data FROM chat_sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            session = ChatSession.model_validate_json(row[0])
+            change(session)
+            connection.execute(
+                "UPDATE chat_sessions SET user_id = ?, last_updated = ?, data = ?, created_at = ?, "
+                "message_count = ?, search_query = ? WHERE session_id = ?",
+                (*self._columns(session), session_id)
+            )
+        return session
+
+    def __delitem__(self, session_id: str) -> None:
+        cursor = self._db.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(session_id)
+
+    def __contains__(self, session_id: object) -> bool:
+        return self._db.fetchone("SELECT 1 FROM chat_sessions WHERE session_id = ?", (session_id,)) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self._db.fetchall("SELECT session_id FROM chat_sessions")])
+
+    def __len__(self) -> int:
+        return self._db.fetchone("SELECT COUNT(*) FROM chat_sessions")[0]
+
+    def values(self):
+        rows = self._db.fetchall("SELECT data FROM chat_sessions")
+        return [ChatSession.model_validate_json(row[0]) for row in rows]
+
+    def items(self):
+        return [(session.session_id, session) for session in self.values()]
+
+    def summaries(self, user_id: Optional[str], offset: int, limit: int) -> Tuple[List[ChatSessionSummary], int]:
+        """One page of session summaries, most recently updated first, and the number of matching sessions"""
+        where, parameters = ("WHERE user_id = ?", (user_id,)) if user_id else ("", ())
+        rows = self._db.fetchall(
+            "SELECT session_id, user_id, created_at, last_updated, message_count, search_query FROM chat_sessions "
+            f"{where} ORDER BY last_updated DESC LIMIT ? OFFSET ?",
+            (*parameters, limit, offset)
+        )
+        total = self._db.fetchone(f"SELECT COUNT(*) FROM chat_sessions {where}", parameters)[0]
+        summaries = [
+            ChatSessionSummary(
+                session_id=session_id, user_id=row_user_id, created_at=created_at,
+                last_updated=last_updated, message_count=message_count, search_query=search_query
+            )
+            for session_id, row_user_id, created_at, last_updated, message_count, search_query in rows
+        ]
+        return summaries, total
+
+class AsyncSessionStore:
+    """
+    What the routes use to reach the session store. SQLite calls may wait up to
+    30s for another worker's write lock, so they run in a worker thread and never
+    block the event loop; the in-memory store is called directly
+    """
+
+    def __init__(self, store: MutableMapping):
+        self.store = store
+        self._blocking = isinstance(store, SqliteSessionStore)
+
+    async def _call(self, func: Callable, *args):
+        if self._blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        return await self._call(self.store.get, session_id)
+
+    async def put(self, session: ChatSession) -> None:
+        await self._call(self.store.__setitem__, session.session_id, session)
+
+    async def modify(self, session_id: str, change: Callable[[ChatSession], None]) -> Optional[ChatSession]:
+        """Apply `change` to the stored session atomically, None if it no longer exists"""
+        return await self._call(self.store.modify, session_id, change)
+
+    async def delete(self, session_id: str) -> bool:
+        def delete() -> bool:
+            try:
+                del self.store[session_id]
+                return True
+            except KeyError:
+                return False
+
+        return await self._call(delete)
+
+    async def values(self) -> List[ChatSession]:
+        return await self._call(lambda: list(self.store.values()))
+
+    async def summaries(self, user_id: Optional[str], offset: int, limit: int) -> Tuple[List[ChatSessionSummary], int]:
+        return await self._call(self.store.summaries, user_id, offset, limit)
+
+def create_session_store() -> AsyncSessionStore:
+    """
+    Keep sessions in memory for a single worker and in the shared SQLite store when SHARED_STATE_PATH is set
+    """
+    if config.SHARED_STATE_PATH:
+        return AsyncSessionStore(SqliteSessionStore(config.SHARED_STATE_PATH))
+    return AsyncSessionStore(MemorySessionStore())
@@ -0,0 +1,318 @@
+"""
+Offline stand-ins for the OpenAI and Weaviate clients.
+
+Enabled with SIMULATION_MODE=true so the backend can be load tested without
+network access, OpenAI credits or a Weaviate cluster. Both fakes expose the same
+methods as the real singletons and sample their latency from a log-normal
+distribution with a configurable median, spread and error rate.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import random
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from config import config
+from deadline import remaining
+
+logger = logging.getLogger(__name__)
+
+SEED_PRODUCTS = [
+    {"product_id": "px1", "product_title": "Quantum Laptop - Model X", "product_brand": "TechCorp", "product_description": "The latest high-performance laptop with a quantum processor, perfect for developers and creators.", "product_color": "Cosmic Gray"},
+    {"product_id": "px2", "product_title": "Stellar Smartwatch Series 7", "product_brand": "Gadgetron", "product_description": "A sleek smartwatch with advanced health tracking, GPS, and a vibrant always-on display.", "product_color": "Midnight Black"},
+    {"product_id": "px3", "product_title": "Eco-Friendly Water Bottle", "product_brand": "GreenLife", "product_description": "Stay hydrated with our insulated, BPA-free water bottle made from 100% recycled materials.", "product_color": "Forest Green"},
+    {"product_id": "px4", "product_title": "Advanced Gaming Mouse", "product_brand": "PixelPerfect", "product_description": "Gain a competitive edge with this ergonomic gaming mouse, featuring customizable RGB and a 16,000 DPI sensor.", "product_color": "RGB Fusion"},
+    {"product_id": "px5", "product_title": "Nebula VR Headset", "product_brand": "Immersive Inc.", "product_description": "Experience virtual reality like never before with our 4K resolution VR headset.", "product_color": "Galaxy Purple"},
+    {"product_id": "px6", "product_title": "Acoustic Pods Pro", "product_brand": "SoundWave", "product_description": "Crystal-clear audio with active noise cancellation in a compact form factor.", "product_color": "Arctic White"},
+]
+
+SYNTHETIC_ADJECTIVES = ["Premium", "Compact", "Wireless", "Portable", "Classic", "Ultra", "Smart", "Eco", "Pro", "Lightweight"]
+SYNTHETIC_COLORS = ["Black", "White", "Gray", "Silver", "Blue", "Red", "Green", "Gold", "Pink", "Purple"]
+SYNTHETIC_BULLET_POINTS = "Durable build quality. Easy to set up and use. Backed by a one-year warranty."
+
+PRODUCT_PROPERTIES = [
+    "product_id", "product_title", "product_description",
+    "product_bullet_point", "product_brand", "product_color"
+]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _tokenize(text: str) -> set:
+    return set(_TOKEN_PATTERN.findall(text.lower()))
+
+class LatencyModel:
+    """Log-normal latency with a configurable median and spread, plus a failure rate"""
+
+    def __init__(self, name: str, median_ms: float, sigma: float, error_rate: float, rng: random.Random):
+        self.name = name
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._rng = rng
+
+    def sample_seconds(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.median_ms / 1000
+        return self._rng.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+    def wait(self) -> None:
+        """
+        Block for one sampled latency. Like the real client's query timeout, give up
+        with TimeoutError when the request's deadline comes first
+        """
+        latency = self.sample_seconds()
+        time_left = remaining()
+        if time_left is not None and latency > time_left:
+            time.sleep(max(time_left, 0.0))
+            raise TimeoutError(f"Simulated {self.name} timed out after {max(time_left, 0.0):.2f}s")
+        time.sleep(latency)
+
+    def maybe_fail(self) -> None:
+        if self.error_rate > 0 and self._rng.random() < self.error_rate:
+            raise ConnectionError(f"Simulated {self.name} failure")
+
+def load_catalog(path: str = "", size: int = 5000, seed: int = 42) -> List[Dict]:
+    """
+    Load the simulated catalog from the product parquet, or build a synthetic one
+    """
+    if path:
+        try:
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(path)
+            columns = [name for name in PRODUCT_PROPERTIES if name in parquet_file.schema_arrow.names]
+            catalog = []
+            for batch in parquet_file.iter_batches(batch_size=min(size, 10000), columns=columns):
+                for row in batch.to_pylist():
+                    catalog.append({name: row.get(name) or "" for name in PRODUCT_PROPERTIES})
+                if len(catalog) >= size:
+                    break
+
+            logger.info("Loaded %s simulated products from %s", len(catalog[:size]), path)
+            return catalog[:size]
+
+        except Exception as e:
+            logger.error("Failed to load simulated catalog from %s: %s, using synthetic products", path, e)
+
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(size):
+        seed_product = SEED_PRODUCTS[i % len(SEED_PRODUCTS)]
+        adjective = rng.choice(SYNTHETIC_ADJECTIVES)
+        catalog.append({
+            "product_id": f"sim{i:07d}",
+            "product_title": f"{adjective} {seed_product['product_title']}",
+            "product_description": seed_product["product_description"],
+            "product_bullet_point": SYNTHETIC_BULLET_POINTS,
+            "product_brand": seed_product["product_brand"],
+            "product_color": rng.choice(SYNTHETIC_COLORS),
+        })
+
+    logger.info("Generated %s synthetic simulated products", len(catalog))
+    return catalog
+
+class FakeWeaviateClient:
+    """
+    Drop-in replacement for WeaviateClientSingleton backed by an in-memory catalog
+    """
+
+    def __init__(self, catalog: Optional[List[Dict]] = None):
+        self._rng = random.Random(config.SIM_SEED)
+        self._catalog = catalog if catalog is not None else load_catalog(
+            config.SIM_PRODUCTS_PATH, config.SIM_CATALOG_SIZE, config.SIM_SEED
+        )
+        self._tokens = [
+            _tokenize(f"{item['product_title']} {item['product_brand']} {item['product_color']}")
+            for item in self._catalog
+        ]
+        self._latency = LatencyModel(
+            "Weaviate search", config.SIM_SEARCH_LATENCY_MS, config.SIM_LATENCY_SIGMA,
+            config.SIM_SEARCH_ERROR_RATE, self._rng
+        )
+        self._suggest_latency = LatencyModel(
+            "Weaviate keyword search", config.SIM_SUGGEST_LATENCY_MS, config.SIM_LATENCY_SIGMA,
+            config.SIM_SEARCH_ERROR_RATE, self._rng
+        )
+        logger.info("Simulated Weaviate client ready with %s products", len(self._catalog))
+
+    def semantic_search(
+        self,
+        query: str,
+        limit: int = 10,
+        brand_filter: Optional[str] = None,
+        color_filter: Optional[str] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """
+        Rank catalog products by token overlap with the query, honouring the filters
+        """
+        # The real client blocks the calling thread as well
+        self._latency.wait()
+        self._latency.maybe_fail()
+
+        query_tokens = _tokenize(query)
+        candidates = (
+            (len(query_tokens & tokens), -index)
+            for index, (item, tokens) in enumerate(zip(self._catalog, self._tokens))
+            if (not brand_filter or item["product_brand"] == brand_filter)
+            and (not color_filter or not color_filter.strip() or item["product_color"] == color_filter)
+        )
+        top = heapq.nlargest(offset + limit, candidates)[offset:]
+
+        results = []
+        for overlap, negative_index in top:
+            results.append(self._to_result(
+                self._catalog[-negative_index],
+                overlap / len(query_tokens) if query_tokens else 0.0
+            ))
+
+        logger.debug("Simulated search for '%s' returned %s products", query, len(results))
+        return results
+
+    @staticmethod
+    def _to_result(item: Dict, score: Optional[float]) -> Dict:
+        return {
+            "id": item["product_id"],
+            "title": item["product_title"],
+            "brand": item["product_brand"],
+            "color": item["product_color"],
+            "description": item["product_description"],
+            "bullet_points": item["product_bullet_point"],
+            "price": "Price not available",
+            "image_url": "",
+            "rating": 0,
+            "reviews": 0,
+            "score": score
+        }
+
+    def keyword_search(self, query: str, limit: int = 8) -> List[Dict]:
+        """
+        Rank catalog products by query tokens found in their title, brand and color,
+        treating the last token as a prefix since the user may still be typing it
+        """
+        self._suggest_latency.wait()
+        self._suggest_latency.maybe_fail()
+
+        words = _TOKEN_PATTERN.findall(query.lower())
+        if not words:
+            return []
+        complete, prefix = set(words[:-1]), words[-1]
+        candidates = (
+            (len(complete & tokens) + any(token.startswith(prefix) for token in tokens), -index)
+            for index, tokens in enumerate(self._tokens)
+        )
+        top = [candidate for candidate in heapq.nlargest(limit, candidates) if candidate[0] > 0]
+
+        results = []
+        for matched, negative_index in top:
+            result = self._to_result(self._catalog[-negative_index], matched / len(words))
+            result.update(description="", bullet_points="")
+            results.append(result)
+        return results
+
+    def get_product(self, product_id: str) -> Optional[Dict]:
+        self._latency.wait()
+        for item in self._catalog:
+            if item["product_id"] == product_id:
+                return self._to_result(item, None)
+        return None
+
+    def get_products(self, product_ids: List[str]) -> List[Dict]:
+        self._latency.wait()
+        wanted = set(product_ids)
+        return [self._to_result(item, None) for item in self._catalog if item["product_id"] in wanted]
+
+    def _top_values(self, property_name: str, limit: int) -> List[str]:
+        self._latency.wait()
+        counts = Counter(item[property_name] for item in self._catalog if item[property_name].strip())
+        return [value for value, count in counts.most_common(limit)]
+
+    def get_available_brands(self, limit: int = 50) -> List[str]:
+        return self._top_values("product_brand", limit)
+
+    def get_available_colors(self, limit: int = 50) -> List[str]:
+        return self._top_values("product_color", limit)
+
+class FakeOpenAIClient:
+    """
+    Drop-in replacement for OpenAIClientSingleton that fabricates responses locally
+    """
+
+    def __init__(self):
+        self._rng = random.Random(config.SIM_SEED)
+        self._response_latency = LatencyModel(
+            "OpenAI response", config.SIM_RESPONSE_LATENCY_MS, config.SIM_LATENCY_SIGMA,
+            config.SIM_OPENAI_ERROR_RATE, self._rng
+        )
+        self._completion_latency = LatencyModel(
+            "OpenAI completion", config.SIM_COMPLETION_LATENCY_MS, config.SIM_LATENCY_SIGMA,
+            config.SIM_OPENAI_ERROR_RATE, self._rng
+        )
+        self._response_counter = 0
+        logger.info("Simulated OpenAI client ready")
+
+    async def create_response(
+        self,
+        messages: List[Dict],
+        previous_response_id: Optional[str] = None,
+        max_tokens: int = 800
+    ) -> Dict:
+        await asyncio.sleep(self._response_latency.sample_seconds())
+        self._response_latency.maybe_fail()
+
+        user_messages = [msg for msg in messages if msg["role"] == "user"]
+        if not user_messages:
+            raise ValueError("No user messages found")
+
+        instructions = next((msg["content"] for msg in messages if msg["role"] == "system"), "")
+        search_results = instructions.partition("SEARCH RESULTS FOR:")[2].partition("CRITICAL:")[0]
+        product_count = sum(1 for line in search_results.splitlines() if line.startswith("- "))
+        content = (
+            f"I found {product_count} products matching your request. "
+            "Take a look at the results on the right and ask me if you want to compare any of them."
+        )
+
+        self._response_counter += 1
+        input_tokens = sum(len(msg["content"]) for msg in messages) // 4
+        output_tokens = len(content) // 4
+        return {
+            "content": content,
+            "response_id": f"sim_resp_{self._response_counter}",
+            "model": "simulated",
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        }
+
+    async def create_completion(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 50,
+        temperature: float = 0.3,
+        model: str = "gpt-4o"
+    ) -> Dict:
+        await asyncio.sleep(self._completion_latency.sample_seconds())
+        self._completion_latency.maybe_fail()
+
+        # Echo the new user message from the search-query prompt, trimmed to a few words
+        prompt = messages[-1]["content"]
+        match = re.search(r"New User Message: (.*)", prompt)
+        content = " ".join((match.group(1) if match else prompt).split()[:6])
+
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "content": content,
+            "model": "simulated",
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        }
+
+    async def list_conversation_responses(
+        self,
+        conversation_id: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Dict]:
+        return []
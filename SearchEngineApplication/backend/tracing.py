@@ -0,0 +1,257 @@
+"""
+Per-request traces: a root span per request (or background task) with a child span per pipeline stage.
+
+Spans are kept in memory until the trace finishes, then the whole trace is kept
+or dropped (tail sampling): errored traces and traces slower than TRACE_SLOW_MS
+are always kept, the rest with probability TRACE_SAMPLE_RATE. Kept traces are
+handed to a background thread that writes them as JSON lines to TRACE_FILE or
+posts them to an OTLP/HTTP collector at TRACE_OTLP_ENDPOINT.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from config import config
+from log_config import trace_id_var
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_time", "end_time", "attributes", "error")
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_time or time.time()) - self.start_time) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+class Trace:
+    def __init__(self, trace_id: str, root: Span):
+        self.trace_id = trace_id
+        self.root = root
+        self.spans: List[Span] = [root]
+
+    @property
+    def has_error(self) -> bool:
+        return any(span.error for span in self.spans)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "error": self.has_error,
+            "spans": [span.to_dict() for span in self.spans]
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """Return (trace_id, parent_span_id) from a W3C traceparent header"""
+    match = TRACEPARENT_PATTERN.match((header or "").strip().lower())
+    return (match.group(1), match.group(2)) if match else None
+
+@contextmanager
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Start a new trace (continuing the caller's trace id from a traceparent header
+    if given) and export it when the block exits
+    """
+    parent = parse_traceparent(traceparent)
+    trace_id, parent_id = parent if parent else (os.urandom(16).hex(), None)
+    root = Span(trace_id, name, parent_id, attributes)
+    trace = Trace(trace_id, root)
+
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(root)
+    log_token = trace_id_var.set(trace_id)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        root.end_time = time.time()
+        trace_id_var.reset(log_token)
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        exporter.submit(trace)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a child span of the current span; a no-op outside of a trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    child = Span(trace.trace_id, name, parent.span_id if parent else None, attributes)
+    trace.spans.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end_time = time.time()
+        _current_span.reset(token)
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(traces: List[Trace], service_name: str) -> Dict[str, Any]:
+    """Encode traces as an OTLP/HTTP JSON ExportTraceServiceRequest"""
+    spans = []
+    for trace in traces:
+        for item in trace.spans:
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": item.span_id,
+                "parentSpanId": item.parent_id or "",
+                "name": item.name,
+                "kind": 2 if item is trace.root else 1,  # SERVER for the request, INTERNAL for stages
+                "startTimeUnixNano": str(int(item.start_time * 1e9)),
+                "endTimeUnixNano": str(int((item.end_time or item.start_time) * 1e9)),
+                "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in item.attributes.items()],
+                "status": {"code": 2, "message": item.error} if item.error else {"code": 1}
+            })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "search-engine-backend"}, "spans": spans}]
+        }]
+    }
+
+class TraceExporter:
+    """
+    Samples finished traces and writes the kept ones from a background thread,
+    batching up to `batch_size` traces per write. At most `max_queue` traces wait
+    for export; when the writer falls behind, further traces are dropped and
+    counted instead of piling up in memory
+    """
+
+    def __init__(self, exporter: str, sample_rate: float, slow_ms: float, batch_size: int = 64, max_queue: int = 1000):
+        self.exporter = exporter.lower()
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter in ("file", "otlp")
+
+    def should_keep(self, trace: Trace) -> bool:
+        if trace.has_error or trace.root.duration_ms >= self.slow_ms:
+            return True
+        return random.random() < self.sample_rate
+
+    def submit(self, trace: Trace) -> None:
+        if not self.enabled or not self.should_keep(trace):
+            return
+        if self._thread is None or self._pid != os.getpid():
+            # Started lazily so forked workers each get their own writer thread
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            from metrics import traces_dropped  # metrics imports this module
+
+            traces_dropped.inc()
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Trace export queue is full, %s traces dropped so far", self.dropped)
+
+    def flush(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            try:
+                self._queue.put(None, timeout=5)
+            except queue.Full:
+                logger.warning("Trace exporter is not keeping up, unexported traces are lost")
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            batch = [trace]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._export(batch)
+                    return
+                batch.append(item)
+            self._export(batch)
+
+    def _export(self, traces: List[Trace]) -> None:
+        try:
+            if self.exporter == "file":
+                with open(config.TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(trace.to_dict(), default=str) + "\n" for trace in traces))
+            else:
+                import httpx
+
+                httpx.post(config.TRACE_OTLP_ENDPOINT, json=to_otlp(traces, config.TRACE_SERVICE_NAME), timeout=10).raise_for_status()
+        except Exception as e:
+            logger.warning("Failed to export %s traces: %s", len(traces), e)
+
+exporter = TraceExporter(config.TRACE_EXPORTER, config.TRACE_SAMPLE_RATE, config.TRACE_SLOW_MS, max_queue=config.TRACE_QUEUE_SIZE)
+atexit.register(exporter.flush)
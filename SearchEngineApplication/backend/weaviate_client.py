@@ -6,9 +6,57 @@ import weaviate.classes.query as wvcq
 from typing import List, Dict, Optional
 import time
 from config import config
+from metrics import weaviate_reconnects, weaviate_retries
+from deadline import MIN_STAGE_SECONDS, remaining
 
 logger = logging.getLogger(__name__)
 
+def transform_search_result(obj) -> Dict:
+    """Convert a Weaviate result object into the dict the Product model is built from"""
+    product_props = obj.properties
+    score = obj.metadata.score
+    if obj.metadata.distance is not None:
+        score = 1 - obj.metadata.distance  # near_text only reports a vector distance
+    return {
+        "id": product_props.get("product_id", ""),
+        "title": product_props.get("product_title", ""),
+        "brand": product_props.get("product_brand", ""),
+        "color": product_props.get("product_color", ""),
+        "description": product_props.get("product_description", ""),
+        "bullet_points": product_props.get("product_bullet_point", ""),
+        "price": "Price not available",  # Not available in current schema
+        "image_url": "",  # Not available in current schema
+        "rating": 0,  # Not available in current schema
+        "reviews": 0,  # Not available in current schema
+        "score": score
+    }
+
+class DeadlineTimeout:
+    """
+    The client's timeouts, with the query timeout cut to the time left until the
+    current request's deadline. The Weaviate client reads timeout_config.query for
+    every gRPC and REST query, and asyncio.to_thread carries the deadline into the
+    worker thread, so a query abandoned by the request also gives up on the wire
+    """
+
+    def __init__(self, timeout: Timeout):
+        self._timeout = timeout
+
+    @property
+    def query(self) -> float:
+        time_left = remaining()
+        if time_left is None:
+            return self._timeout.query
+        return max(MIN_STAGE_SECONDS, min(self._timeout.query, time_left))
+
+    @property
+    def insert(self) -> float:
+        return self._timeout.insert
+
+    @property
+    def init(self) -> float:
+        return self._timeout.init
+
 class WeaviateClientSingleton:
     _instance: Optional['WeaviateClientSingleton'] = None
     _client: Optional[weaviate.WeaviateClient] = None
@@ -38,7 +86,7 @@ class WeaviateClientSingleton:
             # Configure timeouts and connection settings
             timeout_config = Timeout(
                 init=30,      # 30 seconds for initialization
-                query=60,     # 60 seconds for queries (important for semantic search)
+                query=60,     # 60 seconds for queries (important for semantic search), less when the request's deadline is closer
                 insert=120    # 2 minutes for insert operations
             )
 
@@ -69,6 +117,9 @@ class WeaviateClientSingleton:
                 )
                 logger.info("Connected to local Weaviate instance with timeout configuration")
 
+            # Per-request query timeouts; the connection has no per-call timeout argument
+            self._client._connection.timeout_config = DeadlineTimeout(timeout_config)
+
             if self._client.is_ready():
                 self._initialized = True
                 self._last_health_check = time.time()
@@ -77,7 +128,7 @@ class WeaviateClientSingleton:
                 raise ConnectionError("Weaviate client not ready")
 
         except Exception as e:
-            logger.error(f"Failed to initialize Weaviate client: {str(e)}")
+            logger.error("Failed to initialize Weaviate client: %s", e)
             self._client = None
             self._initialized = False
             raise
@@ -106,7 +157,7 @@ class WeaviateClientSingleton:
             return True
 
         except Exception as e:
-            logger.error(f"Weaviate health check error: {str(e)}")
+            logger.error("Weaviate health check error: %s", e)
             return False
 
     def _reconnect_if_needed(self) -> None:
@@ -119,7 +170,7 @@ class WeaviateClientSingleton:
                 try:
                     self._client.close()
                 except Exception as e:
-                    logger.warning(f"Error closing old connection: {str(e)}")
+                    logger.warning("Error closing old connection: %s", e)
 
             # Reset state
             self._client = None
@@ -128,15 +179,17 @@ class WeaviateClientSingleton:
             # Retry connection
             for attempt in range(self._max_retries):
                 try:
-                    logger.info(f"Reconnection attempt {attempt + 1}/{self._max_retries}")
+                    logger.info("Reconnection attempt %s/%s", attempt + 1, self._max_retries)
                     self._create_connection()
 
                     if self._initialized:
+                        weaviate_reconnects.inc("success")
                         logger.info("Successfully reconnected to Weaviate")
                         return
 
                 except Exception as e:
-                    logger.error(f"Reconnection attempt {attempt + 1} failed: {str(e)}")
+                    weaviate_reconnects.inc("failure")
+                    logger.error("Reconnection attempt %s failed: %s", attempt + 1, e)
                     if attempt < self._max_retries - 1:
                         time.sleep(2 ** attempt)  # Exponential backoff
 
@@ -153,19 +206,29 @@ class WeaviateClientSingleton:
 
         return self._client
 
+    def close(self) -> None:
+        """Close the connection; the next WeaviateClientSingleton() connects again"""
+        if self._client:
+            self._client.close()
+        self._client = None
+        self._initialized = False
+        WeaviateClientSingleton._instance = None
+
     def semantic_search(
         self,
         query: str,
         limit: int = 10,
         brand_filter: Optional[str] = None,
-        color_filter: Optional[str] = None
+        color_filter: Optional[str] = None,
+        offset: int = 0
     ) -> List[Dict]:
         """
-        Perform semantic search on EcommerceProducts collection using Weaviate v4 API
+        Perform semantic search on EcommerceProducts collection using Weaviate v4 API;
+        `offset` skips the first results, for fetching further pages
         """
         for attempt in range(self._max_retries):
             try:
-                logger.info(f"Performing semantic search for: '{query}' (limit: {limit}) - Attempt {attempt + 1}")
+                logger.info("Performing semantic search for: '%s' (limit: %s, offset: %s) - Attempt %s", query, limit, offset, attempt + 1)
 
                 # Get the collection - this will auto-reconnect if needed
                 ecommerce_products = self.client.collections.get("EcommerceProducts")
@@ -174,10 +237,10 @@ class WeaviateClientSingleton:
                 filters = []
                 if brand_filter:
                     filters.append(("product_brand", brand_filter))
-                    logger.debug(f"Added brand filter: {brand_filter}")
+                    logger.debug("Added brand filter: %s", brand_filter)
                 if color_filter and color_filter.strip():
                     filters.append(("product_color", color_filter))
-                    logger.debug(f"Added color filter: {color_filter}")
+                    logger.debug("Added color filter: %s", color_filter)
 
                 # Perform the query using v4 API matching your notebook
                 if filters:
@@ -185,49 +248,41 @@ class WeaviateClientSingleton:
                     result = ecommerce_products.query.near_text(
                         query=query,
                         limit=limit,
+                        offset=offset or None,
                         filters=wvcq.Filter.all_of([wvcq.Filter.by_property(filter[0]).equal(filter[1]) for filter in filters]),
-                        return_metadata=MetadataQuery(score=True)
+                        return_metadata=MetadataQuery(score=True, distance=True)
                     )
-                    logger.debug(f"Query with filters: {filters}")
+                    logger.debug("Query with filters: %s", filters)
                 else:
                     # Query without filters
                     result = ecommerce_products.query.near_text(
                         query=query,
                         limit=limit,
-                        return_metadata=MetadataQuery(score=True)
+                        offset=offset or None,
+                        return_metadata=MetadataQuery(score=True, distance=True)
                     )
 
                 if not result.objects:
-                    logger.warning(f"No results found in Weaviate for query: '{query}' with filters: brand={brand_filter}, color={color_filter}")
+                    logger.warning("No results found in Weaviate for query: '%s' with filters: brand=%s, color=%s", query, brand_filter, color_filter)
                     return []
 
                 products = result.objects
-                logger.info(f"Found {len(products)} products for query: '{query}' with filters: brand={brand_filter}, color={color_filter}")
+                logger.info("Found %s products for query: '%s' with filters: brand=%s, color=%s", len(products), query, brand_filter, color_filter)
 
                 # Transform the results to match expected format
-                transformed_products = []
-                for obj in products:
-                    product_props = obj.properties
-                    transformed_product = {
-                        "id": product_props.get("product_id", ""),
-                        "title": product_props.get("product_title", ""),
-                        "brand": product_props.get("product_brand", ""),
-                        "color": product_props.get("product_color", ""),
-                        "description": product_props.get("product_description", ""),
-                        "bullet_points": product_props.get("product_bullet_point", ""),
-                        "price": "Price not available",  # Not available in current schema
-                        "image_url": "",  # Not available in current schema
-                        "rating": 0,  # Not available in current schema
-                        "reviews": 0  # Not available in current schema
-                    }
-                    transformed_products.append(transformed_product)
-
-                return transformed_products
+                return [transform_search_result(obj) for obj in products]
 
             except (ConnectionError, TimeoutError, Exception) as e:
-                logger.error(f"Error performing semantic search (attempt {attempt + 1}): {str(e)}")
+                logger.error("Error performing semantic search (attempt %s): %s", attempt + 1, e)
+
+                time_left = remaining()
+                if time_left is not None and time_left - 2 ** attempt < MIN_STAGE_SECONDS:
+                    # No time would be left for another attempt after the backoff
+                    logger.error("Not retrying semantic search with %.2fs left", time_left)
+                    raise
 
                 if attempt < self._max_retries - 1:
+                    weaviate_retries.inc("semantic_search")
                     # Force reconnection on next attempt
                     self._last_health_check = 0
                     time.sleep(2 ** attempt)  # Exponential backoff
@@ -236,6 +291,49 @@ class WeaviateClientSingleton:
                     logger.error("All semantic search attempts failed")
                     raise
 
+    def keyword_search(self, query: str, limit: int = 8) -> List[Dict]:
+        """
+        BM25 search over titles, brands and colors for search-as-you-type. Nothing is
+        embedded, so it is much faster than semantic_search; only card fields are returned
+        """
+        ecommerce_products = self.client.collections.get("EcommerceProducts")
+        result = ecommerce_products.query.bm25(
+            query=query,
+            query_properties=["product_title", "product_brand", "product_color"],
+            limit=limit,
+            return_properties=["product_id", "product_title", "product_brand", "product_color"],
+            return_metadata=MetadataQuery(score=True)
+        )
+        return [transform_search_result(obj) for obj in result.objects]
+
+    def get_product(self, product_id: str) -> Optional[Dict]:
+        """
+        Fetch a single product by its product_id, or None if there is no such product
+        """
+        logger.info("Fetching product %s", product_id)
+        ecommerce_products = self.client.collections.get("EcommerceProducts")
+        result = ecommerce_products.query.fetch_objects(
+            limit=1,
+            filters=wvcq.Filter.by_property("product_id").equal(product_id)
+        )
+        if not result.objects:
+            return None
+        return transform_search_result(result.objects[0])
+
+    def get_products(self, product_ids: List[str]) -> List[Dict]:
+        """
+        Fetch several products by product_id in one query; ids without a product are left out
+        """
+        if not product_ids:
+            return []
+        logger.info("Fetching %s products by id", len(product_ids))
+        ecommerce_products = self.client.collections.get("EcommerceProducts")
+        result = ecommerce_products.query.fetch_objects(
+            limit=len(product_ids),
+            filters=wvcq.Filter.by_property("product_id").contains_any(product_ids)
+        )
+        return [transform_search_result(obj) for obj in result.objects]
+
     def get_available_brands(self, limit: int = 50) -> List[str]:
         """
         Get list of available product brands using HTTP REST only (avoiding gRPC issues)
@@ -261,15 +359,15 @@ class WeaviateClientSingleton:
             # Sort by frequency (most frequent first)
             brand_list = sorted(brand_counts.items(), key=lambda x: x[1], reverse=True)
             brand_list = [brand for brand, count in brand_list[:limit]]
-            logger.info(f"HTTP REST method successful: Found {len(brand_list)} unique brands")
+            logger.info("HTTP REST method successful: Found %s unique brands", len(brand_list))
             return brand_list
 
         except Exception as e:
-            logger.error(f"HTTP REST fetch failed: {str(e)}")
+            logger.error("HTTP REST fetch failed: %s", e)
             # Return hardcoded brands as fallback
             fallback_brands = ["Apple", "Dell", "HP", "Lenovo", "ASUS", "Acer", "Samsung", "Microsoft", "Sony", "LG",
                              "Canon", "Nikon", "Nike", "Adidas", "Amazon", "Google", "Intel", "AMD", "NVIDIA", "Tesla"]
-            logger.info(f"Using hardcoded fallback brands: {len(fallback_brands)} brands")
+            logger.info("Using hardcoded fallback brands: %s brands", len(fallback_brands))
             return fallback_brands[:limit]
 
     def get_available_colors(self, limit: int = 50) -> List[str]:
@@ -297,15 +395,13 @@ class WeaviateClientSingleton:
             # Sort by frequency (most frequent first)
             color_list = sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
             color_list = [color for color, count in color_list[:limit]]
-            logger.info(f"HTTP REST method successful: Found {len(color_list)} unique colors")
+            logger.info("HTTP REST method successful: Found %s unique colors", len(color_list))
             return color_list
 
         except Exception as e:
-            logger.error(f"HTTP REST fetch failed: {str(e)}")
+            logger.error("HTTP REST fetch failed: %s", e)
             # Return hardcoded colors as fallback
             fallback_colors = ["Black", "White", "Gray", "Silver", "Blue", "Red", "Green", "Gold", "Pink", "Purple",
                              "Yellow", "Orange", "Brown", "Navy", "Beige", "Tan", "Maroon", "Teal", "Olive", "Coral"]
-            logger.info(f"Using hardcoded fallback colors: {len(fallback_colors)} colors")
-            return fallback_colors[:limit]
-
-weaviate_client = WeaviateClientSingleton()
\ No newline at end of file
+            logger.info("Using hardcoded fallback colors: %s colors", len(fallback_colors))
+            return fallback_colors[:limit]
\ No newline at end of file
@@ -1,7 +1,8 @@
 import streamlit as st
 import time
 import logging
-from utils import send_chat_message
+from utils import send_chat_message, get_chat_summary
+from components.search_results import set_search_results
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,30 @@ def simulate_streaming_response(text: str, placeholder) -> None:
 
     placeholder.markdown(displayed_text.strip())
 
+def render_pending_summary(session_id: str, chat_container) -> None:
+    """Wait for the background AI summary of a new search and stream it into the chat"""
+    with chat_container:
+        with st.chat_message("assistant"):
+            response_placeholder = st.empty()
+            response_placeholder.markdown("🤖 Summarizing your results...")
+
+            summary = None
+            for _ in range(4):  # Long-poll up to ~2 minutes, matching the other backend timeouts
+                summary = get_chat_summary(session_id, wait=30)
+                if not summary or summary.get("status") != "pending":
+                    break
+
+            if summary and summary.get("status") == "ready" and summary.get("message"):
+                assistant_content = summary["message"]["content"]
+                simulate_streaming_response(assistant_content, response_placeholder)
+            else:
+                logger.error(f"AI summary not available for session {session_id}")
+                assistant_content = "❌ I couldn't summarize these results, but you can browse them and ask me follow-up questions."
+                response_placeholder.markdown(assistant_content)
+
+    st.session_state.messages.append({"role": "assistant", "content": assistant_content})
+    st.session_state.pending_summary = False
+
 def render_chat_interface(session_id: str = None) -> None:
     """Render the complete chat interface"""
     logger.info("Rendering chat interface")
@@ -27,8 +52,9 @@ def render_chat_interface(session_id: str = None) -> None:
         logger.info("Reset chat button clicked")
         st.session_state.searched = False
         st.session_state.messages = []
-        st.session_state.products = []
+        set_search_results([])
         st.session_state.session_id = None
+        st.session_state.pending_summary = False
         st.rerun()
 
     chat_container = st.container(height=650, border=False)
@@ -38,6 +64,9 @@ def render_chat_interface(session_id: str = None) -> None:
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
 
+    if st.session_state.get("pending_summary") and session_id:
+        render_pending_summary(session_id, chat_container)
+
     # Fixed CSS for chat input and container positioning
     st.markdown("""
         <style>
@@ -127,7 +156,8 @@ def render_chat_interface(session_id: str = None) -> None:
                     from utils import get_session_products
                     updated_results = get_session_products(session_id)
                     if updated_results and updated_results.get("products"):
-                        st.session_state.products = updated_results["products"]
+                        # Ran with a query generated from the conversation, so there are no further pages to fetch
+                        set_search_results(updated_results["products"])
                         logger.info(f"Updated search results with {len(updated_results['products'])} products")
 
                         # Show success message about updated results
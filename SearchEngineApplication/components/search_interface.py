@@ -1,10 +1,76 @@
 import streamlit as st
 import time
 import logging
-from utils import start_chat_session, get_session_products, get_available_brands, get_available_colors, search_products
+from utils import start_chat_session, get_available_brands, get_available_colors, search_products, suggest_products
+from components.search_results import set_search_results
+
+try:
+    from st_keyup import st_keyup  # pip install streamlit-keyup
+except ImportError:
+    st_keyup = None
 
 logger = logging.getLogger(__name__)
 
+INSTANT_SEARCH_DEBOUNCE_MS = 300  # Wait for a pause in typing before asking for suggestions
+MIN_SUGGEST_LENGTH = 2
+SUGGESTION_LIMIT = 8
+SUGGEST_CACHE_SIZE = 50  # Recent queries per session, so backspacing does not ask again
+SUGGEST_POLL_INTERVAL = 0.1  # Seconds between checks for the matches of an in-flight request
+
+# While a request is in flight only the suggestions are rerun (Streamlit >= 1.37); older versions rerun the page
+_fragment = getattr(st, "fragment", lambda func: func)
+
+def _rerun_suggestions() -> None:
+    if hasattr(st, "fragment"):
+        st.rerun(scope="fragment")
+    st.rerun()
+
+def _instant_search_input() -> str:
+    if st_keyup is not None:
+        return st_keyup(
+            "Search",
+            placeholder="Looking to Search...",
+            debounce=INSTANT_SEARCH_DEBOUNCE_MS,
+            label_visibility="collapsed",
+            key="instant_query"
+        )
+    # Without streamlit-keyup the value only updates on Enter or when the input loses focus
+    return st.text_input("Search", placeholder="Looking to Search...", label_visibility="collapsed", key="instant_query")
+
+@_fragment
+def render_suggestions(query: str) -> None:
+    """
+    Render quick keyword matches for the text typed so far. The script never waits
+    for the backend: while the request is in flight a placeholder is shown and the
+    suggestions rerun shortly, and a keystroke in between starts a newer request
+    that cancels this one
+    """
+    query = (query or "").strip()
+    if len(query) < MIN_SUGGEST_LENGTH:
+        return
+
+    cache = st.session_state.setdefault("suggest_cache", {})
+    products = cache.get(query.lower())
+    if products is None:
+        done, products = suggest_products(query, limit=SUGGESTION_LIMIT)
+        if not done:
+            st.caption("Looking for quick matches...")
+            time.sleep(SUGGEST_POLL_INTERVAL)
+            _rerun_suggestions()
+        if products is None:
+            return  # Failed; the next keystroke asks again
+        cache[query.lower()] = products
+        if len(cache) > SUGGEST_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+
+    if not products:
+        st.caption("No quick matches - press Search for AI-powered results")
+        return
+
+    for product in products:
+        color = f" · {product['color']}" if product.get("color") else ""
+        st.markdown(f"**{product['title']}** · {product['brand']}{color}")
+
 def render_search_interface():
     """Render the initial search interface"""
     logger.info("Rendering search interface")
@@ -13,130 +79,145 @@ def render_search_interface():
 
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        with st.form("search_form"):
-            search_query = st.text_input("Search", placeholder="Looking to Search...", label_visibility="collapsed")
-            submit_button = st.form_submit_button("Search", use_container_width=True)
-
-            if submit_button and search_query:
-                logger.info(f"Search submitted: '{search_query}'")
-
-                # Create progress container
-                progress_container = st.container()
-
-                with progress_container:
-                    progress_bar = st.progress(0)
+        st.toggle(
+            "⚡ Instant results",
+            key="instant_search",
+            help="Show keyword matches while you type; the AI search and chat start when you press Search"
+        )
+
+        if st.session_state.get("instant_search"):
+            search_query = _instant_search_input()
+            submit_button = st.button("Search", use_container_width=True)
+            render_suggestions(search_query)
+        else:
+            with st.form("search_form"):
+                search_query = st.text_input("Search", placeholder="Looking to Search...", label_visibility="collapsed")
+                submit_button = st.form_submit_button("Search", use_container_width=True)
+
+        if submit_button and search_query:
+            logger.info(f"Search submitted: '{search_query}'")
+
+            # Create progress container
+            progress_container = st.container()
+
+            with progress_container:
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+
+                status_text.markdown("🔍 **Starting AI-powered search...**")
+                progress_bar.progress(25)
+
+                try:
+                    # Check for filters and existing session
+                    active_brand = getattr(st.session_state, 'active_brand_filter', None)
+                    active_color = getattr(st.session_state, 'active_color_filter', None)
+
+                    # Check if we have an existing session and no filters have changed
+                    has_existing_session = hasattr(st.session_state, 'session_id') and st.session_state.session_id
+
+                    # Always create a fresh session with current search context
+                    # This ensures the AI always gets the most recent search results
+                    if active_brand or active_color:
+                        status_text.markdown("🤖 **Connecting to AI assistant with filters...**")
+                        chat_response = start_chat_session(
+                            search_query,
+                            brand_filter=active_brand,
+                            color_filter=active_color,
+                            async_summary=True
+                        )
+                    else:
+                        status_text.markdown("🤖 **Connecting to AI assistant...**")
+                        chat_response = start_chat_session(search_query, async_summary=True)
+
+                    session_id = chat_response["session_id"]
+
+                    progress_bar.progress(75)
+
+                    if not chat_response:
+                        raise Exception("Failed to start chat session")
+
+                except Exception as e:
+                    progress_container.empty()
+                    st.error(f"❌ Search failed: {str(e)}")
+                    st.error("Please check if the backend server is running and try again.")
+                    return
+
+            progress_container.empty()
+
+            if chat_response:
+                logger.info(f"Chat session started successfully: {session_id}")
+
+                # Create a new progress container for product retrieval
+                with st.container():
+                    progress_bar = st.progress(75)
                     status_text = st.empty()
 
-                    status_text.markdown("🔍 **Starting AI-powered search...**")
-                    progress_bar.progress(25)
-
                     try:
-                        # Check for filters and existing session
-                        active_brand = getattr(st.session_state, 'active_brand_filter', None)
-                        active_color = getattr(st.session_state, 'active_color_filter', None)
-
-                        # Check if we have an existing session and no filters have changed
-                        has_existing_session = hasattr(st.session_state, 'session_id') and st.session_state.session_id
-
-                        # Always create a fresh session with current search context
-                        # This ensures the AI always gets the most recent search results
-                        if active_brand or active_color:
-                            status_text.markdown("🤖 **Connecting to AI assistant with filters...**")
-                            chat_response = start_chat_session(
-                                search_query,
-                                brand_filter=active_brand,
-                                color_filter=active_color
-                            )
-                        else:
-                            status_text.markdown("🤖 **Connecting to AI assistant...**")
-                            chat_response = start_chat_session(search_query)
+                        status_text.markdown("📦 **Getting search results...**")
+
+                        # The backend returns the products with the session, the AI summary follows separately
+                        search_results = chat_response
+
+                        progress_bar.progress(100)
+
+                        if search_results and search_results.get("products"):
+                            st.session_state.searched = True
+                            st.session_state.session_id = session_id
+
+                            # Build conversation history: keep previous messages + add new exchange
+                            user_message = search_query
+                            if active_brand or active_color:
+                                filter_desc = []
+                                if active_brand:
+                                    filter_desc.append(f"Brand: {active_brand}")
+                                if active_color:
+                                    filter_desc.append(f"Color: {active_color}")
+                                user_message = f"{search_query} (with filters: {', '.join(filter_desc)})"
+
+                            # Preserve conversation history if it exists, otherwise start fresh
+                            if has_existing_session and hasattr(st.session_state, 'messages') and st.session_state.messages:
+                                # Append new exchange to existing conversation
+                                st.session_state.messages.append({"role": "user", "content": user_message})
+                            else:
+                                # Start fresh conversation
+                                st.session_state.messages = [{"role": "user", "content": user_message}]
+
+                            # The chat interface picks up the assistant summary once it is ready
+                            if chat_response.get("initial_message"):
+                                st.session_state.messages.append(
+                                    {"role": "assistant", "content": chat_response["initial_message"]["content"]}
+                                )
+                                st.session_state.pending_summary = False
+                            else:
+                                st.session_state.pending_summary = True
 
-                        session_id = chat_response["session_id"]
+                            set_search_results(search_results["products"], search_query, active_brand, active_color)
 
-                        progress_bar.progress(75)
+                            # Show filter status in success message
+                            result_msg = f"Search completed: found {len(search_results['products'])} products"
+                            if active_brand or active_color:
+                                filter_desc = []
+                                if active_brand:
+                                    filter_desc.append(f"Brand: {active_brand}")
+                                if active_color:
+                                    filter_desc.append(f"Color: {active_color}")
+                                result_msg += f" (with filters: {', '.join(filter_desc)})"
 
-                        if not chat_response:
-                            raise Exception("Failed to start chat session")
+                            logger.info(result_msg)
 
-                    except Exception as e:
-                        progress_container.empty()
-                        st.error(f"❌ Search failed: {str(e)}")
-                        st.error("Please check if the backend server is running and try again.")
-                        return
-
-                progress_container.empty()
-
-                if chat_response:
-                    logger.info(f"Chat session started successfully: {session_id}")
-
-                    # Create a new progress container for product retrieval
-                    with st.container():
-                        progress_bar = st.progress(75)
-                        status_text = st.empty()
-
-                        try:
-                            status_text.markdown("📦 **Getting search results...**")
-
-                            # Get session products (backend already performed the search with correct filters)
-                            search_results = get_session_products(session_id)
-
-                            progress_bar.progress(100)
-
-                            if search_results and search_results.get("products"):
-                                st.session_state.searched = True
-                                st.session_state.session_id = session_id
-
-                                # Build conversation history: keep previous messages + add new exchange
-                                user_message = search_query
-                                if active_brand or active_color:
-                                    filter_desc = []
-                                    if active_brand:
-                                        filter_desc.append(f"Brand: {active_brand}")
-                                    if active_color:
-                                        filter_desc.append(f"Color: {active_color}")
-                                    user_message = f"{search_query} (with filters: {', '.join(filter_desc)})"
-
-                                # Preserve conversation history if it exists, otherwise start fresh
-                                if has_existing_session and hasattr(st.session_state, 'messages') and st.session_state.messages:
-                                    # Append new exchange to existing conversation
-                                    st.session_state.messages.extend([
-                                        {"role": "user", "content": user_message},
-                                        {"role": "assistant", "content": chat_response["initial_message"]["content"]}
-                                    ])
-                                else:
-                                    # Start fresh conversation
-                                    st.session_state.messages = [
-                                        {"role": "user", "content": user_message},
-                                        {"role": "assistant", "content": chat_response["initial_message"]["content"]}
-                                    ]
-
-                                st.session_state.products = search_results["products"]
-
-                                # Show filter status in success message
-                                result_msg = f"Search completed: found {len(search_results['products'])} products"
-                                if active_brand or active_color:
-                                    filter_desc = []
-                                    if active_brand:
-                                        filter_desc.append(f"Brand: {active_brand}")
-                                    if active_color:
-                                        filter_desc.append(f"Color: {active_color}")
-                                    result_msg += f" (with filters: {', '.join(filter_desc)})"
-
-                                logger.info(result_msg)
-
-                                status_text.markdown("✅ **Search completed successfully!**")
-                                progress_bar.empty()
-                                status_text.empty()
-
-                                st.rerun()
-                            else:
-                                progress_bar.empty()
-                                status_text.empty()
-                                logger.warning("No products found in search results")
-                                st.warning("🔍 No products found for your search query. Please try different keywords.")
+                            status_text.markdown("✅ **Search completed successfully!**")
+                            progress_bar.empty()
+                            status_text.empty()
 
-                        except Exception as e:
+                            st.rerun()
+                        else:
                             progress_bar.empty()
                             status_text.empty()
-                            logger.error(f"Error getting products: {str(e)}")
-                            st.error("❌ Error retrieving search results. Please try again.")
\ No newline at end of file
+                            logger.warning("No products found in search results")
+                            st.warning("🔍 No products found for your search query. Please try different keywords.")
+
+                    except Exception as e:
+                        progress_bar.empty()
+                        status_text.empty()
+                        logger.error(f"Error getting products: {str(e)}")
+                        st.error("❌ Error retrieving search results. Please try again.")
\ No newline at end of file
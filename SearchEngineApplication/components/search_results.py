@@ -1,24 +1,124 @@
 import streamlit as st
 from streamlit_modal import Modal
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
+from utils import get_product_details, search_products
 
 logger = logging.getLogger(__name__)
 
-def render_product_card(product: Dict) -> None:
-    """Render an individual product card with modal details"""
-    rating = product.get("rating", 0)
-    stars = "⭐" * int(rating) + "☆" * (5 - int(rating)) if rating > 0 else "No rating"
+RESULTS_PAGE_SIZE = 10  # Cards rendered per page, matching the backend's page of search results
+REFINE_POOL_SIZE = 100  # Unfiltered results fetched once per query for refining by brand/color locally
+MIN_REFINED_RESULTS = RESULTS_PAGE_SIZE  # With fewer local matches the backend is searched instead
+
+def set_search_results(
+    products: List[Dict],
+    query: Optional[str] = None,
+    brand_filter: str = None,
+    color_filter: str = None,
+    has_more: Optional[bool] = None
+) -> None:
+    """
+    Replace the displayed results and show their first page. With the `query` and
+    filters that produced them, further pages are fetched from /search on demand
+    """
+    st.session_state.products = products
+    st.session_state.results_query = {"query": query, "brand_filter": brand_filter, "color_filter": color_filter} if query else None
+    st.session_state.results_page = 0
+    if has_more is None:
+        # A full first page means the search may have more results
+        has_more = bool(query) and len(products) >= RESULTS_PAGE_SIZE
+    st.session_state.results_has_more = has_more
+    st.session_state.detail_product_id = None
+
+def get_refine_pool(query: str) -> Optional[Dict]:
+    """The top REFINE_POOL_SIZE unfiltered results for `query` with card fields only, fetched once per query"""
+    pool = st.session_state.get("refine_pool")
+    if pool and pool["query"] == query:
+        return pool
+
+    with st.spinner("🔍 Fetching results to filter..."):
+        result = search_products(query, limit=REFINE_POOL_SIZE, compact=True)
+    if not result:
+        return None
+
+    # Fewer results than asked for means these are all the matches there are
+    pool = {"query": query, "products": result.get("products", []), "complete": not result.get("has_more", False)}
+    st.session_state.refine_pool = pool
+    logger.info(f"Fetched {len(pool['products'])} results for local filtering of '{query}'")
+    return pool
+
+def refine_results(query: str, brand_filter: str = None, color_filter: str = None) -> bool:
+    """
+    Show the results of `query` narrowed to the filters without a filtered backend
+    search. Returns False when the over-fetched results have too few matches and
+    may be missing some; the caller should then search the backend.
+
+    Ranking does not depend on the filters, so the matches are the first results
+    of the filtered search and "Next" continues it at their offset.
+    """
+    pool = get_refine_pool(query)
+    if pool is None:
+        return False
+
+    matches = [
+        product for product in pool["products"]
+        if (not brand_filter or product.get("brand") == brand_filter)
+        and (not color_filter or product.get("color") == color_filter)
+    ]
+    if len(matches) < MIN_REFINED_RESULTS and not pool["complete"]:
+        logger.info(f"Only {len(matches)} of {len(pool['products'])} fetched results match, searching the backend")
+        return False
+
+    logger.info(f"Refined results locally: {len(matches)} of {len(pool['products'])} match brand={brand_filter}, color={color_filter}")
+    set_search_results(matches, query, brand_filter, color_filter, has_more=not pool["complete"])
+    return True
+
+def load_next_page() -> None:
+    """Show the next page of cards, fetching it from the backend once the loaded products run out"""
+    products = st.session_state.products
+    page_number = st.session_state.results_page + 1
+
+    if (page_number + 1) * RESULTS_PAGE_SIZE > len(products) and st.session_state.results_has_more:
+        search = st.session_state.results_query
+        with st.spinner("Loading more products..."):
+            page = search_products(
+                search["query"],
+                limit=RESULTS_PAGE_SIZE,
+                brand_filter=search["brand_filter"],
+                color_filter=search["color_filter"],
+                offset=len(products)
+            )
+
+        if page:
+            seen = {product["id"] for product in products}
+            products.extend(product for product in page.get("products", []) if product["id"] not in seen)
+            st.session_state.results_has_more = page.get("has_more", False)
+            logger.info(f"Loaded page at offset {page.get('offset')}: {len(products)} products in total")
+        else:
+            st.session_state.results_has_more = False
+
+    # Stay put when the fetch came back empty
+    if page_number * RESULTS_PAGE_SIZE < len(products):
+        st.session_state.results_page = page_number
+
+def load_previous_page() -> None:
+    """Show the previous page of cards, which is already loaded"""
+    st.session_state.results_page = max(st.session_state.results_page - 1, 0)
 
+def _short_title(product: Dict) -> str:
+    return product['title'][:20] + '...' if len(product['title']) > 20 else product['title']
+
+def _detail_modal(title: str) -> Modal:
+    # One modal for all cards, so a rerun builds a single modal instead of one per card
+    return Modal(title, key="product_details", padding=20, max_width=700)
+
+def render_product_card(product: Dict) -> None:
+    """Render an individual product card; its details load in the shared modal"""
     color_display = product.get('color', 'N/A') if product.get('color') else 'N/A'
     price_display = product.get('price', 'Price not available')
 
     # Truncate title for header display
-    display_title = product['title'][:20] + '...' if len(product['title']) > 20 else product['title']
-
-    # Create modal first
-    modal_title = product['title'][:20] + '...' if len(product['title']) > 20 else product['title']
-    modal = Modal(modal_title, key=f"modal_{product['id']}", padding=20, max_width=700)
+    display_title = _short_title(product)
 
     # Create card structure with content and button in proper layout
     st.markdown(
@@ -41,67 +141,94 @@ def render_product_card(product: Dict) -> None:
     with button_col:
         if st.button("View Details", key=f"details_{product['id']}", type="primary", use_container_width=True):
             logger.info(f"Opening modal for product: {product['title']}")
-            modal.open()
-
-    if modal.is_open():
-        with modal.container():
-            # Add custom CSS for the modal
-            st.markdown(
-                """
-                <style>
-                .modal-content-container {
-                    max-height: 500px;
-                    overflow-y: auto;
-                    padding-right: 10px;
-                }
-                .modal-content-container::-webkit-scrollbar {
-                    width: 8px;
-                }
-                .modal-content-container::-webkit-scrollbar-track {
-                    background: #1E293B;
-                    border-radius: 4px;
-                }
-                .modal-content-container::-webkit-scrollbar-thumb {
-                    background: #14B8A6;
-                    border-radius: 4px;
-                }
-                .modal-content-container::-webkit-scrollbar-thumb:hover {
-                    background: #0F766E;
-                }
-                </style>
-                """,
-                unsafe_allow_html=True
-            )
+            st.session_state.detail_product_id = product['id']
+            _detail_modal(display_title).open()
 
-            # Create scrollable container
-            st.markdown('<div class="modal-content-container">', unsafe_allow_html=True)
+def render_product_details(products: List[Dict]) -> None:
+    """Render the modal of the selected product, fetching its details from the backend on first open"""
+    product_id = st.session_state.get("detail_product_id")
+    summary = next((product for product in products if product['id'] == product_id), None)
+    if summary is None:
+        return
 
-            # Main details in a clean layout
-            col1, col2 = st.columns(2)
+    modal = _detail_modal(_short_title(summary))
+    if not modal.is_open():
+        return
 
-            with col1:
-                st.markdown(f"**Brand:** {product['brand']}")
-                st.markdown(f"**Color:** {color_display}")
+    details_cache = st.session_state.setdefault("product_details", {})
+    product = details_cache.get(product_id)
+    if product is None:
+        with st.spinner("Loading product details..."):
+            product = get_product_details(product_id)
+        if product is not None:
+            details_cache[product_id] = product
+        else:
+            product = summary  # Fall back to what the search returned
 
-            with col2:
-                st.markdown(f"**Product Code:** {product['id']}")
-                st.markdown(f"**Price:** {price_display}")
+    color_display = product.get('color', 'N/A') if product.get('color') else 'N/A'
+    price_display = product.get('price', 'Price not available')
 
-            # Description with character limit
-            if product.get('description'):
-                st.markdown("---")
-                st.markdown("**Description:**")
-                # Remove HTML tags and limit characters
-                clean_description = product['description'].replace('<br>', '\n').replace('<BR>', '\n')
-                if len(clean_description) > 400:
-                    clean_description = clean_description[:400] + "..."
-                st.markdown(clean_description)
+    with modal.container():
+        # Add custom CSS for the modal
+        st.markdown(
+            """
+            <style>
+            .modal-content-container {
+                max-height: 500px;
+                overflow-y: auto;
+                padding-right: 10px;
+            }
+            .modal-content-container::-webkit-scrollbar {
+                width: 8px;
+            }
+            .modal-content-container::-webkit-scrollbar-track {
+                background: #1E293B;
+                border-radius: 4px;
+            }
+            .modal-content-container::-webkit-scrollbar-thumb {
+                background: #14B8A6;
+                border-radius: 4px;
+            }
+            .modal-content-container::-webkit-scrollbar-thumb:hover {
+                background: #0F766E;
+            }
+            </style>
+            """,
+            unsafe_allow_html=True
+        )
 
-            st.markdown('</div>', unsafe_allow_html=True)
+        # Create scrollable container
+        st.markdown('<div class="modal-content-container">', unsafe_allow_html=True)
+
+        # Main details in a clean layout
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown(f"**Brand:** {product['brand']}")
+            st.markdown(f"**Color:** {color_display}")
+
+        with col2:
+            st.markdown(f"**Product Code:** {product['id']}")
+            st.markdown(f"**Price:** {price_display}")
+
+        # Description with character limit
+        if product.get('description'):
+            st.markdown("---")
+            st.markdown("**Description:**")
+            # Remove HTML tags and limit characters
+            clean_description = product['description'].replace('<br>', '\n').replace('<BR>', '\n')
+            if len(clean_description) > 400:
+                clean_description = clean_description[:400] + "..."
+            st.markdown(clean_description)
+
+        st.markdown('</div>', unsafe_allow_html=True)
 
 def render_search_results(products: List[Dict]) -> None:
-    """Render the complete search results section"""
-    logger.info(f"Rendering search results with {len(products)} products")
+    """Render the search results section, one page of cards at a time"""
+    page_number = st.session_state.get("results_page", 0)
+    start = page_number * RESULTS_PAGE_SIZE
+    page = products[start:start + RESULTS_PAGE_SIZE]
+    logger.info(f"Rendering products {start + 1}-{start + len(page)} of {len(products)}")
 
     st.header("Search Results")
 
@@ -109,13 +236,25 @@ def render_search_results(products: List[Dict]) -> None:
     with results_container:
         # Add padding wrapper to prevent card hover overflow
         st.markdown('<div style="padding: 1.5rem; margin: 0.5rem;">', unsafe_allow_html=True)
-        if products:
+        if page:
             grid_cols = st.columns(2)
-            for i, product in enumerate(products):
+            for i, product in enumerate(page):
                 with grid_cols[i % 2]:
                     render_product_card(product)
+
+            has_next = len(products) > start + RESULTS_PAGE_SIZE or st.session_state.get("results_has_more")
+            if page_number > 0 or has_next:
+                previous_col, page_col, next_col = st.columns([1, 1, 1])
+                with previous_col:
+                    st.button("← Previous", key="previous_results", on_click=load_previous_page, disabled=page_number == 0, use_container_width=True)
+                with page_col:
+                    st.markdown(f"<div style='text-align: center; padding-top: 0.5rem;'>Page {page_number + 1}</div>", unsafe_allow_html=True)
+                with next_col:
+                    st.button("Next →", key="next_results", on_click=load_next_page, disabled=not has_next, use_container_width=True)
         else:
             logger.warning("No products to display")
             st.info("No products found.")
 
-        st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    render_product_details(page)
@@ -1,19 +1,206 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
 import requests
 import streamlit as st
 import logging
-from typing import Dict, Optional
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from urllib3.util.retry import Retry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BACKEND_URL = "http://localhost:8000"
 
-def start_chat_session(query: str, user_id: str = None, brand_filter: str = None, color_filter: str = None) -> Optional[Dict]:
+HTTP_POOL_SIZE = 20  # Keep-alive connections to the backend, shared by all Streamlit sessions
+GET_RETRIES = 3  # Attempts after the first for GETs that fail to connect or get a 502/503/504
+RETRY_STATUS_CODES = (502, 503, 504)
+
+USER_ID_HEADER = "X-User-Id"  # The backend's admission control limits each user separately
+
+FACET_CACHE_TTL = 300  # Seconds between brand/color refreshes, same as the backend's cache
+FACET_RETRY_INTERVAL = 30  # Retry sooner while the backend is unreachable
+HEALTH_CHECK_INTERVAL = 10  # Seconds between background readiness probes
+HEALTH_CHECK_TIMEOUT = 2
+SUGGEST_TIMEOUT = 5  # Suggestions are only useful while the user is typing
+
+# Browser session whose script submitted the current async call, see AsyncBackendClient.submit
+_request_user: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar("request_user", default=None)
+
+def get_browser_user_id() -> Optional[str]:
+    """
+    Id of the browser session running the current script, None on background threads.
+
+    Sent as X-User-Id so the backend's per-user limits apply to each visitor; all
+    requests come from this one server, so the backend cannot tell users apart otherwise.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+class BackendSession(requests.Session):
+    """requests session that tags every request with the browser session's X-User-Id"""
+
+    def request(self, method, url, **kwargs):
+        user_id = get_browser_user_id()
+        if user_id:
+            kwargs["headers"] = {USER_ID_HEADER: user_id, **(kwargs.get("headers") or {})}
+        return super().request(method, url, **kwargs)
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """
+    Process-wide requests session with a keep-alive connection pool, reused across reruns and sessions.
+
+    GETs are retried with backoff on connection errors and gateway errors; POSTs
+    are only retried when the connection could not be made, so a chat message is
+    never sent twice.
+    """
+    retry = Retry(
+        total=GET_RETRIES,
+        connect=GET_RETRIES,
+        read=GET_RETRIES,
+        status=GET_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = BackendSession()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    logger.info(f"Created pooled HTTP session for {BACKEND_URL} (pool size {HTTP_POOL_SIZE})")
+    return session
+
+class AsyncBackendClient:
+    """
+    httpx.AsyncClient running on a private event loop thread.
+
+    Streamlit scripts are synchronous; submitting coroutines to this loop lets a
+    script run several independent backend calls concurrently while the client
+    keeps its connections alive across reruns.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = HTTP_POOL_SIZE):
+        import httpx
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="backend-client", daemon=True)
+        self._thread.start()
+
+        async def add_user_header(request: "httpx.Request") -> None:
+            user_id = _request_user.get()
+            if user_id:
+                request.headers.setdefault(USER_ID_HEADER, user_id)
+
+        async def create_client() -> "httpx.AsyncClient":
+            return httpx.AsyncClient(
+                base_url=base_url,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                transport=httpx.AsyncHTTPTransport(retries=GET_RETRIES),  # Connection failures only, safe for POSTs
+                event_hooks={"request": [add_user_header]}
+            )
+
+        self.client = self.submit(create_client()).result()
+
+    def submit(self, coroutine: Awaitable) -> concurrent.futures.Future:
+        # The loop thread has no Streamlit context; carry the caller's browser session over
+        user_id = get_browser_user_id()
+
+        async def run_as_user():
+            _request_user.set(user_id)
+            return await coroutine
+
+        return asyncio.run_coroutine_threadsafe(run_as_user(), self._loop)
+
+    def gather(self, *coroutines: Awaitable) -> List[Any]:
+        """Run the coroutines concurrently and wait for all results (exceptions are returned, not raised)"""
+        async def gather_all():
+            return await asyncio.gather(*coroutines, return_exceptions=True)
+
+        return self.submit(gather_all()).result()
+
+    async def get_json(self, path: str, timeout: float, **kwargs) -> Optional[Dict]:
+        """GET with the same retries as the sync session; None unless the backend answers 200"""
+        for attempt in range(GET_RETRIES + 1):
+            response = await self.client.get(path, timeout=timeout, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == GET_RETRIES:
+                break
+            await asyncio.sleep(0.3 * 2 ** attempt)
+
+        if response.status_code == 200:
+            return response.json()
+        logger.error(f"GET {path} failed with status {response.status_code}")
+        return None
+
+@st.cache_resource
+def get_async_client() -> AsyncBackendClient:
+    return AsyncBackendClient(BACKEND_URL)
+
+def run_concurrently(*coroutines: Awaitable) -> List[Any]:
+    """Run independent async calls (e.g. get_available_brands_async()) concurrently on the shared client"""
+    return get_async_client().gather(*coroutines)
+
+class FacetCache:
+    """
+    Brand and color lists shared by every session of this Streamlit process.
+
+    A background thread fetches both lists concurrently and refreshes them every
+    `ttl` seconds (sooner after a failed fetch), so reading them never waits on
+    the backend. Until the first fetch completes the lists are empty, and a
+    failed refresh keeps the previous lists.
+    """
+
+    def __init__(self, ttl: float = FACET_CACHE_TTL, retry_interval: float = FACET_RETRY_INTERVAL):
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.brands: List[str] = []
+        self.colors: List[str] = []
+        self.fetched_at: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name="facet-refresh", daemon=True)
+        self._thread.start()
+
+    def refresh(self) -> bool:
+        brands, colors = run_concurrently(get_available_brands_async(), get_available_colors_async())
+        ok = True
+        # The async helpers return [] on errors; keep what we had rather than emptying the filters
+        if isinstance(brands, list) and brands:
+            self.brands = brands
+        else:
+            ok = False
+        if isinstance(colors, list) and colors:
+            self.colors = colors
+        else:
+            ok = False
+        if ok:
+            self.fetched_at = time.time()
+        logger.info(f"Facet cache refreshed: {len(self.brands)} brands, {len(self.colors)} colors (complete: {ok})")
+        return ok
+
+    def _run(self) -> None:
+        while True:
+            try:
+                ok = self.refresh()
+            except Exception as e:
+                logger.error(f"Facet cache refresh failed: {str(e)}")
+                ok = False
+            time.sleep(self.ttl if ok else self.retry_interval)
+
+@st.cache_resource
+def get_facet_cache() -> FacetCache:
+    """The process-wide facet cache; the first call starts its background refresh"""
+    return FacetCache()
+
+def start_chat_session(query: str, user_id: str = None, brand_filter: str = None, color_filter: str = None, async_summary: bool = False) -> Optional[Dict]:
     """Start a new chat session with the backend"""
     try:
         logger.info(f"FRONTEND: Starting chat session for query: '{query}' with brand_filter: {brand_filter}, color_filter: {color_filter}")
 
-        payload = {"query": query, "user_id": user_id}
+        payload = {"query": query, "user_id": user_id, "async_summary": async_summary}
         if brand_filter:
             payload["brand_filter"] = brand_filter
             logger.info(f"FRONTEND: Added brand_filter to payload: {brand_filter}")
@@ -23,7 +210,7 @@ def start_chat_session(query: str, user_id: str = None, brand_filter: str = None
 
         logger.info(f"FRONTEND: Full payload being sent: {payload}")
 
-        response = requests.post(
+        response = get_http_session().post(
             f"{BACKEND_URL}/chat/start",
             json=payload,
             timeout=120  # Increased to match backend Weaviate timeouts
@@ -60,6 +247,29 @@ def start_chat_session(query: str, user_id: str = None, brand_filter: str = None
         st.error(f"❌ {error_msg}")
         return None
 
+def get_chat_summary(session_id: str, wait: float = 0) -> Optional[Dict]:
+    """Get the initial assistant message of a session, long-polling up to `wait` seconds while it is pending"""
+    try:
+        logger.info(f"Getting chat summary for session {session_id} (wait: {wait}s)")
+
+        response = get_http_session().get(
+            f"{BACKEND_URL}/chat/{session_id}/summary",
+            params={"wait": wait},
+            timeout=wait + 10
+        )
+
+        if response.status_code == 200:
+            result = response.json()
+            logger.info(f"Chat summary status for session {session_id}: {result.get('status')}")
+            return result
+        else:
+            logger.error(f"Failed to get chat summary with status {response.status_code}")
+            return None
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error getting chat summary: {str(e)}")
+        return None
+
 def send_chat_message(session_id: str, message: str, user_id: str = None, brand_filter: str = None, color_filter: str = None) -> Optional[Dict]:
     """Send a message to an existing chat session"""
     try:
@@ -74,7 +284,7 @@ def send_chat_message(session_id: str, message: str, user_id: str = None, brand_
 
         logger.info(f"Sending chat message with filters - Brand: {brand_filter}, Color: {color_filter}")
 
-        response = requests.post(
+        response = get_http_session().post(
             f"{BACKEND_URL}/chat/message",
             json=payload,
             timeout=120  # Increased to match backend processing time
@@ -116,14 +326,19 @@ def send_chat_message(session_id: str, message: str, user_id: str = None, brand_
         st.error(f"❌ {error_msg}")
         return None
 
-def search_products(query: str, limit: int = 10, brand_filter: str = None, color_filter: str = None) -> Optional[Dict]:
-    """Search for products using the backend Weaviate semantic search"""
+def search_products(query: str, limit: int = 10, brand_filter: str = None, color_filter: str = None, offset: int = 0, compact: bool = False) -> Optional[Dict]:
+    """
+    Search for products using the backend Weaviate semantic search; `offset` fetches
+    later pages and `compact` leaves out descriptions and bullet points
+    """
     try:
-        logger.info(f"Searching products for query: '{query}'")
+        logger.info(f"Searching products for query: '{query}' (offset: {offset})")
 
         payload = {
             "query": query,
-            "limit": limit
+            "limit": limit,
+            "offset": offset,
+            "compact": compact
         }
 
         if brand_filter:
@@ -131,7 +346,7 @@ def search_products(query: str, limit: int = 10, brand_filter: str = None, color
         if color_filter:
             payload["color_filter"] = color_filter
 
-        response = requests.post(
+        response = get_http_session().post(
             f"{BACKEND_URL}/search",
             json=payload,
             timeout=120  # Increased to match Weaviate query timeouts
@@ -173,7 +388,7 @@ def get_available_brands() -> Optional[list]:
     try:
         logger.info("Fetching available brands")
 
-        response = requests.get(f"{BACKEND_URL}/search/brands", timeout=120)  # Increased for Weaviate aggregate queries
+        response = get_http_session().get(f"{BACKEND_URL}/search/brands", timeout=120)  # Increased for Weaviate aggregate queries
 
         if response.status_code == 200:
             result = response.json()
@@ -193,7 +408,7 @@ def get_available_colors() -> Optional[list]:
     try:
         logger.info("Fetching available colors")
 
-        response = requests.get(f"{BACKEND_URL}/search/colors", timeout=120)  # Increased for Weaviate aggregate queries
+        response = get_http_session().get(f"{BACKEND_URL}/search/colors", timeout=120)  # Increased for Weaviate aggregate queries
 
         if response.status_code == 200:
             result = response.json()
@@ -213,7 +428,7 @@ def get_session_products(session_id: str) -> Optional[Dict]:
     try:
         logger.info(f"Getting products for session: {session_id}")
 
-        response = requests.get(f"{BACKEND_URL}/chat/{session_id}/products", timeout=60)  # Increased for session lookup
+        response = get_http_session().get(f"{BACKEND_URL}/chat/{session_id}/products", timeout=60)  # Increased for session lookup
 
         if response.status_code == 200:
             result = response.json()
@@ -228,24 +443,134 @@ def get_session_products(session_id: str) -> Optional[Dict]:
         logger.error(f"Error getting session products: {str(e)}")
         return None
 
-def check_backend_health() -> bool:
-    """Check if the backend server is running and healthy"""
+def get_product_details(product_id: str) -> Optional[Dict]:
+    """Get the full details of one product, for the details modal"""
     try:
-        logger.info("Checking backend health")
+        logger.info(f"Getting details for product: {product_id}")
 
-        response = requests.get(f"{BACKEND_URL}/", timeout=5)
-        is_healthy = response.status_code == 200
+        response = get_http_session().get(f"{BACKEND_URL}/products/{product_id}", timeout=30)
 
-        if is_healthy:
-            logger.info("Backend is healthy")
+        if response.status_code == 200:
+            return response.json()
         else:
-            logger.warning(f"Backend health check failed with status {response.status_code}")
+            logger.error(f"Failed to get product details with status {response.status_code}")
+            return None
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error getting product details: {str(e)}")
+        return None
+
+def suggest_products(query: str, limit: int = 8) -> Tuple[bool, Optional[List[Dict]]]:
+    """
+    Keyword matches for search-as-you-type, without waiting for the backend.
+
+    The first call for `query` starts the request and returns (False, None); calls
+    on later reruns return (True, products) once it has finished, products being
+    None if it failed. Each session has at most one request in flight: a call with
+    a newer query cancels the previous request.
+    """
+    pending = st.session_state.get("suggest_request")
+    if pending is None or pending["query"] != query or pending["limit"] != limit:
+        if pending is not None and not pending["future"].done():
+            pending["future"].cancel()  # Cancels the task on the client's loop, closing its request
+            logger.debug(f"Suggestions for '{pending['query']}' superseded by '{query}'")
+        future = get_async_client().submit(suggest_products_async(query, limit))
+        pending = {"query": query, "limit": limit, "future": future}
+        st.session_state.suggest_request = pending
+
+    future = pending["future"]
+    if not future.done():
+        return False, None
+    result = future.result()
+    return True, result.get("products", []) if result else None
+
+class BackendHealth:
+    """
+    Backend readiness shared by every session of this Streamlit process.
+
+    A background thread probes /health/ready every `interval` seconds, so a page
+    load reads the last result instead of waiting on a round trip. `healthy` is
+    None until the first probe completes. Probes use their own keep-alive
+    session without retries; the next probe is the retry.
+    """
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL):
+        self.interval = interval
+        self.healthy: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name="backend-health", daemon=True)
+        self._thread.start()
+
+    def check(self) -> bool:
+        """Probe the backend's readiness endpoint once"""
+        try:
+            response = self._session.get(f"{BACKEND_URL}/health/ready", timeout=HEALTH_CHECK_TIMEOUT)
+            if response.status_code != 200:
+                logger.debug(f"Backend readiness check failed with status {response.status_code}")
+            return response.status_code == 200
+
+        except requests.exceptions.RequestException:
+            logger.debug("Backend readiness check failed - server not reachable")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error checking backend health: {str(e)}")
+            return False
+
+    def _run(self) -> None:
+        while True:
+            healthy = self.check()
+            if healthy != self.healthy:
+                if healthy:
+                    logger.info("Backend is healthy")
+                else:
+                    logger.warning("Backend is not ready or not reachable")
+            self.healthy = healthy
+            self.checked_at = time.time()
+            time.sleep(self.interval)
+
+@st.cache_resource
+def get_backend_health() -> BackendHealth:
+    """The process-wide health status; the first call starts the background probe"""
+    return BackendHealth()
+
+# Async variants of the read-only calls, for running independent calls together:
+#     brands, colors = run_concurrently(get_available_brands_async(), get_available_colors_async())
+
+async def get_available_brands_async() -> list:
+    """Async variant of get_available_brands"""
+    try:
+        result = await get_async_client().get_json("/search/brands", timeout=120)
+        brands = result.get("brands", []) if result else []
+        logger.info(f"Fetched {len(brands)} available brands")
+        return brands
+    except Exception as e:
+        logger.error(f"Error fetching brands: {str(e)}")
+        return []
+
+async def get_available_colors_async() -> list:
+    """Async variant of get_available_colors"""
+    try:
+        result = await get_async_client().get_json("/search/colors", timeout=120)
+        colors = result.get("colors", []) if result else []
+        logger.info(f"Fetched {len(colors)} available colors")
+        return colors
+    except Exception as e:
+        logger.error(f"Error fetching colors: {str(e)}")
+        return []
 
-        return is_healthy
+async def get_session_products_async(session_id: str) -> Optional[Dict]:
+    """Async variant of get_session_products"""
+    try:
+        return await get_async_client().get_json(f"/chat/{session_id}/products", timeout=60)
+    except Exception as e:
+        logger.error(f"Error getting session products: {str(e)}")
+        return None
 
-    except requests.exceptions.RequestException:
-        logger.warning("Backend health check failed - server not reachable")
-        return False
+async def suggest_products_async(query: str, limit: int = 8) -> Optional[Dict]:
+    """Async variant of suggest_products that waits for the matches, without the cancellation of superseded calls"""
+    try:
+        return await get_async_client().get_json("/search/suggest", timeout=SUGGEST_TIMEOUT, params={"q": query, "limit": limit})
     except Exception as e:
-        logger.error(f"Unexpected error checking backend health: {str(e)}")
-        return False
\ No newline at end of file
+        logger.error(f"Error getting suggestions: {str(e)}")
+        return None